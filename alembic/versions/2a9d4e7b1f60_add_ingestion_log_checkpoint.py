@@ -0,0 +1,29 @@
+"""add_ingestion_log_checkpoint
+
+Revision ID: 2a9d4e7b1f60
+Revises: f3c8a1d7e205
+Create Date: 2026-10-18 14:10:36.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '2a9d4e7b1f60'
+down_revision: Union[str, Sequence[str], None] = 'f3c8a1d7e205'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ingestion_log', sa.Column('cursor_url', sa.Text(), nullable=True))
+    op.add_column('ingestion_log', sa.Column('last_release_date', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('ingestion_log', 'last_release_date')
+    op.drop_column('ingestion_log', 'cursor_url')
@@ -0,0 +1,33 @@
+"""add_ukcat_ruleset_version
+
+Revision ID: 5c1e9a7d2b40
+Revises: 1a5a3a264329
+Create Date: 2026-10-18 09:12:44.201733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e9a7d2b40'
+down_revision: Union[str, Sequence[str], None] = '1a5a3a264329'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notice', sa.Column('ukcat_ruleset_version', sa.String(length=16), nullable=True))
+    op.create_index(op.f('ix_notice_ukcat_ruleset_version'), 'notice', ['ukcat_ruleset_version'], unique=False)
+    op.add_column('service_profile', sa.Column('inferred_ukcat_codes', sa.ARRAY(sa.Text()), nullable=True))
+    op.add_column('service_profile', sa.Column('ukcat_ruleset_version', sa.String(length=16), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('service_profile', 'ukcat_ruleset_version')
+    op.drop_column('service_profile', 'inferred_ukcat_codes')
+    op.drop_index(op.f('ix_notice_ukcat_ruleset_version'), table_name='notice')
+    op.drop_column('notice', 'ukcat_ruleset_version')
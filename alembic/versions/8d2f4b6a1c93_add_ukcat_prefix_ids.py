@@ -0,0 +1,31 @@
+"""add_ukcat_prefix_ids
+
+Revision ID: 8d2f4b6a1c93
+Revises: 5c1e9a7d2b40
+Create Date: 2026-10-18 10:03:17.559021
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f4b6a1c93'
+down_revision: Union[str, Sequence[str], None] = '5c1e9a7d2b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notice', sa.Column('ukcat_prefix_ids', sa.ARRAY(sa.Integer()), nullable=True))
+    op.create_index('ix_notice_ukcat_prefix_ids', 'notice', ['ukcat_prefix_ids'], unique=False, postgresql_using='gin')
+    # Existing notices get their ids on the next UKCAT re-tag run.
+    op.execute("UPDATE notice SET ukcat_ruleset_version = NULL WHERE ukcat_prefix_ids IS NULL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_notice_ukcat_prefix_ids', table_name='notice', postgresql_using='gin')
+    op.drop_column('notice', 'ukcat_prefix_ids')
@@ -0,0 +1,46 @@
+"""add_dead_letter_release
+
+Revision ID: 9e4b2c7d1a35
+Revises: 2a9d4e7b1f60
+Create Date: 2026-10-18 15:02:11.417803
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b2c7d1a35'
+down_revision: Union[str, Sequence[str], None] = '2a9d4e7b1f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('dead_letter_release',
+        sa.Column('ocid', sa.Text(), nullable=False),
+        sa.Column('source', sa.String(length=50), nullable=False),
+        sa.Column('release', sa.LargeBinary(), nullable=False),
+        sa.Column('error_class', sa.String(length=100), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('first_failed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('last_failed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('resolved_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('ocid')
+    )
+    op.create_index(op.f('ix_dead_letter_release_error_class'), 'dead_letter_release', ['error_class'], unique=False)
+    op.create_index(op.f('ix_dead_letter_release_status'), 'dead_letter_release', ['status'], unique=False)
+    op.create_index(op.f('ix_dead_letter_release_next_attempt_at'), 'dead_letter_release', ['next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_dead_letter_release_next_attempt_at'), table_name='dead_letter_release')
+    op.drop_index(op.f('ix_dead_letter_release_status'), table_name='dead_letter_release')
+    op.drop_index(op.f('ix_dead_letter_release_error_class'), table_name='dead_letter_release')
+    op.drop_table('dead_letter_release')
@@ -0,0 +1,44 @@
+"""add_delivery_regions_and_unique_alerts
+
+Revision ID: a7d2e5f8c391
+Revises: e4b7c9a15d02
+Create Date: 2026-10-18 18:32:07.551630
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d2e5f8c391'
+down_revision: Union[str, Sequence[str], None] = 'e4b7c9a15d02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows stay NULL ("region unknown") because re-ingest skips unchanged releases;
+    # populate them with python -m app.workers.delivery_regions_backfill.
+    op.add_column('notice', sa.Column('delivery_regions', postgresql.ARRAY(sa.Text()), nullable=True))
+
+    # One alert per (org, notice, type); material changes legitimately repeat
+    op.execute("""
+        DELETE FROM alert a
+        USING alert b
+        WHERE a.alert_type <> 'MATERIAL_CHANGE'
+          AND a.org_id = b.org_id AND a.notice_id = b.notice_id AND a.alert_type = b.alert_type
+          AND (a.created_at, a.id) > (b.created_at, b.id)
+    """)
+    op.create_index(
+        'uq_alert_org_notice_type', 'alert', ['org_id', 'notice_id', 'alert_type'], unique=True,
+        postgresql_where=sa.text("alert_type <> 'MATERIAL_CHANGE'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_alert_org_notice_type', table_name='alert', postgresql_where=sa.text("alert_type <> 'MATERIAL_CHANGE'"))
+    op.drop_column('notice', 'delivery_regions')
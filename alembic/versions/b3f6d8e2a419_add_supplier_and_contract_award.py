@@ -0,0 +1,72 @@
+"""add_supplier_and_contract_award
+
+Revision ID: b3f6d8e2a419
+Revises: a7d2e5f8c391
+Create Date: 2026-10-18 20:12:37.905114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f6d8e2a419'
+down_revision: Union[str, Sequence[str], None] = 'a7d2e5f8c391'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('supplier',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('canonical_name', sa.Text(), nullable=False),
+        sa.Column('identifiers', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('supplier_alias',
+        sa.Column('alias_key', sa.Text(), nullable=False),
+        sa.Column('supplier_id', sa.UUID(), nullable=False),
+        sa.Column('source', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['supplier_id'], ['supplier.id'], ),
+        sa.PrimaryKeyConstraint('alias_key')
+    )
+    op.create_index(op.f('ix_supplier_alias_supplier_id'), 'supplier_alias', ['supplier_id'], unique=False)
+    op.create_table('contract_award',
+        sa.Column('ocid', sa.Text(), nullable=False),
+        sa.Column('award_id', sa.Text(), nullable=False),
+        sa.Column('supplier_id', sa.UUID(), nullable=False),
+        sa.Column('buyer_id', sa.UUID(), nullable=True),
+        sa.Column('cpv_prefixes', postgresql.ARRAY(sa.Text()), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('award_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('value_amount', sa.Numeric(precision=18, scale=2), nullable=True),
+        sa.Column('value_currency', sa.String(length=3), nullable=True),
+        sa.Column('contract_start', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('contract_end', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['buyer_id'], ['buyer.id'], ),
+        sa.ForeignKeyConstraint(['ocid'], ['notice.ocid'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['supplier_id'], ['supplier.id'], ),
+        sa.PrimaryKeyConstraint('ocid', 'award_id', 'supplier_id')
+    )
+    op.create_index(op.f('ix_contract_award_buyer_id'), 'contract_award', ['buyer_id'], unique=False)
+    op.create_index(op.f('ix_contract_award_supplier_id'), 'contract_award', ['supplier_id'], unique=False)
+    op.create_index(op.f('ix_contract_award_contract_end'), 'contract_award', ['contract_end'], unique=False)
+    op.create_index('ix_contract_award_cpv_prefixes', 'contract_award', ['cpv_prefixes'], unique=False, postgresql_using='gin')
+    # Populated by: python -m app.workers.contract_award_backfill
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_contract_award_cpv_prefixes', table_name='contract_award', postgresql_using='gin')
+    op.drop_index(op.f('ix_contract_award_contract_end'), table_name='contract_award')
+    op.drop_index(op.f('ix_contract_award_supplier_id'), table_name='contract_award')
+    op.drop_index(op.f('ix_contract_award_buyer_id'), table_name='contract_award')
+    op.drop_table('contract_award')
+    op.drop_index(op.f('ix_supplier_alias_supplier_id'), table_name='supplier_alias')
+    op.drop_table('supplier_alias')
+    op.drop_table('supplier')
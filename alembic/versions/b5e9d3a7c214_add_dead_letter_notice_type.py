@@ -0,0 +1,28 @@
+"""add_dead_letter_notice_type
+
+Revision ID: b5e9d3a7c214
+Revises: f2c7a9d4e618
+Create Date: 2026-10-19 09:14:22.318405
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e9d3a7c214'
+down_revision: Union[str, Sequence[str], None] = 'f2c7a9d4e618'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The ingest's notice_type override (e.g. 'historical'), re-applied on replay; NULL = as mapped
+    op.add_column('dead_letter_release', sa.Column('notice_type', sa.String(length=50), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('dead_letter_release', 'notice_type')
@@ -0,0 +1,36 @@
+"""add_buyer_alias
+
+Revision ID: b7e3c0f95a12
+Revises: 8d2f4b6a1c93
+Create Date: 2026-10-18 11:40:02.318845
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3c0f95a12'
+down_revision: Union[str, Sequence[str], None] = '8d2f4b6a1c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('buyer_alias',
+        sa.Column('alias_key', sa.Text(), nullable=False),
+        sa.Column('buyer_id', sa.UUID(), nullable=False),
+        sa.Column('source', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['buyer_id'], ['buyer.id'], ),
+        sa.PrimaryKeyConstraint('alias_key')
+    )
+    op.create_index(op.f('ix_buyer_alias_buyer_id'), 'buyer_alias', ['buyer_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_buyer_alias_buyer_id'), table_name='buyer_alias')
+    op.drop_table('buyer_alias')
@@ -0,0 +1,40 @@
+"""add_near_duplicate_clusters
+
+Revision ID: c5a8e3f10b7d
+Revises: 9e4b2c7d1a35
+Create Date: 2026-10-18 16:21:44.530216
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a8e3f10b7d'
+down_revision: Union[str, Sequence[str], None] = '9e4b2c7d1a35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notice', sa.Column('minhash', postgresql.ARRAY(sa.BigInteger()), nullable=True))
+    op.add_column('notice', sa.Column('cluster_id', sa.Text(), nullable=True))
+    op.create_index(op.f('ix_notice_cluster_id'), 'notice', ['cluster_id'], unique=False)
+    op.create_table('notice_lsh_band',
+        sa.Column('band_key', sa.Text(), nullable=False),
+        sa.Column('ocid', sa.Text(), nullable=False),
+        sa.ForeignKeyConstraint(['ocid'], ['notice.ocid'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('band_key', 'ocid')
+    )
+    # Existing notices are clustered by scripts/cluster_near_duplicates.py
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('notice_lsh_band')
+    op.drop_index(op.f('ix_notice_cluster_id'), table_name='notice')
+    op.drop_column('notice', 'cluster_id')
+    op.drop_column('notice', 'minhash')
@@ -0,0 +1,28 @@
+"""add_notice_buyer_index
+
+Revision ID: c9e1f4a7b2d6
+Revises: b3f6d8e2a419
+Create Date: 2026-10-18 21:03:44.127530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e1f4a7b2d6'
+down_revision: Union[str, Sequence[str], None] = 'b3f6d8e2a419'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Strategic alerts look up each forecast buyer's latest award in a category
+    op.create_index(op.f('ix_notice_buyer_id'), 'notice', ['buyer_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_notice_buyer_id'), table_name='notice')
@@ -0,0 +1,49 @@
+"""add_feed_entry
+
+Revision ID: d4a8c2e6f913
+Revises: c9e1f4a7b2d6
+Create Date: 2026-10-18 21:47:19.562804
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a8c2e6f913'
+down_revision: Union[str, Sequence[str], None] = 'c9e1f4a7b2d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('feed_entry',
+        sa.Column('org_id', sa.UUID(), nullable=False),
+        sa.Column('notice_id', sa.Text(), nullable=False),
+        sa.Column('is_tracked', sa.Boolean(), nullable=False),
+        sa.Column('rank_score', sa.Numeric(precision=6, scale=4), nullable=False),
+        sa.Column('score', sa.Numeric(precision=5, scale=4), nullable=True),
+        sa.Column('feedback_status', sa.String(length=20), nullable=True),
+        sa.Column('unread_alerts', sa.Integer(), nullable=False),
+        sa.Column('title', sa.Text(), nullable=True),
+        sa.Column('deadline_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('value_amount', sa.Numeric(precision=18, scale=2), nullable=True),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['notice_id'], ['notice.ocid'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['org_id'], ['service_profile.org_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('org_id', 'notice_id')
+    )
+    # Feed pages are keyset range scans in exactly this order
+    op.create_index(
+        'ix_feed_entry_org_rank', 'feed_entry',
+        ['org_id', sa.text('is_tracked DESC'), sa.text('rank_score DESC'), sa.text('notice_id DESC')], unique=False,
+    )
+    # Populated by: python -m app.workers.feed_refresh
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_feed_entry_org_rank', table_name='feed_entry')
+    op.drop_table('feed_entry')
@@ -0,0 +1,41 @@
+"""add_buyer_category_history
+
+Revision ID: d81f3a6c2e49
+Revises: c5a8e3f10b7d
+Create Date: 2026-10-18 17:05:12.418390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81f3a6c2e49'
+down_revision: Union[str, Sequence[str], None] = 'c5a8e3f10b7d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('buyer_category_history',
+        sa.Column('buyer_id', sa.UUID(), nullable=False),
+        sa.Column('cpv_prefix', sa.String(length=4), nullable=False),
+        sa.Column('award_count', sa.Integer(), nullable=False),
+        sa.Column('awards', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('last_awarded_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('incumbent', sa.Text(), nullable=True),
+        sa.Column('suppliers', postgresql.ARRAY(sa.Text()), nullable=True),
+        sa.Column('estimated_cycle_years', sa.Integer(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['buyer_id'], ['buyer.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('buyer_id', 'cpv_prefix')
+    )
+    # Populated by: python -m app.workers.buyer_history_rebuild
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('buyer_category_history')
@@ -0,0 +1,30 @@
+"""add_notice_content_hash
+
+Revision ID: e41a6d0c2f58
+Revises: b7e3c0f95a12
+Create Date: 2026-10-18 12:41:05.318220
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41a6d0c2f58'
+down_revision: Union[str, Sequence[str], None] = 'b7e3c0f95a12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing notices have no hash, so their next release is written once and hashed.
+    op.add_column('notice', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('ingestion_log', sa.Column('items_skipped', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('ingestion_log', 'items_skipped')
+    op.drop_column('notice', 'content_hash')
@@ -0,0 +1,45 @@
+"""add_procurement_forecast
+
+Revision ID: e4b7c9a15d02
+Revises: d81f3a6c2e49
+Create Date: 2026-10-18 17:48:30.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b7c9a15d02'
+down_revision: Union[str, Sequence[str], None] = 'd81f3a6c2e49'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('procurement_forecast',
+        sa.Column('buyer_id', sa.UUID(), nullable=False),
+        sa.Column('cpv_prefix', sa.String(length=4), nullable=False),
+        sa.Column('award_count', sa.Integer(), nullable=False),
+        sa.Column('gap_count', sa.Integer(), nullable=False),
+        sa.Column('last_awarded_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('cycle_years', sa.Numeric(precision=5, scale=2), nullable=False),
+        sa.Column('cycle_basis', sa.String(length=20), nullable=False),
+        sa.Column('confidence', sa.Numeric(precision=3, scale=2), nullable=False),
+        sa.Column('next_tender_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('next_define_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('next_plan_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['buyer_id'], ['buyer.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('buyer_id', 'cpv_prefix')
+    )
+    op.create_index(op.f('ix_procurement_forecast_next_tender_date'), 'procurement_forecast', ['next_tender_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_procurement_forecast_next_tender_date'), table_name='procurement_forecast')
+    op.drop_table('procurement_forecast')
@@ -0,0 +1,63 @@
+"""add_outbox_message
+
+Revision ID: e8b2d5f1a736
+Revises: d4a8c2e6f913
+Create Date: 2026-10-18 23:12:41.208517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b2d5f1a736'
+down_revision: Union[str, Sequence[str], None] = 'd4a8c2e6f913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('service_profile', sa.Column('contact_email', sa.String(length=255), nullable=True))
+    op.create_table('outbox_message',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('org_id', sa.UUID(), nullable=False),
+        sa.Column('channel', sa.String(length=20), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('alert_id', sa.UUID(), nullable=True),
+        sa.Column('subject', sa.Text(), nullable=True),
+        sa.Column('body', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('delivered_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['alert_id'], ['alert.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['org_id'], ['service_profile.org_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    # An alert is queued at most once per channel
+    op.create_index('uq_outbox_message_alert_channel', 'outbox_message', ['alert_id', 'channel'], unique=True)
+    # Claims scan due messages oldest first; delivered rows drop out of the index
+    op.create_index(
+        'ix_outbox_message_pending', 'outbox_message', ['next_attempt_at'], unique=False,
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+    # Expired-lease sweep
+    op.create_index(
+        'ix_outbox_message_sending', 'outbox_message', ['claimed_at'], unique=False,
+        postgresql_where=sa.text("status = 'SENDING'"),
+    )
+    # Alerts raised before this revision are not queued; drained by: python -m app.workers.alert_delivery
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outbox_message_sending', table_name='outbox_message', postgresql_where=sa.text("status = 'SENDING'"))
+    op.drop_index('ix_outbox_message_pending', table_name='outbox_message', postgresql_where=sa.text("status = 'PENDING'"))
+    op.drop_index('uq_outbox_message_alert_channel', table_name='outbox_message')
+    op.drop_table('outbox_message')
+    op.drop_column('service_profile', 'contact_email')
@@ -0,0 +1,28 @@
+"""add_alert_created_at_index
+
+Revision ID: f2c7a9d4e618
+Revises: e8b2d5f1a736
+Create Date: 2026-10-18 23:58:06.341972
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c7a9d4e618'
+down_revision: Union[str, Sequence[str], None] = 'e8b2d5f1a736'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Daily digests read the last day of alerts for every org in one query
+    op.create_index(op.f('ix_alert_created_at'), 'alert', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_alert_created_at'), table_name='alert')
@@ -0,0 +1,90 @@
+"""move_raw_json_to_notice_raw
+
+Revision ID: f3c8a1d7e205
+Revises: e41a6d0c2f58
+Create Date: 2026-10-18 13:22:48.104377
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import zstandard
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c8a1d7e205'
+down_revision: Union[str, Sequence[str], None] = 'e41a6d0c2f58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+ZSTD_LEVEL = 9  # Same format as app.models.ZstdJSON: compact UTF-8 JSON, one zstd frame
+
+
+def _compress(value) -> bytes:
+    data = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+
+def _decompress(blob: bytes):
+    return json.loads(zstandard.ZstdDecompressor().decompress(bytes(blob)))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('notice_raw',
+        sa.Column('ocid', sa.Text(), nullable=False),
+        sa.Column('release', sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(['ocid'], ['notice.ocid'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('ocid')
+    )
+    op.add_column('notice', sa.Column('main_procurement_category', sa.String(length=20), nullable=True))
+    op.create_index(op.f('ix_notice_main_procurement_category'), 'notice', ['main_procurement_category'], unique=False)
+
+    # Move releases across in keyset-paginated batches so memory stays flat
+    conn = op.get_bind()
+    last_ocid = ''
+    moved = 0
+    while True:
+        rows = conn.execute(sa.text(
+            "SELECT ocid, raw_json FROM notice WHERE ocid > :last ORDER BY ocid LIMIT :n"
+        ), {"last": last_ocid, "n": BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+        conn.execute(sa.text(
+            "INSERT INTO notice_raw (ocid, release) VALUES (:ocid, :release) ON CONFLICT (ocid) DO NOTHING"
+        ), [{"ocid": ocid, "release": _compress(raw)} for ocid, raw in rows if raw is not None])
+        conn.execute(sa.text(
+            "UPDATE notice SET main_procurement_category = lower(raw_json->'tender'->>'mainProcurementCategory') "
+            "WHERE ocid > :last AND ocid <= :upto"
+        ), {"last": last_ocid, "upto": rows[-1][0]})
+        last_ocid = rows[-1][0]
+        moved += len(rows)
+        print(f"Moved {moved} releases to notice_raw")
+
+    op.drop_column('notice', 'raw_json')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('notice', sa.Column('raw_json', sa.dialects.postgresql.JSONB(), nullable=True))
+
+    conn = op.get_bind()
+    last_ocid = ''
+    while True:
+        rows = conn.execute(sa.text(
+            "SELECT ocid, release FROM notice_raw WHERE ocid > :last ORDER BY ocid LIMIT :n"
+        ), {"last": last_ocid, "n": BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+        conn.execute(sa.text(
+            "UPDATE notice SET raw_json = CAST(:raw AS JSONB) WHERE ocid = :ocid"
+        ), [{"ocid": ocid, "raw": json.dumps(_decompress(blob))} for ocid, blob in rows])
+        last_ocid = rows[-1][0]
+
+    op.execute("UPDATE notice SET raw_json = '{}'::jsonb WHERE raw_json IS NULL")
+    op.alter_column('notice', 'raw_json', nullable=False)
+    op.drop_index(op.f('ix_notice_main_procurement_category'), table_name='notice')
+    op.drop_column('notice', 'main_procurement_category')
+    op.drop_table('notice_raw')
@@ -1,11 +1,59 @@
-from sqlalchemy import Column, String, Integer, DateTime, Boolean, Numeric, ForeignKey, ARRAY, Text, BigInteger
+from sqlalchemy import Column, String, Integer, DateTime, Boolean, Numeric, ForeignKey, ARRAY, Text, BigInteger, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import TypeDecorator
 from pgvector.sqlalchemy import Vector
+from decimal import Decimal
+from typing import Optional
+import json
 import uuid
+import zstandard
 from .database import Base
 
+ZSTD_LEVEL = 9
+
+def _json_default(value):
+    # ijson yields Decimals for numbers
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return str(value)
+
+def compress_json(value, level: int = ZSTD_LEVEL) -> bytes:
+    data = json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=_json_default).encode("utf-8")
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+def decompress_json(blob: Optional[bytes]):
+    if blob is None:
+        return None
+    return json.loads(zstandard.ZstdDecompressor().decompress(bytes(blob)))
+
+class ZstdJSON(TypeDecorator):
+    """JSON stored as zstd-compressed bytes. Opaque to SQL, so extract anything you filter on."""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else compress_json(value)
+
+    def process_result_value(self, value, dialect):
+        return decompress_json(value)
+
+class random_uuid(FunctionElement):
+    """A new UUID per row, for ids in INSERT ... SELECT (column defaults are client-side)."""
+    type = UUID(as_uuid=True)
+    inherit_cache = True
+
+@compiles(random_uuid)
+def _random_uuid(element, compiler, **kw):
+    return "gen_random_uuid()"
+
+@compiles(random_uuid, "sqlite")
+def _random_uuid_sqlite(element, compiler, **kw):
+    return "lower(hex(randomblob(16)))"
+
 class IngestionLog(Base):
     __tablename__ = "ingestion_log"
 
@@ -13,10 +61,34 @@ class IngestionLog(Base):
     source = Column(String(50), nullable=False)  # 'FTS', 'CF'
     started_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
-    status = Column(String(20))  # 'RUNNING', 'SUCCESS', 'FAILED'
+    status = Column(String(20))  # 'RUNNING', 'SUCCESS', 'FAILED', 'INTERRUPTED'
     items_processed = Column(Integer, default=0)
+    items_skipped = Column(Integer, default=0)  # Releases whose content hash was unchanged
+    cursor_url = Column(Text, nullable=True)  # links.next after the last committed page (resume point)
+    last_release_date = Column(DateTime(timezone=True), nullable=True)  # Newest release date committed
     error_details = Column(Text, nullable=True)
 
+class DeadLetterRelease(Base):
+    """
+    A release that failed ingestion, kept with its raw payload so it can be
+    replayed (python -m app.workers.dead_letter_replay) once the cause is fixed.
+    One row per OCID; each further failure bumps `attempts`.
+    """
+    __tablename__ = "dead_letter_release"
+
+    ocid = Column(Text, primary_key=True)
+    source = Column(String(50), nullable=False)  # Ingestion path that first failed: 'FTS', 'CF_KEYWORD', ...
+    release = Column(ZstdJSON, nullable=False)
+    notice_type = Column(String(50))  # Type override it was ingested with (e.g. 'historical'), re-applied on replay
+    error_class = Column(String(100), index=True)
+    error_message = Column(Text)
+    attempts = Column(Integer, nullable=False, default=1)
+    status = Column(String(20), nullable=False, default="PENDING", index=True)  # 'PENDING', 'QUARANTINED', 'RESOLVED'
+    first_failed_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_failed_at = Column(DateTime(timezone=True))
+    next_attempt_at = Column(DateTime(timezone=True), index=True)  # Replay backoff
+    resolved_at = Column(DateTime(timezone=True))
+
 class Buyer(Base):
     __tablename__ = "buyer"
 
@@ -27,6 +99,43 @@ class Buyer(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     notices = relationship("Notice", back_populates="buyer")
+    aliases = relationship("BuyerAlias", back_populates="buyer")
+
+class BuyerAlias(Base):
+    """
+    Alternative keys that resolve to a Buyer: OCDS identifiers
+    ('id:GB-COH:01234567') and normalised name variants ('name:leeds city council').
+    """
+    __tablename__ = "buyer_alias"
+
+    alias_key = Column(Text, primary_key=True)
+    buyer_id = Column(UUID(as_uuid=True), ForeignKey("buyer.id"), nullable=False, index=True)
+    source = Column(String(20))  # 'identifier', 'name', 'fuzzy', 'merge'
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    buyer = relationship("Buyer", back_populates="aliases")
+
+class Supplier(Base):
+    __tablename__ = "supplier"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    canonical_name = Column(Text, nullable=False)
+    identifiers = Column(JSONB)  # [{ "scheme": "GB-COH", "id": "..." }]
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    aliases = relationship("SupplierAlias", back_populates="supplier")
+    awards = relationship("ContractAward", back_populates="supplier")
+
+class SupplierAlias(Base):
+    """Identifier ('id:GB-COH:01234567') and normalised name keys that resolve to a Supplier."""
+    __tablename__ = "supplier_alias"
+
+    alias_key = Column(Text, primary_key=True)
+    supplier_id = Column(UUID(as_uuid=True), ForeignKey("supplier.id"), nullable=False, index=True)
+    source = Column(String(20))  # 'identifier', 'name'
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    supplier = relationship("Supplier", back_populates="aliases")
 
 class Notice(Base):
     __tablename__ = "notice"
@@ -40,7 +149,7 @@ class Notice(Base):
     provider_summary = Column(Text) 
     provider_summary_embedding = Column(Vector(1536))
 
-    buyer_id = Column(UUID(as_uuid=True), ForeignKey("buyer.id"))
+    buyer_id = Column(UUID(as_uuid=True), ForeignKey("buyer.id"), index=True)
     
     publication_date = Column(DateTime(timezone=True), nullable=False)
     deadline_date = Column(DateTime(timezone=True))
@@ -51,10 +160,16 @@ class Notice(Base):
     procurement_method = Column(String(50))  # 'open', 'selective', 'limited'
     notice_type = Column(String(50))  # 'contractNotice', 'contractAward'
     
-    raw_json = Column(JSONB, nullable=False)
+    main_procurement_category = Column(String(20), index=True) # tender.mainProcurementCategory, lowercased
+    content_hash = Column(String(64)) # sha256 of the release minus envelope fields (see normalizer)
+    minhash = Column(ARRAY(BigInteger)) # MinHash signature of title + description (see near_duplicates)
+    cluster_id = Column(Text, index=True) # ocid of the first-seen notice in its near-duplicate cluster
     source_url = Column(Text)
     cpv_codes = Column(ARRAY(Text)) # Specific Procurement Codes
+    delivery_regions = Column(ARRAY(Text)) # Lowercased item delivery regions, else the buyer's (None if unknown)
     inferred_ukcat_codes = Column(ARRAY(Text)) # Auto-tagged via UKCAT regex
+    ukcat_ruleset_version = Column(String(16), index=True) # Hash of ukcat.csv used for the tags above
+    ukcat_prefix_ids = Column(ARRAY(Integer)) # Codes + ancestor prefixes as ids (GIN-indexed, use && to overlap)
     
     # Vector embedding for description (1536 dims for text-embedding-3-small)
     embedding = Column(Vector(1536))
@@ -67,6 +182,105 @@ class Notice(Base):
     is_archived = Column(Boolean, default=False)
 
     buyer = relationship("Buyer", back_populates="notices")
+    raw = relationship("NoticeRaw", uselist=False, back_populates="notice",
+                       cascade="all, delete-orphan", passive_deletes=True)
+
+    @property
+    def raw_json(self) -> Optional[dict]:
+        """The full OCDS release, loaded from notice_raw on first access."""
+        return self.raw.release if self.raw is not None else None
+
+    @raw_json.setter
+    def raw_json(self, release: dict):
+        if self.raw is None:
+            self.raw = NoticeRaw(release=release)
+        else:
+            self.raw.release = release
+
+class NoticeRaw(Base):
+    """
+    Cold storage for the OCDS release behind a Notice, zstd-compressed and
+    kept out of the notice table so `db.query(Notice)` never loads it.
+    """
+    __tablename__ = "notice_raw"
+
+    ocid = Column(Text, ForeignKey("notice.ocid", ondelete="CASCADE"), primary_key=True)
+    release = Column(ZstdJSON, nullable=False)
+
+    notice = relationship("Notice", back_populates="raw")
+
+class NoticeLSHBand(Base):
+    """
+    LSH index for near-duplicate detection: one row per (band bucket, notice).
+    Bucket keys embed the buyer / value-band block, so a lookup only ever
+    meets notices from the same buyer at a similar value.
+    """
+    __tablename__ = "notice_lsh_band"
+
+    band_key = Column(Text, primary_key=True)
+    ocid = Column(Text, ForeignKey("notice.ocid", ondelete="CASCADE"), primary_key=True)
+
+class ContractAward(Base):
+    """
+    One row per (notice, OCDS award, supplier), extracted from `awards` at
+    ingestion (see services/ingestion/contract_awards.py). Buyer and CPV
+    prefixes are copied from the notice so expiry / incumbency questions are
+    answered from this table's indexes alone.
+    """
+    __tablename__ = "contract_award"
+
+    ocid = Column(Text, ForeignKey("notice.ocid", ondelete="CASCADE"), primary_key=True)
+    award_id = Column(Text, primary_key=True)
+    supplier_id = Column(UUID(as_uuid=True), ForeignKey("supplier.id"), primary_key=True, index=True)
+    buyer_id = Column(UUID(as_uuid=True), ForeignKey("buyer.id"), index=True)
+    cpv_prefixes = Column(ARRAY(Text)) # 4-character CPV prefixes of the notice (GIN-indexed, use && to overlap)
+    status = Column(String(20))
+    award_date = Column(DateTime(timezone=True))
+    value_amount = Column(Numeric(18, 2))
+    value_currency = Column(String(3))
+    contract_start = Column(DateTime(timezone=True))
+    contract_end = Column(DateTime(timezone=True), index=True)
+
+    supplier = relationship("Supplier", back_populates="awards")
+
+class BuyerCategoryHistory(Base):
+    """
+    Procurement history per (buyer, CPV prefix), maintained as historical and
+    award notices are ingested (see services/matching/buyer_history.py) so the
+    Renewal Radar reads one row instead of re-walking raw releases.
+    Notices without CPV codes are kept under the empty prefix.
+    """
+    __tablename__ = "buyer_category_history"
+
+    buyer_id = Column(UUID(as_uuid=True), ForeignKey("buyer.id", ondelete="CASCADE"), primary_key=True)
+    cpv_prefix = Column(String(4), primary_key=True)
+    award_count = Column(Integer, nullable=False, default=0)
+    awards = Column(JSONB) # [{"ocid", "date"}] oldest first
+    last_awarded_at = Column(DateTime(timezone=True))
+    incumbent = Column(Text) # First supplier on the most recent award
+    suppliers = Column(ARRAY(Text)) # Distinct, most recently seen first
+    estimated_cycle_years = Column(Integer) # Mean gap between awards; None below two awards
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class ProcurementForecast(Base):
+    """
+    Predicted next procurement per (buyer, CPV prefix), recomputed for the whole
+    corpus in one set-based pass by app.workers.procurement_forecast.
+    """
+    __tablename__ = "procurement_forecast"
+
+    buyer_id = Column(UUID(as_uuid=True), ForeignKey("buyer.id", ondelete="CASCADE"), primary_key=True)
+    cpv_prefix = Column(String(4), primary_key=True)
+    award_count = Column(Integer, nullable=False)
+    gap_count = Column(Integer, nullable=False) # Inter-award gaps inside the plausible cycle range
+    last_awarded_at = Column(DateTime(timezone=True), nullable=False)
+    cycle_years = Column(Numeric(5, 2), nullable=False)
+    cycle_basis = Column(String(20), nullable=False) # 'observed', 'contract' (last contract length) or 'default'
+    confidence = Column(Numeric(3, 2), nullable=False) # 0-1: more, steadier gaps score higher
+    next_tender_date = Column(DateTime(timezone=True), index=True)
+    next_define_date = Column(DateTime(timezone=True)) # 6 months ahead for pre-market engagement
+    next_plan_date = Column(DateTime(timezone=True)) # 1 year ahead for strategic planning
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class ServiceProfile(Base):
     __tablename__ = "service_profile"
@@ -77,6 +291,7 @@ class ServiceProfile(Base):
     charity_number = Column(String(20), unique=True)
     name = Column(Text, nullable=False)
     website = Column(String(255))
+    contact_email = Column(String(255)) # Alert and digest recipient
     
     # Financials (for Viability Check)
     latest_income = Column(BigInteger)
@@ -93,6 +308,8 @@ class ServiceProfile(Base):
     
     # Inferred Procurement Data (Auto-Tagging)
     inferred_cpv_codes = Column(ARRAY(Text)) 
+    inferred_ukcat_codes = Column(ARRAY(Text)) # Auto-tagged from mission/services text
+    ukcat_ruleset_version = Column(String(16))
     exclusion_keywords = Column(ARRAY(Text)) # New: Hard exclusion list
 
     # Contract Gates
@@ -137,6 +354,26 @@ class NoticeMatch(Base):
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+class FeedEntry(Base):
+    """
+    Opportunity Feed read model: one row per NoticeMatch with its rank and
+    display fields precomputed (see services/matching/feed.py), so a feed page
+    is one range scan of (org_id, is_tracked DESC, rank_score DESC, notice_id DESC).
+    """
+    __tablename__ = "feed_entry"
+
+    org_id = Column(UUID(as_uuid=True), ForeignKey("service_profile.org_id", ondelete="CASCADE"), primary_key=True)
+    notice_id = Column(Text, ForeignKey("notice.ocid", ondelete="CASCADE"), primary_key=True)
+    is_tracked = Column(Boolean, nullable=False, default=False)
+    rank_score = Column(Numeric(6, 4), nullable=False) # Match score + unread alerts + deadline proximity
+    score = Column(Numeric(5, 4))
+    feedback_status = Column(String(20))
+    unread_alerts = Column(Integer, nullable=False, default=0)
+    title = Column(Text)
+    deadline_date = Column(DateTime(timezone=True))
+    value_amount = Column(Numeric(18, 2))
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now())
+
 class Alert(Base):
     """
     Structured alerts for the Opportunity Feed (PRD 04/05).
@@ -147,13 +384,37 @@ class Alert(Base):
     org_id = Column(UUID(as_uuid=True), ForeignKey("service_profile.org_id"))
     notice_id = Column(Text, ForeignKey("notice.ocid"))
     
-    alert_type = Column(String(50))  # 'NEW_MATCH', 'MATERIAL_CHANGE', 'RENEWAL'
+    alert_type = Column(String(50))  # 'NEW_MATCH', 'MATERIAL_CHANGE', 'RENEWAL', 'LIFECYCLE_PLAN|DEFINE|PROCURE' (unique per org/notice except MATERIAL_CHANGE)
     severity = Column(String(20))    # 'info', 'warning', 'critical'
     message = Column(Text)
     details = Column(JSONB)         # { "diff": {...} }
     
     is_read = Column(Boolean, default=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+class OutboxMessage(Base):
+    """
+    Transactional outbox for notifications: written in the same transaction as
+    the alert (or digest) it delivers, then claimed and sent by
+    app.workers.alert_delivery (see services/alerts/outbox.py).
+    Alert messages are rendered at send time; digests carry their body.
+    """
+    __tablename__ = "outbox_message"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    org_id = Column(UUID(as_uuid=True), ForeignKey("service_profile.org_id", ondelete="CASCADE"), nullable=False)
+    channel = Column(String(20), nullable=False, default="email")
+    kind = Column(String(20), nullable=False)  # 'ALERT', 'DIGEST'
+    alert_id = Column(UUID(as_uuid=True), ForeignKey("alert.id", ondelete="CASCADE"))  # Unique per channel
+    subject = Column(Text)
+    body = Column(Text)
+    status = Column(String(20), nullable=False, default="PENDING")  # 'PENDING', 'SENDING', 'DELIVERED', 'FAILED'
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())  # Retry backoff
+    claimed_at = Column(DateTime(timezone=True))  # Lease start while SENDING
+    last_error = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    delivered_at = Column(DateTime(timezone=True))
 
 class ExtractedRequirement(Base):
     """
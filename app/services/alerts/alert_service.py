@@ -1,21 +1,39 @@
 import logging
-from typing import Optional, Dict, Any
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Any, Iterable, List, Tuple
+from sqlalchemy import and_, false, func, insert, literal, or_, select, union_all
 from sqlalchemy.orm import Session
-from app.models import Notice, NoticeMatch, Alert
+from app.models import Notice, NoticeMatch, Alert, random_uuid
+from app.services.alerts.outbox import outbox
 import uuid
 
 logger = logging.getLogger(__name__)
 
+# A value moving by more than this share of the stored value is material
+MATERIAL_VALUE_CHANGE = 0.10
+# Always compared, with the rules in _diff_changes
+CORE_CHANGE_FIELDS = ("deadline_date", "value_amount", "notice_type")
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
 class AlertService:
     """
     Detects 'Material Changes' between OCDS releases (PRD 04).
+    `watched_fields` are further Notice columns whose change is material.
     """
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, watched_fields: Iterable[str] = ()):
         self.db = db
+        self.watched_fields = tuple(f for f in watched_fields if f not in CORE_CHANGE_FIELDS)
 
     def create_alert(self, org_id: uuid.UUID, notice_id: str, alert_type: str, message: str, severity: str = "info", details: dict = None):
-        """Creates a structured alert record."""
+        """Creates a structured alert record and queues its delivery in the same transaction."""
         alert = Alert(
             org_id=org_id,
             notice_id=notice_id,
@@ -25,48 +43,106 @@ class AlertService:
             details=details
         )
         self.db.add(alert)
+        outbox.enqueue_alert(self.db, alert)
         return alert
 
-    def check_for_changes(self, existing_notice: Notice, new_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        # ... logic remains same ...
-        changes = {}
-        new_deadline = new_data.get("deadline_date")
-        if new_deadline and existing_notice.deadline_date:
-            if new_deadline != existing_notice.deadline_date:
-                changes["deadline"] = {"old": existing_notice.deadline_date.isoformat(), "new": new_deadline.isoformat()}
-        
-        new_value = new_data.get("value_amount")
-        if new_value is not None and existing_notice.value_amount is not None:
-            diff_pct = abs(new_value - float(existing_notice.value_amount)) / float(existing_notice.value_amount) if existing_notice.value_amount != 0 else 0
-            if diff_pct > 0.10:
-                changes["value"] = {"old": float(existing_notice.value_amount), "new": new_value, "diff_pct": round(diff_pct * 100, 2)}
-        
-        new_type = new_data.get("notice_type")
-        if new_type and existing_notice.notice_type != new_type:
-            changes["type"] = {"old": existing_notice.notice_type, "new": new_type}
-            
-        return changes if changes else None
+    @staticmethod
+    def _value_change(old, new) -> Dict[str, Any]:
+        old, new = float(old), float(new)
+        return {"old": old, "new": new, "diff_pct": round(abs(new - old) / old * 100, 2)}
+
+    @staticmethod
+    def _change_message(key: str, val: Dict[str, Any]) -> str:
+        if key == "deadline": return f"ALERT: Deadline changed from {val['old'][:10]} to {val['new'][:10]}."
+        if key == "value": return f"ALERT: Value changed by {val['diff_pct']}% (Now £{val['new']:,.0f})."
+        if key == "type": return f"ALERT: Notice type changed to {val['new']}."
+        return f"ALERT: {key.replace('_', ' ').capitalize()} changed."
+
+    def _diff_changes(self, incoming: List[Dict[str, Any]]) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        """
+        Stages the incoming values and diffs them against the stored rows in one
+        SELECT; only notices with a material change come back.
+        """
+        fields = CORE_CHANGE_FIELDS + self.watched_fields
+        columns = Notice.__table__.c
+        staged = [
+            select(literal(row["ocid"], columns.ocid.type).label("ocid"), literal(row["target"], columns.ocid.type).label("target"),
+                   *(literal(row.get(f), columns[f].type).label(f"new_{f}") for f in fields))
+            for row in incoming
+        ]
+        staged = (staged[0] if len(staged) == 1 else union_all(*staged)).subquery("staged")
+
+        new = {f: staged.c[f"new_{f}"] for f in fields}
+        flags = {
+            "deadline": and_(new["deadline_date"] != None, columns.deadline_date != None,
+                             new["deadline_date"] != columns.deadline_date),
+            "value": and_(new["value_amount"] != None, columns.value_amount != None, columns.value_amount != 0,
+                          func.abs(new["value_amount"] - columns.value_amount)
+                          > MATERIAL_VALUE_CHANGE * func.abs(columns.value_amount)),
+            "type": and_(new["notice_type"] != None, new["notice_type"].is_distinct_from(columns.notice_type)),
+            **{f: and_(new[f] != None, new[f].is_distinct_from(columns[f])) for f in self.watched_fields},
+        }
+        query = select(
+            staged.c.ocid, staged.c.target, *(columns[f] for f in fields), *new.values(),
+            *(flag.label(f"{key}_changed") for key, flag in flags.items()),
+        ).join_from(staged, Notice.__table__, columns.ocid == staged.c.ocid).where(or_(*flags.values()))
+
+        changed = {}
+        for row in self.db.execute(query).mappings():
+            changes = {}
+            if row["deadline_changed"]:
+                changes["deadline"] = {"old": row["deadline_date"].isoformat(), "new": row["new_deadline_date"].isoformat()}
+            if row["value_changed"]:
+                changes["value"] = self._value_change(row["value_amount"], row["new_value_amount"])
+            if row["type_changed"]:
+                changes["type"] = {"old": row["notice_type"], "new": row["new_notice_type"]}
+            for f in self.watched_fields:
+                if row[f"{f}_changed"]:
+                    changes[f] = {"old": _json_value(row[f]), "new": _json_value(row[f"new_{f}"])}
+            changed[row["ocid"]] = (row["target"], changes)
+        return changed
+
+    def process_batch_changes(self, incoming: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Set-based change handling for an ingestion batch, run before the batch is
+        written. Each incoming dict holds `ocid`, `target` (the ocid matches are
+        kept on - a near-duplicate's cluster_id) and the new field values; a
+        None value is not compared. One SELECT finds the material changes, one INSERT ... SELECT
+        raises a MATERIAL_CHANGE alert per (match, change) and one more queues
+        their delivery, and the affected matches are loaded and updated
+        together. Nothing is committed, and the feed is left to the caller to
+        re-sync once the new notice rows are written.
+        Returns {ocid: changes} for the notices that changed.
+        """
+        if not incoming:
+            return {}
+        changed = self._diff_changes(incoming)
+        if not changed:
+            return {}
 
-    def process_change(self, notice_ocid: str, changes: Dict[str, Any]):
-        """Updates NoticeMatch records and creates Alerts."""
-        matches = self.db.query(NoticeMatch).filter(NoticeMatch.notice_id == notice_ocid).all()
-        
-        for match in matches:
-            reasons = list(match.recommendation_reasons) if match.recommendation_reasons else []
-            
-            for key, val in changes.items():
-                msg = ""
-                if key == "deadline": msg = f"ALERT: Deadline changed from {val['old'][:10]} to {val['new'][:10]}."
-                elif key == "value": msg = f"ALERT: Value changed by {val['diff_pct']}% (Now £{val['new']:,.0f})."
-                elif key == "type": msg = f"ALERT: Notice type changed to {val['new']}."
-                
-                if msg:
-                    reasons.append(msg)
-                    self.create_alert(match.org_id, notice_ocid, "MATERIAL_CHANGE", msg, "warning", {key: val})
+        staged_alerts = [
+            select(literal(target, Alert.notice_id.type).label("notice_id"),
+                   literal(self._change_message(key, val), Alert.message.type).label("message"),
+                   literal({key: val}, Alert.details.type).label("details"))
+            for target, changes in changed.values() for key, val in changes.items()
+        ]
+        staged_alerts = (staged_alerts[0] if len(staged_alerts) == 1 else union_all(*staged_alerts)).subquery("staged_alerts")
+        created = self.db.execute(insert(Alert).from_select(
+            ["id", "org_id", "notice_id", "alert_type", "severity", "message", "details", "is_read"],
+            select(random_uuid(), NoticeMatch.org_id, staged_alerts.c.notice_id, literal("MATERIAL_CHANGE"),
+                   literal("warning"), staged_alerts.c.message, staged_alerts.c.details, false())
+            .join_from(staged_alerts, NoticeMatch, NoticeMatch.notice_id == staged_alerts.c.notice_id),
+        ).returning(Alert.id, Alert.org_id)).all()
+        outbox.enqueue_alerts(self.db, created)
 
+        by_target = {}
+        for target, changes in changed.values():
+            by_target.setdefault(target, {}).update(changes)
+        for match in self.db.query(NoticeMatch).filter(NoticeMatch.notice_id.in_(list(by_target))):
+            changes = by_target[match.notice_id]
+            match.recommendation_reasons = list(match.recommendation_reasons or []) + [
+                self._change_message(key, val) for key, val in changes.items()
+            ]
             if "value" in changes and match.feedback_status == "GO":
                 match.feedback_status = "REVIEW"
-            
-            match.recommendation_reasons = reasons
-        
-        self.db.commit()
+        return {ocid: changes for ocid, (_, changes) in changed.items()}
@@ -1,57 +1,110 @@
 import logging
-from typing import List, Optional
+import os
+from itertools import groupby
+from operator import itemgetter
+from typing import Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
+from sqlalchemy import case, select
 from sqlalchemy.orm import Session
-from app.models import Alert, Notice, ServiceProfile
+from app.models import Alert, OutboxMessage, ServiceProfile
+from app.services.alerts.outbox import DEFAULT_CHANNEL, FOOTER, outbox
 
 logger = logging.getLogger(__name__)
 
+DIGEST_WINDOW = timedelta(days=1)
+STREAM_CHUNK_SIZE = 1000
+NO_UPDATES = "No new updates for your profile in the last 24 hours."
+
+# Sections in display order: alert type -> (heading, line template)
+DIGEST_SECTIONS = {
+    "MATERIAL_CHANGE": ("## ⚡ Material Changes to Tracked Notices\n", "- **{message}** (Notice: {notice_id})\n"),
+    "RENEWAL": ("## 📅 Upcoming Renewals / Re-tenders\n", "- {message} (OCID: {notice_id})\n"),
+    "NEW_MATCH": ("## ✨ New High-Score Matches\n", "- {message} (OCID: {notice_id})\n"),
+}
+DIGEST_HEADER = "# Daily Opportunity Digest for {name}\nDate: {date}\n\n"
+SECTION_ORDER = case({alert_type: i for i, alert_type in enumerate(DIGEST_SECTIONS)}, value=Alert.alert_type)
+
+
+def render_digest(name: str, date: str, rows: List) -> str:
+    """Markdown digest from one org's alert rows, already ordered by section."""
+    parts = [DIGEST_HEADER.format(name=name, date=date)]
+    for alert_type, section in groupby(rows, key=itemgetter(2)):
+        heading, line = DIGEST_SECTIONS[alert_type]
+        parts.append(heading)
+        parts.extend(line.format(message=message, notice_id=notice_id) for _, _, _, message, notice_id in section)
+        parts.append("\n")
+    parts.append(FOOTER)
+    return "".join(parts)
+
+
 class DigestService:
     """
     Generates notification digests (PRD 05).
+    Every org's digest comes from one query ordered by org, section and
+    time, streamed and rendered one org at a time, so the whole daily run
+    costs one round of reads however many orgs there are.
     """
 
     def __init__(self, db: Session):
         self.db = db
 
+    def _digest_rows(self, since: datetime, org_id=None):
+        query = select(
+            Alert.org_id, ServiceProfile.name, Alert.alert_type, Alert.message, Alert.notice_id,
+        ).join(ServiceProfile, ServiceProfile.org_id == Alert.org_id).where(
+            Alert.created_at >= since, Alert.alert_type.in_(list(DIGEST_SECTIONS)),
+        )
+        if org_id is not None:
+            query = query.where(Alert.org_id == org_id)
+        query = query.order_by(Alert.org_id, SECTION_ORDER, Alert.created_at, Alert.id)
+        return self.db.execute(query.execution_options(stream_results=True, yield_per=STREAM_CHUNK_SIZE))
+
+    def iter_daily_digests(self, since: Optional[datetime] = None) -> Iterator[Tuple]:
+        """Yields (org_id, org name, markdown) for each org with alerts since `since` (default: 24 hours)."""
+        since = since or datetime.utcnow() - DIGEST_WINDOW
+        date = datetime.utcnow().strftime('%Y-%m-%d')
+        for org_id, rows in groupby(self._digest_rows(since), key=itemgetter(0)):
+            rows = list(rows)
+            yield org_id, rows[0][1], render_digest(rows[0][1], date, rows)
+
     def generate_daily_digest(self, org_id: str) -> str:
         """
         Creates a markdown summary of alerts from the last 24 hours.
         """
-        yesterday = datetime.utcnow() - timedelta(days=1)
-        alerts = self.db.query(Alert)\
-            .filter(Alert.org_id == org_id, Alert.created_at >= yesterday)\
-            .all()
-            
-        if not alerts:
-            return "No new updates for your profile in the last 24 hours."
-
-        org = self.db.get(ServiceProfile, org_id)
-        digest = f"# Daily Opportunity Digest for {org.name}\n"
-        digest += f"Date: {datetime.utcnow().strftime('%Y-%m-%d')}\n\n"
-
-        # Group by type
-        changes = [a for a in alerts if a.alert_type == 'MATERIAL_CHANGE']
-        renewals = [a for a in alerts if a.alert_type == 'RENEWAL']
-        new_matches = [a for a in alerts if a.alert_type == 'NEW_MATCH']
-
-        if changes:
-            digest += "## ⚡ Material Changes to Tracked Notices\n"
-            for a in changes:
-                digest += f"- **{a.message}** (Notice: {a.notice_id})\n"
-            digest += "\n"
-
-        if renewals:
-            digest += "## 📅 Upcoming Renewals / Re-tenders\n"
-            for a in renewals:
-                digest += f"- {a.message} (OCID: {a.notice_id})\n"
-            digest += "\n"
-
-        if new_matches:
-            digest += "## ✨ New High-Score Matches\n"
-            for a in new_matches:
-                digest += f"- {a.message} (OCID: {a.notice_id})\n"
-            digest += "\n"
-
-        digest += "---\n*This is an automated digest from Grants AI (Procurement Module).*"
-        return digest
+        rows = self._digest_rows(datetime.utcnow() - DIGEST_WINDOW, org_id).all()
+        if not rows:
+            return NO_UPDATES
+        return render_digest(rows[0][1], datetime.utcnow().strftime('%Y-%m-%d'), rows)
+
+    def queue_daily_digests(self, since: Optional[datetime] = None, channel: str = DEFAULT_CHANNEL) -> int:
+        """
+        Queues every org's digest on the outbox for app.workers.alert_delivery,
+        in one transaction. Orgs already queued a digest today (UTC) are
+        skipped, so a re-run never sends twice; `since` only bounds the alerts.
+        Returns digests queued.
+        """
+        since = since or datetime.utcnow() - DIGEST_WINDOW
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        queued = {
+            org_id for (org_id,) in self.db.query(OutboxMessage.org_id).filter(
+                OutboxMessage.kind == "DIGEST", OutboxMessage.channel == channel, OutboxMessage.created_at >= today,
+            ).distinct()
+        }
+        count = outbox.enqueue_digests(self.db, (
+            (org_id, f"Daily Opportunity Digest for {name}", digest)
+            for org_id, name, digest in self.iter_daily_digests(since) if org_id not in queued
+        ), channel=channel)
+        self.db.commit()
+        logger.info(f"Queued {count} daily digests ({len(queued)} orgs already had one today).")
+        return count
+
+    def write_daily_digests(self, directory: str, since: Optional[datetime] = None) -> int:
+        """Writes each org's digest to `directory`/<org_id>.md. Returns files written."""
+        os.makedirs(directory, exist_ok=True)
+        count = 0
+        for org_id, _, digest in self.iter_daily_digests(since):
+            with open(os.path.join(directory, f"{org_id}.md"), "w", encoding="utf-8") as f:
+                f.write(digest)
+            count += 1
+        logger.info(f"Wrote {count} daily digests to {directory}.")
+        return count
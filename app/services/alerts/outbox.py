@@ -0,0 +1,237 @@
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+from app.models import Alert, OutboxMessage, ServiceProfile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNEL = "email"
+DEFAULT_MAX_ATTEMPTS = 5
+# A SENDING message whose claim is older than this is assumed orphaned by a dead worker
+DEFAULT_LEASE = timedelta(minutes=10)
+MAX_ERROR_MESSAGE_LENGTH = 2000
+ENQUEUE_CHUNK_SIZE = 500
+FOOTER = "---\n*This is an automated digest from Grants AI (Procurement Module).*"
+
+# Set-based alert writers end with `inserted AS (INSERT INTO alert ... RETURNING id, org_id)`
+# and this statement, so each new alert's outbox row is written by the same statement.
+OUTBOX_FROM_INSERTED_SQL = """INSERT INTO outbox_message (id, org_id, channel, kind, alert_id, status, attempts, next_attempt_at, created_at)
+    SELECT gen_random_uuid(), org_id, :channel, 'ALERT', id, 'PENDING', 0, now(), now()
+    FROM inserted
+"""
+
+
+class Envelope(NamedTuple):
+    """One send: every claimed message for an (org, channel), rendered together."""
+    org_id: uuid.UUID
+    channel: str
+    recipient: Optional[str]
+    subject: str
+    body: str
+    messages: List  # Claimed outbox rows (id, org_id, channel, kind, alert_id, subject, body, attempts)
+
+
+class Outbox:
+    """
+    Transactional outbox for alert and digest delivery (PRD 05). Writers
+    enqueue through the caller's session, so a message exists iff its alert
+    committed. Delivery workers claim due messages with FOR UPDATE SKIP
+    LOCKED - concurrent workers never claim the same row - and mark them
+    SENDING under a lease; failures back off exponentially and become FAILED
+    at `max_attempts`. A claim that outlives `lease` is handed out again, so
+    the lease must comfortably exceed the time to send one batch.
+    """
+
+    def __init__(self, max_attempts: int = DEFAULT_MAX_ATTEMPTS, base_backoff: timedelta = timedelta(minutes=1),
+                 max_backoff: timedelta = timedelta(hours=6), lease: timedelta = DEFAULT_LEASE):
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.lease = lease
+
+    def backoff(self, attempts: int) -> timedelta:
+        return min(self.base_backoff * (2 ** max(attempts - 1, 0)), self.max_backoff)
+
+    # --- Writers (caller's transaction) ---
+
+    def enqueue_alert(self, db: Session, alert: Alert, channel: str = DEFAULT_CHANNEL) -> Optional[OutboxMessage]:
+        """Queues delivery of an alert added to `db` but not yet flushed."""
+        if alert.org_id is None:
+            return None
+        if alert.id is None:
+            alert.id = uuid.uuid4()
+        message = OutboxMessage(org_id=alert.org_id, channel=channel, kind="ALERT", alert_id=alert.id,
+                                status="PENDING", attempts=0)
+        db.add(message)
+        return message
+
+    def enqueue_alerts(self, db: Session, alerts: Iterable[Tuple[uuid.UUID, uuid.UUID]],
+                       channel: str = DEFAULT_CHANNEL) -> int:
+        """Queues (alert_id, org_id) pairs from a set-based INSERT ... RETURNING in one statement."""
+        rows = [{
+            "id": uuid.uuid4(), "org_id": org_id, "channel": channel, "kind": "ALERT",
+            "alert_id": alert_id, "status": "PENDING", "attempts": 0,
+        } for alert_id, org_id in alerts if org_id is not None]
+        if rows:
+            db.execute(insert(OutboxMessage), rows)
+        return len(rows)
+
+    def enqueue(self, db: Session, org_id: uuid.UUID, subject: str, body: str,
+                kind: str = "DIGEST", channel: str = DEFAULT_CHANNEL) -> OutboxMessage:
+        """Queues a pre-rendered message."""
+        message = OutboxMessage(org_id=org_id, channel=channel, kind=kind, subject=subject, body=body,
+                                status="PENDING", attempts=0)
+        db.add(message)
+        return message
+
+    def enqueue_digests(self, db: Session, digests: Iterable[Tuple[uuid.UUID, str, str]],
+                        channel: str = DEFAULT_CHANNEL) -> int:
+        """
+        Queues (org_id, subject, body) digests, consuming `digests` lazily and
+        writing ENQUEUE_CHUNK_SIZE rows per statement. Not committed.
+        """
+        digests = iter(digests)
+        count = 0
+        while True:
+            rows = [{
+                "id": uuid.uuid4(), "org_id": org_id, "channel": channel, "kind": "DIGEST",
+                "subject": subject, "body": body, "status": "PENDING", "attempts": 0,
+            } for org_id, subject, body in islice(digests, ENQUEUE_CHUNK_SIZE)]
+            if not rows:
+                return count
+            db.execute(insert(OutboxMessage), rows)
+            count += len(rows)
+
+    # --- Delivery ---
+
+    def reclaim(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Returns messages whose lease expired to PENDING. Committed."""
+        now = now or datetime.now(timezone.utc)
+        reclaimed = db.query(OutboxMessage).filter(
+            OutboxMessage.status == "SENDING", OutboxMessage.claimed_at < now - self.lease,
+        ).update({
+            OutboxMessage.status: "PENDING",
+            OutboxMessage.next_attempt_at: now,
+            OutboxMessage.claimed_at: None,
+        }, synchronize_session=False)
+        db.commit()
+        if reclaimed:
+            logger.warning(f"Reclaimed {reclaimed} outbox messages whose delivery lease expired.")
+        return reclaimed
+
+    def claim(self, db: Session, limit: int, channels: Optional[Sequence[str]] = None,
+              now: Optional[datetime] = None) -> List:
+        """
+        Claims up to `limit` due messages, oldest first, in one UPDATE over a
+        SKIP LOCKED sub-select, and commits so the claim is visible to every
+        other worker. Returns the claimed rows.
+        """
+        now = now or datetime.now(timezone.utc)
+        due = select(OutboxMessage.id).where(
+            OutboxMessage.status == "PENDING", OutboxMessage.next_attempt_at <= now,
+        )
+        if channels is not None:
+            due = due.where(OutboxMessage.channel.in_(list(channels)))
+        due = due.order_by(OutboxMessage.next_attempt_at).limit(limit).with_for_update(skip_locked=True)
+
+        claimed = db.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(due), OutboxMessage.status == "PENDING")
+            .values(status="SENDING", claimed_at=now, attempts=OutboxMessage.attempts + 1)
+            .returning(OutboxMessage.id, OutboxMessage.org_id, OutboxMessage.channel, OutboxMessage.kind,
+                       OutboxMessage.alert_id, OutboxMessage.subject, OutboxMessage.body, OutboxMessage.attempts)
+        ).all()
+        db.commit()
+        return claimed
+
+    def render(self, db: Session, claimed: List) -> List[Envelope]:
+        """
+        Groups claimed messages into envelopes: all of an org's alerts on a
+        channel become one message; digests go out as written.
+        """
+        profiles = {
+            org_id: (name, email) for org_id, name, email in db.query(
+                ServiceProfile.org_id, ServiceProfile.name, ServiceProfile.contact_email,
+            ).filter(ServiceProfile.org_id.in_({m.org_id for m in claimed}))
+        }
+        alert_ids = [m.alert_id for m in claimed if m.alert_id is not None]
+        alerts = {
+            alert.id: alert for alert in db.query(Alert).filter(Alert.id.in_(alert_ids))
+        } if alert_ids else {}
+
+        envelopes, grouped = [], {}
+        for message in claimed:
+            if message.kind == "ALERT":
+                grouped.setdefault((message.org_id, message.channel), []).append(message)
+            else:
+                _, email = profiles.get(message.org_id, (None, None))
+                envelopes.append(Envelope(message.org_id, message.channel, email,
+                                          message.subject or "", message.body or "", [message]))
+
+        for (org_id, channel), messages in grouped.items():
+            name, email = profiles.get(org_id, (None, None))
+            group_alerts = sorted(
+                (alerts[m.alert_id] for m in messages if m.alert_id in alerts),
+                key=lambda a: (a.created_at is None, a.created_at),
+            )
+            # Alerts deleted since they were queued leave nothing to say
+            if not group_alerts:
+                envelopes.append(Envelope(org_id, channel, email, "", "", messages))
+                continue
+            subject = f"{len(group_alerts)} new alert{'s' if len(group_alerts) != 1 else ''} for {name or 'your organisation'}"
+            lines = [f"- [{a.alert_type}] {a.message} (Notice: {a.notice_id})" for a in group_alerts]
+            envelopes.append(Envelope(org_id, channel, email, subject, "\n".join(lines) + "\n\n" + FOOTER, messages))
+        return envelopes
+
+    def mark_delivered(self, db: Session, messages: List, now: Optional[datetime] = None) -> int:
+        """Not committed."""
+        now = now or datetime.now(timezone.utc)
+        return db.query(OutboxMessage).filter(
+            OutboxMessage.id.in_([m.id for m in messages]), OutboxMessage.status == "SENDING",
+        ).update({
+            OutboxMessage.status: "DELIVERED",
+            OutboxMessage.delivered_at: now,
+            OutboxMessage.last_error: None,
+        }, synchronize_session=False)
+
+    def mark_failed(self, db: Session, messages: List, error: BaseException, permanent: bool = False,
+                    now: Optional[datetime] = None) -> int:
+        """
+        Schedules a retry after the backoff for each message's attempt count,
+        or marks it FAILED once out of attempts (or if `permanent`). One
+        UPDATE per distinct attempt count. Not committed. Returns messages FAILED.
+        """
+        now = now or datetime.now(timezone.utc)
+        by_attempts: Dict[int, List[uuid.UUID]] = {}
+        for message in messages:
+            by_attempts.setdefault(message.attempts, []).append(message.id)
+
+        failed = 0
+        for attempts, ids in by_attempts.items():
+            final = permanent or attempts >= self.max_attempts
+            updated = db.query(OutboxMessage).filter(
+                OutboxMessage.id.in_(ids), OutboxMessage.status == "SENDING",
+            ).update({
+                OutboxMessage.status: "FAILED" if final else "PENDING",
+                OutboxMessage.next_attempt_at: None if final else now + self.backoff(attempts),
+                OutboxMessage.claimed_at: None,
+                OutboxMessage.last_error: f"{type(error).__name__}: {error}"[:MAX_ERROR_MESSAGE_LENGTH],
+            }, synchronize_session=False)
+            if final:
+                failed += updated
+        return failed
+
+    def next_due_at(self, db: Session) -> Optional[datetime]:
+        """When the earliest backed-off PENDING message becomes due."""
+        message = db.query(OutboxMessage.next_attempt_at).filter(
+            OutboxMessage.status == "PENDING",
+        ).order_by(OutboxMessage.next_attempt_at).first()
+        return message.next_attempt_at if message else None
+
+
+# Shared by everything that raises alerts
+outbox = Outbox()
@@ -1,11 +1,77 @@
 import logging
 from datetime import datetime, timedelta
-from sqlalchemy import and_
+from sqlalchemy import text
 from sqlalchemy.orm import Session
-from app.models import Notice, Alert, ServiceProfile
+from app.services.alerts.outbox import DEFAULT_CHANNEL, OUTBOX_FROM_INSERTED_SQL
 
 logger = logging.getLogger(__name__)
 
+# Profiles at or above this income are treated as national (as in MatchingEngine)
+NATIONAL_INCOME = 5_000_000
+# A stored match above this score makes an org interested regardless of CPV/region
+MIN_MATCH_SCORE = 0
+
+# Per-profile CPV prefixes, lowercased service regions and whether income makes
+# the org national; shared with the strategic lifecycle alerts.
+PROFILES_CTE = """profiles AS (
+        SELECT p.org_id,
+               ARRAY(SELECT DISTINCT LEFT(c, 4) FROM unnest(p.inferred_cpv_codes) AS c) AS cpv_prefixes,
+               ARRAY(
+                   SELECT lower(r) FROM jsonb_array_elements_text(
+                       CASE jsonb_typeof(p.service_regions)
+                           WHEN 'object' THEN COALESCE(p.service_regions -> 'regions', CAST('[]' AS jsonb))
+                           WHEN 'array' THEN p.service_regions
+                           ELSE CAST('[]' AS jsonb) END
+                   ) AS r
+               ) AS regions,
+               COALESCE(p.latest_income, 0) > :national_income AS income_national
+        FROM service_profile p
+    )"""
+
+# Ending contracts x interested orgs, written in one statement. An org is
+# interested if it already has a scored match on the notice, or if its
+# inferred CPV codes share a 4-character prefix with the notice's and the
+# notice is in one of its regions (or is national / of unknown region).
+# The partial unique index on alert makes re-runs idempotent; only the alerts
+# actually inserted are queued for delivery, by the same statement.
+RENEWAL_ALERTS_SQL = f"""
+    WITH ending AS (
+        SELECT n.ocid, n.title, n.cpv_codes, n.delivery_regions, n.contract_period_end,
+               CAST(EXTRACT(DAY FROM n.contract_period_end - :today) AS integer) AS days_left
+        FROM notice n
+        WHERE n.notice_type = 'contractAward'
+          AND n.contract_period_end > :today AND n.contract_period_end <= :horizon
+          AND (n.cluster_id IS NULL OR n.cluster_id = n.ocid)
+    ),
+    {PROFILES_CTE},
+    interested AS (
+        SELECT e.*, p.org_id, 'match' AS reason
+        FROM ending e
+        JOIN notice_match m ON m.notice_id = e.ocid AND m.score > :min_match_score
+        JOIN profiles p ON p.org_id = m.org_id
+        UNION
+        SELECT e.*, p.org_id, 'cpv' AS reason
+        FROM ending e
+        JOIN profiles p ON p.cpv_prefixes && ARRAY(SELECT DISTINCT LEFT(c, 4) FROM unnest(e.cpv_codes) AS c)
+        WHERE e.delivery_regions IS NULL
+           OR p.income_national
+           OR p.regions && ARRAY['national', 'united kingdom', 'uk']
+           OR p.regions && e.delivery_regions
+    ),
+    inserted AS (
+        INSERT INTO alert (id, org_id, notice_id, alert_type, severity, message, details, is_read, created_at)
+        SELECT DISTINCT ON (org_id, ocid)
+               gen_random_uuid(), org_id, ocid, 'RENEWAL', 'info',
+               'Renewal Alert: Contract for ''' || title || ''' ends in ~' || (days_left / 30) || ' months.',
+               jsonb_build_object('end_date', contract_period_end, 'days_to_expiry', days_left, 'reason', reason),
+               FALSE, now()
+        FROM interested
+        ORDER BY org_id, ocid, reason DESC  -- Prefer 'match' over 'cpv'
+        ON CONFLICT (org_id, notice_id, alert_type) WHERE alert_type <> 'MATERIAL_CHANGE' DO NOTHING
+        RETURNING id, org_id
+    )
+    {OUTBOX_FROM_INSERTED_SQL}"""
+
 class RenewalService:
     """
     Renewal/Expiry Intelligence (PRD 05).
@@ -15,54 +81,21 @@ class RenewalService:
     def __init__(self, db: Session):
         self.db = db
 
-    def scan_for_renewals(self, months_ahead: int = 12):
+    def scan_for_renewals(self, months_ahead: int = 12) -> int:
         """
-        Scans for contract awards ending soon and alerts matched organizations.
+        Alerts interested organisations about contract awards ending within
+        `months_ahead`, in one INSERT ... SELECT. Returns the alerts created.
         """
         today = datetime.utcnow()
         horizon = today + timedelta(days=months_ahead * 30)
-        
-        # 1. Find ending contracts
-        ending_notices = self.db.query(Notice)\
-            .filter(Notice.notice_type == 'contractAward')\
-            .filter(and_(Notice.contract_period_end > today, Notice.contract_period_end <= horizon))\
-            .all()
-            
-        logger.info(f"Found {len(ending_notices)} contracts ending within {months_ahead} months.")
-        
-        for notice in ending_notices:
-            # 2. Find organizations with matching Service Profiles
-            # For MVP: Alert any org that "could" deliver this (simplified match)
-            # In a full system, we'd use the MatchingEngine results.
-            
-            # Find all profiles (simplified query)
-            profiles = self.db.query(ServiceProfile).all()
-            
-            for profile in profiles:
-                # Check if we should alert this org
-                # Logic: If it's a high match or they already track it
-                
-                # Check for existing match/alert to avoid duplicates
-                existing_alert = self.db.query(Alert).filter(
-                    Alert.org_id == profile.org_id,
-                    Alert.notice_id == notice.ocid,
-                    Alert.alert_type == 'RENEWAL'
-                ).first()
-                
-                if not existing_alert:
-                    days_left = (notice.contract_period_end - today).days
-                    alert = Alert(
-                        org_id=profile.org_id,
-                        notice_id=notice.ocid,
-                        alert_type='RENEWAL',
-                        severity='info',
-                        message=f"Renewal Alert: Contract for '{notice.title}' ends in ~{days_left // 30} months.",
-                        details={
-                            "end_date": notice.contract_period_end.isoformat(),
-                            "days_to_expiry": days_left
-                        }
-                    )
-                    self.db.add(alert)
-                    logger.info(f"Created renewal alert for {profile.org_id} on notice {notice.ocid}")
 
+        created = self.db.execute(text(RENEWAL_ALERTS_SQL), {
+            "today": today,
+            "horizon": horizon,
+            "national_income": NATIONAL_INCOME,
+            "min_match_score": MIN_MATCH_SCORE,
+            "channel": DEFAULT_CHANNEL,
+        }).rowcount
         self.db.commit()
+        logger.info(f"Created {created} renewal alerts for contracts ending within {months_ahead} months.")
+        return created
@@ -0,0 +1,146 @@
+import logging
+import os
+import re
+import smtplib
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from email.message import EmailMessage
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentDeliveryError(Exception):
+    """A message that can never be delivered as addressed (e.g. no recipient); not retried."""
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket: refills at `rate` sends per second and holds at
+    most `capacity`, so every delivery thread of a process shares one budget
+    per transport. The blocking counterpart of clients/throttling.TokenBucket.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:  # Waiters queue on the lock, so sends stay evenly spaced
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                time.sleep((1 - self._tokens) / self.rate)
+
+
+class Transport(ABC):
+    """
+    Sends one rendered message. Raise PermanentDeliveryError for messages that
+    can't succeed; any other exception is retried with backoff.
+    Implementations must be safe to call from several threads.
+    """
+    rate_limiter: Optional[RateLimiter] = None
+
+    @abstractmethod
+    def send(self, recipient: Optional[str], subject: str, body: str):
+        ...
+
+    def close(self):
+        pass
+
+
+class SMTPTransport(Transport):
+    """Plain-text email over SMTP, one connection per delivery thread, reused across sends."""
+
+    def __init__(self, host: str, port: int = 587, sender: str = "alerts@localhost",
+                 username: Optional[str] = None, password: Optional[str] = None,
+                 starttls: bool = True, rate: Optional[float] = None, timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(rate) if rate else None
+        self._local = threading.local()
+        self._open = []
+        self._lock = threading.Lock()
+
+    def _connection(self) -> smtplib.SMTP:
+        smtp = getattr(self._local, "smtp", None)
+        if smtp is None:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password or "")
+            self._local.smtp = smtp
+            with self._lock:
+                self._open.append(smtp)
+        return smtp
+
+    def send(self, recipient: Optional[str], subject: str, body: str):
+        if not recipient:
+            raise PermanentDeliveryError("Organisation has no contact_email")
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = recipient
+        message["Subject"] = subject
+        message.set_content(body)
+        try:
+            self._connection().send_message(message)
+        except smtplib.SMTPRecipientsRefused as e:
+            raise PermanentDeliveryError(f"Recipient refused: {recipient}") from e
+        except (smtplib.SMTPServerDisconnected, OSError):
+            self._local.smtp = None  # Reconnect on the retry
+            raise
+
+    def close(self):
+        """Quits every thread's connection; call once the delivery threads are done."""
+        with self._lock:
+            connections, self._open = self._open, []
+        for smtp in connections:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+        self._local = threading.local()
+
+
+class FileTransport(Transport):
+    """
+    Writes each message to `directory` as an .eml file instead of sending it.
+    A local sink for development and tests; `sent` counts the files written.
+    """
+
+    def __init__(self, directory: str, rate: Optional[float] = None):
+        self.directory = directory
+        self.rate_limiter = RateLimiter(rate) if rate else None
+        self.sent = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def send(self, recipient: Optional[str], subject: str, body: str):
+        message = EmailMessage()
+        message["To"] = recipient or "undisclosed-recipients:;"
+        message["Subject"] = subject
+        message.set_content(body)
+        slug = re.sub(r"[^a-z0-9]+", "-", (recipient or "unknown").lower()).strip("-")
+        name = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{slug}-{uuid.uuid4().hex[:8]}.eml"
+        with open(os.path.join(self.directory, name), "wb") as f:
+            f.write(message.as_bytes())
+        with self._lock:
+            self.sent += 1
@@ -2,7 +2,7 @@ import logging
 from typing import List, Dict, Any
 from sqlalchemy import func, extract, desc
 from sqlalchemy.orm import Session
-from app.models import Notice
+from app.models import Notice, NoticeRaw
 
 logger = logging.getLogger(__name__)
 
@@ -61,14 +61,17 @@ class AnalyticsService:
         """
         Analyzes lot partitioning trends.
         """
-        notices = self.db.query(Notice).filter(Notice.raw_json.isnot(None)).all()
+        # Releases are compressed and opaque to SQL, so stream them rather than loading all at once
+        releases = self.db.query(NoticeRaw.release).yield_per(500)
         
         total_lots = 0
+        notices_count = 0
         notices_with_lots = 0
         lot_values = []
         
-        for n in notices:
-            tender = n.raw_json.get("tender", {})
+        for (release,) in releases:
+            notices_count += 1
+            tender = release.get("tender", {})
             lots = tender.get("lots", [])
             if lots:
                 notices_with_lots += 1
@@ -80,6 +83,6 @@ class AnalyticsService:
         return {
             "avg_lots_per_notice": total_lots / notices_with_lots if notices_with_lots > 0 else 0,
             "avg_lot_value": sum(lot_values) / len(lot_values) if lot_values else 0,
-            "notices_count": len(notices),
+            "notices_count": notices_count,
             "notices_with_lots": notices_with_lots
         }
@@ -0,0 +1,341 @@
+"""
+BuyerResolver
+-------------
+Maps the buyer on an OCDS release to a single Buyer row, trying in order:
+
+  1. OCDS identifiers (scheme + id) from the buyer's party entry
+  2. A normalised name key ("The Leeds City Council." -> "leeds city council")
+  3. A fuzzy match on the name key, blocked by its rarest informative tokens;
+     names must still agree exactly on their distinguishing tokens
+
+Every key seen for a buyer is stored in `buyer_alias` and cached in-process,
+so once warm, resolving a known buyer costs no database round trip.
+"""
+import logging
+import re
+import unicodedata
+import uuid
+from collections import defaultdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import bindparam, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models import Buyer, BuyerAlias, ContractAward, Notice
+from app.services.ingestion.normalizer import Normalizer
+
+logger = logging.getLogger(__name__)
+
+# Dropped from name keys entirely
+NAME_NOISE = {"the"}
+NAME_SYNONYMS = {"ltd": "limited", "dept": "department", "govt": "government"}
+
+# Too common to be useful for fuzzy blocking
+BLOCKING_STOP_TOKENS = {
+    "of", "and", "for", "council", "city", "county", "borough", "district", "metropolitan",
+    "royal", "nhs", "trust", "foundation", "limited", "plc", "uk", "service", "services",
+    "department", "authority", "university", "college", "school", "group", "partnership",
+}
+
+# Tell otherwise identical authority names apart (East/West Sussex): always distinguishing
+DIRECTIONAL_TOKENS = {
+    "north", "south", "east", "west", "northern", "southern", "eastern", "western",
+    "northeast", "northwest", "southeast", "southwest", "central", "mid", "upper", "lower", "inner", "outer",
+}
+# A token this close to a stop token is a misspelling of it ("counci"), not a distinguishing word
+GENERIC_TYPO_RATIO = 0.85
+
+
+def identifier_key(scheme: Optional[str], ident: Optional[str]) -> Optional[str]:
+    """'id:GB-COH:01234567' for an OCDS identifier, or None if incomplete."""
+    if not scheme or not ident:
+        return None
+    scheme = str(scheme).strip().upper()
+    ident = re.sub(r"\s+", "", str(ident)).upper()
+    if not scheme or not ident:
+        return None
+    return f"id:{scheme}:{ident}"
+
+
+def name_key(name: Optional[str]) -> Optional[str]:
+    """Case, accent, punctuation and '&'-insensitive form of a buyer name."""
+    if not name:
+        return None
+    text = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().lower()
+    text = text.replace("&", " and ")
+    tokens = [NAME_SYNONYMS.get(t, t) for t in re.findall(r"[a-z0-9]+", text) if t not in NAME_NOISE]
+    return " ".join(tokens) or None
+
+
+def _informative_tokens(key: str) -> Set[str]:
+    return {t for t in key.split() if t not in BLOCKING_STOP_TOKENS and len(t) > 1}
+
+
+@lru_cache(maxsize=65536)
+def _distinguishing_tokens(key: str) -> frozenset:
+    """Tokens a fuzzy match must share exactly: directions, and anything not a (misspelt) stop token."""
+    def generic(token):
+        if token in DIRECTIONAL_TOKENS:
+            return False
+        return token in BLOCKING_STOP_TOKENS or any(
+            SequenceMatcher(None, token, stop).ratio() >= GENERIC_TYPO_RATIO for stop in BLOCKING_STOP_TOKENS
+        )
+    return frozenset(t for t in key.split() if not generic(t))
+
+
+class BuyerResolver:
+    """
+    Resolves releases to buyer ids. Keep one instance per worker process;
+    the cache is warmed from `buyer` + `buyer_alias` on first use.
+    """
+
+    def __init__(self, fuzzy_threshold: float = 0.92):
+        self.fuzzy_threshold = fuzzy_threshold
+        self.normalizer = Normalizer()
+        self._reset()
+
+    def _reset(self):
+        self._keys: Dict[str, uuid.UUID] = {}            # alias key -> buyer id
+        self._names: Dict[uuid.UUID, str] = {}           # buyer id -> canonical name key
+        self._schemes: Dict[uuid.UUID, Dict[str, str]] = defaultdict(dict)  # buyer -> {scheme: id key}
+        self._tokens: Dict[str, Set[uuid.UUID]] = defaultdict(set)
+        self._slugs: Set[str] = set()
+        self._warm = False
+
+    # ─── Cache ───
+
+    def warm(self, db: Session):
+        """Loads every buyer and alias key into memory (two queries)."""
+        self._reset()
+        for buyer_id, canonical_name, slug, identifiers in db.query(
+            Buyer.id, Buyer.canonical_name, Buyer.slug, Buyer.identifiers
+        ):
+            self._slugs.add(slug)
+            keys = self._identifier_keys(identifiers)
+            nkey = name_key(canonical_name)
+            if nkey:
+                keys.append(f"name:{nkey}")
+            self._index(buyer_id, keys, nkey)
+
+        for alias_key, buyer_id in db.query(BuyerAlias.alias_key, BuyerAlias.buyer_id):
+            self._index(buyer_id, [alias_key])
+
+        self._warm = True
+        logger.info(f"BuyerResolver warmed with {len(self._names)} buyers / {len(self._keys)} keys.")
+
+    def invalidate(self):
+        """Forces a reload on next use (e.g. after the caller rolled back)."""
+        self._warm = False
+
+    def _index(self, buyer_id: uuid.UUID, keys: Iterable[str], canonical_key: Optional[str] = None):
+        if canonical_key and buyer_id not in self._names:
+            self._names[buyer_id] = canonical_key
+            for token in _informative_tokens(canonical_key):
+                self._tokens[token].add(buyer_id)
+        for key in keys:
+            self._keys.setdefault(key, buyer_id)
+            if key.startswith("id:"):
+                scheme = key.split(":", 2)[1]
+                self._schemes[buyer_id].setdefault(scheme, key)
+
+    @staticmethod
+    def _identifier_keys(identifiers) -> List[str]:
+        """Identifier keys from a Buyer.identifiers value (a dict or a list of dicts)."""
+        if isinstance(identifiers, dict):
+            identifiers = [identifiers]
+        keys = []
+        for ident in identifiers or []:
+            if isinstance(ident, dict):
+                key = identifier_key(ident.get("scheme"), ident.get("id"))
+                if key and key not in keys:
+                    keys.append(key)
+        return keys
+
+    # ─── Matching ───
+
+    @staticmethod
+    def _buyer_party(release: Dict) -> Dict:
+        buyer = release.get("buyer") or {}
+        parties = release.get("parties") or []
+        if buyer.get("id"):
+            for party in parties:
+                if party.get("id") == buyer.get("id"):
+                    return party
+        for party in parties:
+            if "buyer" in (party.get("roles") or []):
+                return party
+        return {}
+
+    def release_buyer(self, release: Dict) -> Tuple[Dict, List[str]]:
+        """Normalised Buyer data plus every identifier key for the release's buyer."""
+        buyer = dict(release.get("buyer") or {})
+        party = self._buyer_party(release)
+        if not buyer.get("name") and party.get("name"):
+            buyer["name"] = party["name"]
+        if not buyer.get("identifier") and party.get("identifier"):
+            buyer["identifier"] = party["identifier"]
+
+        idents = [buyer.get("identifier"), party.get("identifier")] + list(party.get("additionalIdentifiers") or [])
+        return self.normalizer.normalize_buyer(buyer), self._identifier_keys([i for i in idents if i])
+
+    def _conflicts(self, buyer_id: uuid.UUID, id_keys: List[str]) -> bool:
+        """True if the buyer already holds a different id under the same scheme."""
+        known = self._schemes.get(buyer_id, {})
+        for key in id_keys:
+            scheme = key.split(":", 2)[1]
+            if scheme in known and known[scheme] != key:
+                return True
+        return False
+
+    def _fuzzy(self, nkey: str, id_keys: List[str]) -> Optional[uuid.UUID]:
+        tokens = _informative_tokens(nkey)
+        if not tokens:
+            return None
+        # Block on the two rarest tokens: real matches almost always share one.
+        rare = sorted(tokens, key=lambda t: len(self._tokens.get(t, ())))[:2]
+        candidates = set().union(*(self._tokens.get(t, set()) for t in rare))
+
+        # Similar spelling is not enough: "east sussex" and "west sussex" differ in one letter
+        distinguishing = _distinguishing_tokens(nkey)
+        best, best_score = None, self.fuzzy_threshold
+        for buyer_id in candidates:
+            if _distinguishing_tokens(self._names[buyer_id]) != distinguishing:
+                continue
+            score = SequenceMatcher(None, nkey, self._names[buyer_id]).ratio()
+            if score >= best_score and not self._conflicts(buyer_id, id_keys):
+                best, best_score = buyer_id, score
+        return best
+
+    def lookup(self, id_keys: List[str], nkey: Optional[str]) -> Optional[Tuple[uuid.UUID, str]]:
+        """In-memory resolution. Returns (buyer_id, how) or None if unseen."""
+        for key in id_keys:
+            if key in self._keys:
+                return self._keys[key], "identifier"
+        if nkey:
+            buyer_id = self._keys.get(f"name:{nkey}")
+            if buyer_id and not self._conflicts(buyer_id, id_keys):
+                return buyer_id, "name"
+            buyer_id = self._fuzzy(nkey, id_keys)
+            if buyer_id:
+                return buyer_id, "fuzzy"
+        return None
+
+    # ─── Resolution ───
+
+    def _unique_slug(self, slug: str) -> str:
+        candidate, n = slug, 2
+        while candidate in self._slugs:
+            candidate = f"{slug}-{n}"
+            n += 1
+        return candidate
+
+    def resolve(self, db: Session, release: Dict) -> uuid.UUID:
+        return self.resolve_releases(db, [release])[0]
+
+    def resolve_releases(self, db: Session, releases: List[Dict]) -> List[uuid.UUID]:
+        """
+        Buyer ids for each release, in order. New buyers and aliases are
+        flushed in one go (not committed - that's the caller's transaction).
+        """
+        return self.resolve_buyers(db, [self.release_buyer(release) for release in releases])
+
+    def resolve_buyers(self, db: Session, buyers: List[Tuple[Dict, List[str]]], _retry: bool = True) -> List[uuid.UUID]:
+        """As resolve_releases, for (buyer_data, id_keys) pairs from release_buyer()."""
+        if not self._warm:
+            self.warm(db)
+
+        results = []
+        new_buyers = []
+        new_aliases = {}
+
+        for buyer_data, id_keys in buyers:
+            nkey = name_key(buyer_data["canonical_name"])
+            keys = id_keys + ([f"name:{nkey}"] if nkey else [])
+
+            hit = self.lookup(id_keys, nkey)
+            if hit:
+                buyer_id, how = hit
+            else:
+                buyer_id, how = uuid.uuid4(), "new"
+                slug = self._unique_slug(buyer_data["slug"])
+                self._slugs.add(slug)
+                new_buyers.append(Buyer(id=buyer_id, canonical_name=buyer_data["canonical_name"],
+                                        slug=slug, identifiers=buyer_data["identifiers"]))
+
+            for key in keys:
+                if key not in self._keys:
+                    source = "identifier" if key.startswith("id:") else ("fuzzy" if how == "fuzzy" else "name")
+                    new_aliases[key] = BuyerAlias(alias_key=key, buyer_id=buyer_id, source=source)
+            self._index(buyer_id, keys, nkey if how == "new" else None)
+            results.append(buyer_id)
+
+        if new_buyers or new_aliases:
+            try:
+                with db.begin_nested():
+                    db.add_all(new_buyers)
+                    db.flush()
+                    db.add_all(new_aliases.values())
+                    db.flush()
+            except IntegrityError:
+                if not _retry:
+                    raise
+                # Another worker created one of these buyers first; reload and retry.
+                logger.info("Buyer/alias conflict during resolution, re-warming cache.")
+                self._warm = False
+                return self.resolve_buyers(db, buyers, _retry=False)
+            if new_buyers:
+                logger.info(f"Created {len(new_buyers)} new buyers.")
+
+        return results
+
+    # ─── Consolidation ───
+
+    def merge_duplicates(self, db: Session, dry_run: bool = False) -> Dict[uuid.UUID, uuid.UUID]:
+        """
+        Folds existing duplicate Buyer rows into the oldest matching buyer:
+        notices and contract awards are re-pointed, keys kept as aliases,
+        duplicates deleted. The duplicates' buyer_category_history and
+        procurement_forecast rows are deleted with them, so both must be
+        rebuilt afterwards (app.workers.buyer_history_rebuild, then
+        app.workers.procurement_forecast); scripts/merge_duplicate_buyers.py does.
+        Returns {duplicate_id: survivor_id}.
+        """
+        self._reset()
+        buyers = db.query(Buyer).order_by(Buyer.created_at, Buyer.id).all()
+        aliases = defaultdict(list)
+        for alias_key, buyer_id in db.query(BuyerAlias.alias_key, BuyerAlias.buyer_id):
+            aliases[buyer_id].append(alias_key)
+
+        merges: Dict[uuid.UUID, uuid.UUID] = {}
+        for buyer in buyers:
+            id_keys = self._identifier_keys(buyer.identifiers) + [k for k in aliases[buyer.id] if k.startswith("id:")]
+            nkey = name_key(buyer.canonical_name)
+            keys = id_keys + ([f"name:{nkey}"] if nkey else []) + aliases[buyer.id]
+
+            hit = self.lookup(id_keys, nkey)
+            if hit:
+                merges[buyer.id] = hit[0]
+                self._index(hit[0], keys)
+            else:
+                self._index(buyer.id, keys, nkey)
+
+        logger.info(f"Found {len(merges)} duplicate buyers across {len(buyers)}.")
+        if dry_run or not merges:
+            return merges
+
+        pairs = [{"dup": dup, "survivor": survivor} for dup, survivor in merges.items()]
+        for table in (Notice.__table__, ContractAward.__table__, BuyerAlias.__table__):
+            db.execute(
+                update(table).where(table.c.buyer_id == bindparam("dup")).values(buyer_id=bindparam("survivor")),
+                pairs,
+            )
+        for key, buyer_id in self._keys.items():
+            if buyer_id in merges.values() and key not in aliases[buyer_id]:
+                db.merge(BuyerAlias(alias_key=key, buyer_id=buyer_id, source="merge"))
+        for buyer in buyers:
+            if buyer.id in merges:
+                db.delete(buyer)
+        db.commit()
+        self._warm = False
+        return merges
@@ -0,0 +1,248 @@
+import asyncio
+import calendar
+import logging
+import queue
+import threading
+import httpx
+from collections import OrderedDict
+from datetime import date
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from tenacity import retry, retry_if_exception_type, stop_after_attempt
+from app.services.ingestion.clients.throttling import (
+    RETRYABLE_STATUSES, RetryableHTTPError, TokenBucket, parse_retry_after, wait_for_retry,
+)
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+# Contracts Finder backs off hard once it starts answering 429 without a Retry-After
+DEFAULT_THROTTLE_SECONDS = 10.0
+
+
+class SearchSlice(NamedTuple):
+    """One independent unit of Contracts Finder work: a keyword (or None) over a publication window."""
+    keyword: Optional[str]
+    start: date
+    end: date
+
+
+def month_periods(year: int) -> List[Tuple[date, date]]:
+    return [(date(year, m, 1), date(year, m, calendar.monthrange(year, m)[1])) for m in range(1, 13)]
+
+
+def quarter_periods(year: int) -> List[Tuple[date, date]]:
+    return [
+        (date(year, m, 1), date(year, m + 2, calendar.monthrange(year, m + 2)[1]))
+        for m in (1, 4, 7, 10)
+    ]
+
+
+def build_slices(keywords: Iterable[Optional[str]], periods: Iterable[Tuple[date, date]]) -> List[SearchSlice]:
+    """Cross product of keywords × periods, keyword-major."""
+    periods = list(periods)
+    return [SearchSlice(keyword, start, end) for keyword in keywords for start, end in periods]
+
+
+class SeenSet:
+    """
+    Bounded, insertion-ordered OCID set. Oldest entries are evicted past
+    `capacity`, so a long backfill holds a fixed amount of memory; anything
+    evicted and seen again is caught downstream by the content-hash skip.
+    """
+
+    def __init__(self, capacity: int = 200_000):
+        self.capacity = capacity
+        self._items: "OrderedDict[str, None]" = OrderedDict()
+
+    def add(self, key: str) -> bool:
+        """Records `key`; returns False if it was already present."""
+        if key in self._items:
+            self._items.move_to_end(key)
+            return False
+        self._items[key] = None
+        if len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class ContractsFinderClient:
+    """
+    Client for the Contracts Finder OCDS search API.
+
+    Searches are split into keyword × period slices that are paged
+    concurrently (`concurrency` at a time) over one pooled httpx client.
+    Every request draws from a shared token bucket, so the slices together
+    stay under `rate_per_second`; a 429 pauses the whole bucket.
+    """
+    BASE_URL = "https://www.contractsfinder.service.gov.uk/Published/Notices/OCDS/Search"
+    HEADERS = {"Accept": "application/json"}
+    PAGE_SIZE = 20  # Contracts Finder's fixed page size; a short page is the last one
+
+    def __init__(self, rate_per_second: float = 2.0, burst: int = 4, concurrency: int = 4,
+                 max_pages_per_slice: Optional[int] = None, seen_capacity: int = 200_000,
+                 timeout: int = 30, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.concurrency = max(1, concurrency)
+        self.max_pages_per_slice = max_pages_per_slice
+        self.seen_capacity = seen_capacity
+        self.timeout = timeout
+        self._transport = transport  # Injected in tests (httpx.MockTransport)
+
+    def _client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            headers=self.HEADERS,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            follow_redirects=True,
+            transport=self._transport,
+        )
+
+    @staticmethod
+    def _params(search: SearchSlice, page: int) -> Dict:
+        params = {
+            "publishedFrom": f"{search.start.isoformat()}T00:00:00Z",
+            "publishedTo": f"{search.end.isoformat()}T23:59:59Z",
+            "page": page,
+        }
+        if search.keyword:
+            params["keyword"] = search.keyword
+        return params
+
+    @retry(
+        retry=retry_if_exception_type((RetryableHTTPError, httpx.TransportError)),
+        wait=wait_for_retry,
+        stop=stop_after_attempt(6),
+        reraise=True,
+    )
+    async def _get_page(self, client: httpx.AsyncClient, bucket: TokenBucket, params: Dict) -> Dict:
+        """Fetches one search page, waiting for a token first; 429/5xx are retried."""
+        await bucket.acquire()
+        response = await client.get(self.BASE_URL, params=params)
+        if response.status_code in RETRYABLE_STATUSES:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if response.status_code == 429:
+                bucket.pause(retry_after if retry_after is not None else DEFAULT_THROTTLE_SECONDS)
+            logger.warning(f"Contracts Finder HTTP {response.status_code} (retry after {retry_after}s): {params}")
+            raise RetryableHTTPError(response.status_code, retry_after, source="Contracts Finder")
+        response.raise_for_status()
+        return response.json()
+
+    async def _paginate(self, client: httpx.AsyncClient, bucket: TokenBucket,
+                        search: SearchSlice) -> AsyncIterator[List[Dict]]:
+        page = 1
+        while self.max_pages_per_slice is None or page <= self.max_pages_per_slice:
+            releases = (await self._get_page(client, bucket, self._params(search, page))).get("releases", [])
+            if not releases:
+                return
+            logger.debug(f"{search.keyword or '*'} / {search.start} page {page}: {len(releases)} releases")
+            yield releases
+            if len(releases) < self.PAGE_SIZE:
+                return
+            page += 1
+
+    async def iter_pages_async(self, slices: Iterable[SearchSlice]) -> AsyncIterator[Tuple[SearchSlice, List[Dict]]]:
+        """
+        Async iterator of (slice, releases) pages across all slices, in
+        completion order. A slice that keeps failing is logged and dropped
+        so one bad query doesn't abort the backfill.
+        """
+        pending: asyncio.Queue = asyncio.Queue()
+        for search in slices:
+            pending.put_nowait(search)
+        pages: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        bucket = TokenBucket(self.rate_per_second, self.burst)
+
+        async with self._client() as client:
+            async def worker():
+                while True:
+                    try:
+                        search = pending.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    try:
+                        async for releases in self._paginate(client, bucket, search):
+                            await pages.put((search, releases))
+                    except Exception as e:
+                        logger.error(f"Contracts Finder slice {search.keyword or '*'} {search.start}..{search.end} failed: {e}")
+
+            async def produce():
+                await asyncio.gather(*(worker() for _ in range(min(self.concurrency, pending.qsize()))))
+                await pages.put(_DONE)
+
+            task = asyncio.create_task(produce())
+            try:
+                while (item := await pages.get()) is not _DONE:
+                    yield item
+            finally:
+                task.cancel()
+
+    async def fetch_releases_async(self, slices: Iterable[SearchSlice],
+                                   keep: Optional[Callable[[Dict], bool]] = None) -> AsyncIterator[Tuple[SearchSlice, Dict]]:
+        """Async counterpart of `fetch_releases`."""
+        seen = SeenSet(self.seen_capacity)
+        async for search, releases in self.iter_pages_async(slices):
+            for release in releases:
+                ocid = release.get("ocid")
+                if ocid and seen.add(ocid) and (keep is None or keep(release)):
+                    yield search, release
+
+    def fetch_releases(self, slices: Iterable[SearchSlice],
+                       keep: Optional[Callable[[Dict], bool]] = None) -> Iterator[Tuple[SearchSlice, Dict]]:
+        """
+        Blocking iterator of (slice, release), each OCID at most once (within
+        the seen-set's capacity) and only if `keep(release)` when given. The
+        event loop runs on a background thread, so slices keep downloading
+        while the caller ingests.
+        """
+        pages: queue.Queue = queue.Queue(maxsize=self.concurrency * 2)
+        stop = threading.Event()
+        slices = list(slices)
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        async def pump():
+            loop = asyncio.get_running_loop()
+            async for item in self.iter_pages_async(slices):
+                if not await loop.run_in_executor(None, put, item):
+                    return
+
+        def run():
+            try:
+                asyncio.run(pump())
+                put(_DONE)
+            except Exception as e:
+                put(e)
+
+        thread = threading.Thread(target=run, name="cf-fetch", daemon=True)
+        thread.start()
+        seen = SeenSet(self.seen_capacity)
+        try:
+            while True:
+                item = pages.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                search, releases = item
+                for release in releases:
+                    ocid = release.get("ocid")
+                    if ocid and seen.add(ocid) and (keep is None or keep(release)):
+                        yield search, release
+        finally:
+            # Consumer stopped early: release the producer thread.
+            stop.set()
@@ -1,68 +1,184 @@
-import requests
-import time
+import asyncio
 import logging
-from typing import Iterator, Dict, Optional
-from datetime import datetime
-from tenacity import retry, stop_after_attempt, wait_exponential
+import queue
+import threading
+import httpx
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional
+from datetime import datetime, timezone
+from tenacity import retry, retry_if_exception_type, stop_after_attempt
+from app.services.ingestion.clients.throttling import (
+    RETRYABLE_STATUSES, RetryableHTTPError, parse_retry_after, wait_for_retry,
+)
 
 logger = logging.getLogger(__name__)
 
+_DONE = object()
+
+
 class FTSClient:
     """
     Client for 'Find a Tender' Service (FTS) OCDS API.
     Docs: https://www.find-tender.service.gov.uk/api/1.0/ocds/documentation
+
+    Pages are fetched over one pooled keep-alive httpx connection, and the
+    next page is requested while the caller is still processing the current
+    one (up to `prefetch_pages` ahead).
     """
     BASE_URL = "https://www.find-tender.service.gov.uk/api/1.0/ocdsReleasePackages"
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+        "Accept": "application/json"
+    }
 
-    def __init__(self, timeout: int = 30):
+    def __init__(self, timeout: int = 30, prefetch_pages: int = 2, transport: Optional[httpx.AsyncBaseTransport] = None):
         self.timeout = timeout
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        })
-
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    def _get_page(self, url: str) -> Dict:
-        """Helper to fetch a single page with retry logic."""
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept": "application/json"
-        }
-        response = requests.get(url, headers=headers, timeout=self.timeout)
+        self.prefetch_pages = max(1, prefetch_pages)
+        self._transport = transport  # Injected in tests (httpx.MockTransport)
+
+    def _client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            headers=self.HEADERS,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=2, max_keepalive_connections=2),
+            follow_redirects=True,
+            transport=self._transport,
+        )
+
+    def start_url(self, updated_after: datetime) -> str:
+        # Format date as ISO 8601 in UTC (e.g., 2023-10-01T14:05:09Z), keeping the time
+        # so a resumed run doesn't re-read everything since midnight
+        if updated_after.tzinfo:
+            updated_after = updated_after.astimezone(timezone.utc)
+        return f"{self.BASE_URL}?updatedFrom={updated_after.strftime('%Y-%m-%dT%H:%M:%SZ')}"
+
+    @retry(
+        retry=retry_if_exception_type((RetryableHTTPError, httpx.TransportError)),
+        wait=wait_for_retry,
+        stop=stop_after_attempt(6),
+        reraise=True,
+    )
+    async def _get_page(self, client: httpx.AsyncClient, url: str) -> Dict:
+        """Helper to fetch a single page with 429/5xx-aware retry logic."""
+        response = await client.get(url)
+        if response.status_code in RETRYABLE_STATUSES:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            logger.warning(f"FTS HTTP {response.status_code} (retry after {retry_after}s): {url}")
+            raise RetryableHTTPError(response.status_code, retry_after, source="FTS")
         try:
             response.raise_for_status()
-        except requests.exceptions.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             logger.error(f"HTTP Error: {e.response.status_code}")
             # Log first 500 chars of body to avoid massive logs if it's HTML
             logger.error(f"Response Body (partial): {e.response.text[:500]}")
             raise
         return response.json()
 
+    async def _paginate(self, url: str, emit: Callable[[Dict], Awaitable[bool]]):
+        """Follows links.next from `url`, handing each page to `emit` until it returns False."""
+        async with self._client() as client:
+            while url:
+                try:
+                    data = await self._get_page(client, url)
+                except Exception as e:
+                    logger.error(f"Error fetching page {url}: {str(e)}")
+                    raise
+                if not await emit(data):
+                    return
+                url = data.get('links', {}).get('next')
+                if url:
+                    logger.debug(f"Fetching next page: {url}")
+
+    async def iter_pages_async(self, url: str) -> AsyncIterator[Dict]:
+        """Async iterator over release packages, prefetching up to `prefetch_pages` ahead."""
+        pages: asyncio.Queue = asyncio.Queue(maxsize=self.prefetch_pages)
+
+        async def emit(page: Dict) -> bool:
+            await pages.put(page)
+            return True
+
+        async def produce():
+            try:
+                await self._paginate(url, emit)
+                await pages.put(_DONE)
+            except Exception as e:
+                await pages.put(e)
+
+        task = asyncio.create_task(produce())
+        try:
+            while True:
+                item = await pages.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            task.cancel()
+
+    def iter_pages(self, url: str) -> Iterator[Dict]:
+        """
+        Blocking iterator over release packages. An event loop on a
+        background thread keeps fetching while the caller works.
+        """
+        pages: queue.Queue = queue.Queue(maxsize=self.prefetch_pages)
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        async def emit(page: Dict) -> bool:
+            return await asyncio.get_running_loop().run_in_executor(None, put, page)
+
+        def run():
+            try:
+                asyncio.run(self._paginate(url, emit))
+                put(_DONE)
+            except Exception as e:
+                put(e)
+
+        thread = threading.Thread(target=run, name="fts-prefetch", daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = pages.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Consumer stopped early (limit reached, error): release the producer.
+            stop.set()
+
+    def fetch_pages(self, updated_after: Optional[datetime] = None, cursor_url: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Yields release packages from a saved `links.next` cursor if given, else
+        from `updated_after`. Each page's links.next is the resume point after it.
+        """
+        next_url = cursor_url or self.start_url(updated_after)
+        logger.info(f"Starting FTS fetch from: {next_url}")
+        return self.iter_pages(next_url)
+
     def fetch_releases(self, updated_after: datetime) -> Iterator[Dict]:
         """
         Yields individual releases from the FTS API starting from `updated_after`.
         """
-        # Format date as ISO 8601 (e.g., 2023-10-01T00:00:00Z)
-        params = f"?updatedFrom={updated_after.strftime('%Y-%m-%dT00:00:00Z')}"
-        next_url = f"{self.BASE_URL}{params}"
+        for data in self.fetch_pages(updated_after):
+            # Yield releases in this page
+            for release in data.get('releases', []):
+                yield release
 
+    async def fetch_releases_async(self, updated_after: datetime) -> AsyncIterator[Dict]:
+        """Async counterpart of `fetch_releases`."""
+        next_url = self.start_url(updated_after)
         logger.info(f"Starting FTS fetch from: {next_url}")
 
-        while next_url:
-            try:
-                data = self._get_page(next_url)
-                
-                # Yield releases in this page
-                for release in data.get('releases', []):
-                    yield release
-
-                # Check for pagination
-                links = data.get('links', {})
-                next_url = links.get('next')
-                
-                if next_url:
-                    logger.debug(f"Fetching next page: {next_url}")
-                    
-            except Exception as e:
-                logger.error(f"Error fetching page {next_url}: {str(e)}")
-                raise  # Propagate error so worker knows it failed
+        async for data in self.iter_pages_async(next_url):
+            for release in data.get('releases', []):
+                yield release
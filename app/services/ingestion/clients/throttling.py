@@ -0,0 +1,92 @@
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Optional
+from tenacity import wait_random_exponential
+
+# Statuses the procurement APIs return when they are throttling us or briefly unhealthy.
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRY_AFTER_SECONDS = 120
+
+
+class RetryableHTTPError(Exception):
+    """A 429/5xx from an upstream API. Carries the server's Retry-After hint, if any."""
+
+    def __init__(self, status_code: int, retry_after: Optional[float] = None, source: str = "API"):
+        super().__init__(f"{source} returned HTTP {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After is either delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+_backoff = wait_random_exponential(multiplier=1, min=2, max=60)
+
+
+def wait_for_retry(retry_state) -> float:
+    """Honour Retry-After when the server sends one, else exponential backoff with jitter."""
+    exc = retry_state.outcome.exception()
+    if isinstance(exc, RetryableHTTPError) and exc.retry_after is not None:
+        return min(exc.retry_after, MAX_RETRY_AFTER_SECONDS)
+    return _backoff(retry_state)
+
+
+class TokenBucket:
+    """
+    Async token bucket shared by every request a client makes: refills at
+    `rate` tokens per second and holds at most `capacity`, so concurrent
+    tasks together never exceed the upstream's request budget.
+
+    `pause()` empties the bucket for a while - used when the server answers
+    429, so every task backs off instead of just the one that was throttled.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        # Created lazily so the bucket can be built outside the loop that uses it
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:  # FIFO: waiters are served in arrival order
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0.0
+        self._updated = max(now, self._paused_until)
@@ -0,0 +1,172 @@
+"""
+Normalised suppliers and contract awards (PRD 01).
+
+Supplier and award data arrives inside each release's `awards` array. At
+ingestion every (award, supplier) pair becomes a `contract_award` row,
+with the supplier resolved to one `supplier` row by OCDS identifier (via
+the release's `parties`), else by normalised name. Incumbency, competitor
+and expiry questions then become indexed queries on `contract_award`
+instead of JSON walks over raw releases.
+"""
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models import ContractAward, Supplier, SupplierAlias
+from app.services.ingestion.buyer_resolver import identifier_key, name_key
+from app.services.ingestion.ocds import decode_release
+
+logger = logging.getLogger(__name__)
+
+# (canonical name, identifier keys, identifiers) for one award supplier
+SupplierRef = Tuple[str, List[str], List[Dict]]
+
+
+def release_suppliers(release: Dict) -> List[Tuple[int, SupplierRef]]:
+    """(award index, supplier) for every named supplier on the release's awards."""
+    parties = {p.get("id"): p for p in release.get("parties") or [] if p.get("id")}
+    refs = []
+    for index, award in enumerate(decode_release(release).awards):
+        for ref in award.suppliers:
+            party = parties.get(ref.get("id")) or {}
+            name = (ref.get("name") or party.get("name") or "").strip()
+            if not name:
+                continue
+            identifiers = [i for i in [party.get("identifier")] + list(party.get("additionalIdentifiers") or []) if i]
+            keys = []
+            for ident in identifiers:
+                key = identifier_key(ident.get("scheme"), ident.get("id"))
+                if key and key not in keys:
+                    keys.append(key)
+            refs.append((index, (name, keys, identifiers)))
+    return refs
+
+
+class SupplierResolver:
+    """
+    Resolves award suppliers to supplier ids: identifier keys first, then the
+    normalised name key. Every key is kept in `supplier_alias` and cached
+    in-process, so a known supplier costs no round trip once warm.
+    """
+
+    def __init__(self):
+        self._keys: Dict[str, uuid.UUID] = {}
+        self._warm = False
+
+    def warm(self, db: Session):
+        self._keys = {key: supplier_id for key, supplier_id in db.query(SupplierAlias.alias_key, SupplierAlias.supplier_id)}
+        self._warm = True
+        logger.info(f"SupplierResolver warmed with {len(self._keys)} keys.")
+
+    def invalidate(self):
+        """Forces a reload on next use (e.g. after the caller rolled back)."""
+        self._warm = False
+
+    def resolve(self, db: Session, suppliers: List[SupplierRef], _retry: bool = True) -> List[uuid.UUID]:
+        """
+        Supplier ids for each reference, in order. New suppliers and aliases
+        are flushed in one savepoint (committed with the caller's transaction).
+        """
+        if not self._warm:
+            self.warm(db)
+
+        results = []
+        new_suppliers = []
+        new_aliases = {}
+        for name, id_keys, identifiers in suppliers:
+            nkey = name_key(name)
+            keys = id_keys + ([f"name:{nkey}"] if nkey else [])
+            supplier_id = next((self._keys[k] for k in keys if k in self._keys), None)
+            if supplier_id is None:
+                supplier_id = uuid.uuid4()
+                new_suppliers.append(Supplier(id=supplier_id, canonical_name=name, identifiers=identifiers or None))
+            for key in keys:
+                if key not in self._keys:
+                    self._keys[key] = supplier_id
+                    new_aliases[key] = SupplierAlias(
+                        alias_key=key, supplier_id=supplier_id, source="identifier" if key.startswith("id:") else "name"
+                    )
+            results.append(supplier_id)
+
+        if new_suppliers or new_aliases:
+            try:
+                with db.begin_nested():
+                    db.add_all(new_suppliers)
+                    db.flush()
+                    db.add_all(new_aliases.values())
+                    db.flush()
+            except IntegrityError:
+                if not _retry:
+                    raise
+                # Another worker created one of these suppliers first; reload and retry.
+                logger.info("Supplier/alias conflict during resolution, re-warming cache.")
+                self._warm = False
+                return self.resolve(db, suppliers, _retry=False)
+        return results
+
+
+class ContractAwardIndex:
+    """Keeps `contract_award` in step with ingested notices."""
+
+    def __init__(self, resolver: Optional[SupplierResolver] = None):
+        self.resolver = resolver or SupplierResolver()
+
+    def record(self, db: Session, notices: Iterable) -> int:
+        """
+        Replaces the award rows of each notice with those in its current release
+        (one DELETE, one multi-row INSERT). Returns the rows written.
+        """
+        notices = [n for n in notices if n.raw_json is not None]
+        if not notices:
+            return 0
+
+        pending = []
+        refs = []
+        for notice in notices:
+            for index, supplier in release_suppliers(notice.raw_json):
+                pending.append((notice, index))
+                refs.append(supplier)
+        supplier_ids = self.resolver.resolve(db, refs) if refs else []
+
+        rows = {}
+        decoded = {}
+        for (notice, index), supplier_id in zip(pending, supplier_ids):
+            release = decoded.get(notice.ocid) or decoded.setdefault(notice.ocid, decode_release(notice.raw_json))
+            award = release.awards[index]
+            period = award.contract_period or release.contract_period
+            value = award.value
+            key = (notice.ocid, award.id or str(index), supplier_id)
+            rows[key] = {
+                "ocid": notice.ocid,
+                "award_id": key[1],
+                "supplier_id": supplier_id,
+                "buyer_id": notice.buyer_id,
+                "cpv_prefixes": sorted({c[:4] for c in notice.cpv_codes or []}) or None,
+                "status": award.status,
+                "award_date": award.date or notice.publication_date,
+                "value_amount": value.amount if value else None,
+                "value_currency": value.currency if value else None,
+                "contract_start": period.start if period else None,
+                "contract_end": period.end if period else None,
+            }
+
+        db.query(ContractAward).filter(
+            ContractAward.ocid.in_([n.ocid for n in notices])
+        ).delete(synchronize_session=False)
+        if rows:
+            db.execute(insert(ContractAward), list(rows.values()))
+        return len(rows)
+
+    @staticmethod
+    def expiring(db: Session, cpv_prefixes: Iterable[str], within_days: int = 365,
+                 now: Optional[datetime] = None) -> List[Tuple[ContractAward, Supplier]]:
+        """Awards in these CPV prefixes whose contracts end within `within_days`, soonest first."""
+        now = now or datetime.now(timezone.utc)
+        return db.query(ContractAward, Supplier).join(Supplier, Supplier.id == ContractAward.supplier_id).filter(
+            ContractAward.contract_end > now,
+            ContractAward.contract_end <= now + timedelta(days=within_days),
+            ContractAward.cpv_prefixes.overlap(list(cpv_prefixes)),
+        ).order_by(ContractAward.contract_end).all()
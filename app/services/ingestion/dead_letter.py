@@ -0,0 +1,117 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models import DeadLetterRelease
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 5
+MAX_ERROR_MESSAGE_LENGTH = 2000
+
+
+class DeadLetterQueue:
+    """
+    Failed releases, persisted with their raw payload instead of being
+    dropped. Each failure bumps `attempts` and pushes `next_attempt_at`
+    back exponentially; at `max_attempts` the release is quarantined and
+    only replayed on request. A successful ingest resolves the entry.
+
+    Writes go through the caller's session and commit with its batch.
+    """
+
+    def __init__(self, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 base_backoff: timedelta = timedelta(minutes=5), max_backoff: timedelta = timedelta(hours=12)):
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+    def backoff(self, attempts: int) -> timedelta:
+        return min(self.base_backoff * (2 ** max(attempts - 1, 0)), self.max_backoff)
+
+    def record(self, db: Session, failures: Iterable[Tuple[Dict, BaseException]], source: str,
+               notice_type: Optional[str] = None) -> int:
+        """
+        Upserts one entry per failed OCID, keeping the batch's `notice_type`
+        override for replay. Releases without an OCID can't be keyed and are only logged.
+        """
+        by_ocid = {}
+        for release, error in failures:
+            if release.get('ocid'):
+                by_ocid[release['ocid']] = (release, error)
+            else:
+                logger.error(f"Cannot dead-letter release {release.get('id')} without an ocid: {error}")
+        if not by_ocid:
+            return 0
+
+        existing = {
+            letter.ocid: letter
+            for letter in db.query(DeadLetterRelease).filter(DeadLetterRelease.ocid.in_(list(by_ocid)))
+        }
+        now = datetime.now(timezone.utc)
+        quarantined = 0
+        for ocid, (release, error) in by_ocid.items():
+            letter = existing.get(ocid)
+            if letter is None:
+                letter = DeadLetterRelease(ocid=ocid, source=source, attempts=0)
+                db.add(letter)
+            elif letter.status == "RESOLVED":
+                letter.attempts = 0  # A fresh failure after a fix starts a new count
+            letter.release = release
+            letter.notice_type = notice_type
+            letter.error_class = type(error).__name__
+            letter.error_message = str(error)[:MAX_ERROR_MESSAGE_LENGTH]
+            letter.attempts += 1
+            letter.last_failed_at = now
+            letter.resolved_at = None
+            if letter.attempts >= self.max_attempts:
+                letter.status = "QUARANTINED"
+                letter.next_attempt_at = None
+                quarantined += 1
+            else:
+                letter.status = "PENDING"
+                letter.next_attempt_at = now + self.backoff(letter.attempts)
+
+        logger.warning(f"Dead-lettered {len(by_ocid)} releases from {source} ({quarantined} quarantined).")
+        return len(by_ocid)
+
+    def resolve(self, db: Session, ocids: Iterable[str]) -> int:
+        """Marks entries for successfully ingested OCIDs as resolved (one UPDATE)."""
+        ocids = list(ocids)
+        if not ocids:
+            return 0
+        return db.query(DeadLetterRelease).filter(
+            DeadLetterRelease.ocid.in_(ocids),
+            DeadLetterRelease.status != "RESOLVED",
+        ).update({
+            DeadLetterRelease.status: "RESOLVED",
+            DeadLetterRelease.resolved_at: datetime.now(timezone.utc),
+            DeadLetterRelease.next_attempt_at: None,
+        }, synchronize_session=False)
+
+    def due(self, db: Session, error_class: Optional[str] = None, ocids: Optional[List[str]] = None,
+            include_quarantined: bool = False, ignore_backoff: bool = False,
+            limit: Optional[int] = None) -> List[str]:
+        """OCIDs ready to replay, oldest failure first."""
+        statuses = ["PENDING", "QUARANTINED"] if include_quarantined else ["PENDING"]
+        query = db.query(DeadLetterRelease.ocid).filter(DeadLetterRelease.status.in_(statuses))
+        if not ignore_backoff:
+            now = datetime.now(timezone.utc)
+            query = query.filter(
+                (DeadLetterRelease.next_attempt_at == None) | (DeadLetterRelease.next_attempt_at <= now)
+            )
+        if error_class:
+            query = query.filter(DeadLetterRelease.error_class == error_class)
+        if ocids:
+            query = query.filter(DeadLetterRelease.ocid.in_(ocids))
+        query = query.order_by(DeadLetterRelease.first_failed_at, DeadLetterRelease.ocid)
+        if limit:
+            query = query.limit(limit)
+        return [ocid for (ocid,) in query]
+
+    def next_due_at(self, db: Session) -> Optional[datetime]:
+        """When the earliest backed-off PENDING entry becomes due."""
+        letter = db.query(DeadLetterRelease.next_attempt_at).filter(
+            DeadLetterRelease.status == "PENDING",
+        ).order_by(DeadLetterRelease.next_attempt_at).first()
+        return letter.next_attempt_at if letter else None
@@ -1,8 +1,11 @@
 import logging
+from typing import List
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from app.models import Notice
 from app.services.ingestion.embeddings import EmbeddingService
 from app.services.matching.ukcat_tagger import tagger as ukcat_tagger
+from app.services.matching.ukcat_ruleset import expand_ukcat_codes
 
 logger = logging.getLogger(__name__)
 
@@ -32,25 +35,54 @@ class EnrichmentService:
                     logger.error(f"Failed to embed {notice.ocid}: {e}")
 
         # 2. UKCAT Tagging
-        if force or not notice.inferred_ukcat_codes:
-            text_to_tag = f"{notice.title} {notice.description or ''}"
-            tags = self.ukcat_tagger.tag_text(text_to_tag)
-            if tags:
-                logger.info(f"Generated UKCAT tags for {notice.ocid}: {tags}")
-                notice.inferred_ukcat_codes = tags
-                needs_update = True
+        if self._tag_notice(notice, force):
+            needs_update = True
 
         if needs_update:
             self.db.add(notice)
             self.db.commit()
-            
+
+    def _tag_notice(self, notice: Notice, force: bool = False) -> bool:
+        """UKCAT-tags a notice unless it was already tagged (even with no tags) by the current ruleset."""
+        ruleset_version = self.ukcat_tagger.version
+        if not (force or notice.ukcat_ruleset_version != ruleset_version):
+            return False
+
+        notice.ukcat_ruleset_version = ruleset_version
+        tags = self.ukcat_tagger.tag_notice(notice.title, notice.description)
+        if tags:
+            logger.info(f"Generated UKCAT tags for {notice.ocid}: {tags}")
+        # No tags under this ruleset clears any an older one left behind
+        notice.inferred_ukcat_codes = tags or None
+        notice.ukcat_prefix_ids = expand_ukcat_codes(tags) or None
+        return True
+
+    def enrich_batch(self, notices: List[Notice]):
+        """
+        Enriches a batch of (usually transient) notices in place with one
+        embeddings call. Does not touch the session - the caller persists.
+        """
+        to_embed = [n for n in notices if not n.embedding and n.description]
+        if to_embed:
+            try:
+                logger.info(f"Generating embeddings for {len(to_embed)} notices")
+                vectors = self.embeddings.get_embeddings_batch([n.description for n in to_embed])
+                for notice, vector in zip(to_embed, vectors):
+                    notice.embedding = vector
+            except Exception as e:
+                logger.error(f"Failed to embed batch of {len(to_embed)} notices: {e}")
+
+        for notice in notices:
+            self._tag_notice(notice)
+
     def bulk_enrich_stale(self, limit: int = 100):
         """
-        Finds notices without embeddings/tags and enriches them.
+        Finds notices without embeddings, or tagged by an older UKCAT ruleset, and enriches them.
         """
-        stale_notices = self.db.query(Notice).filter(
-            (Notice.embedding == None) | (Notice.inferred_ukcat_codes == None)
-        ).limit(limit).all()
+        version = Notice.ukcat_ruleset_version
+        stale_notices = self.db.query(Notice).filter(or_(
+            Notice.embedding == None, version == None, version != self.ukcat_tagger.version,
+        )).limit(limit).all()
         
         logger.info(f"Found {len(stale_notices)} stale notices for enrichment.")
         for notice in stale_notices:
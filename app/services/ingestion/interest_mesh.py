@@ -0,0 +1,170 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, Optional, Pattern, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models import ServiceProfile
+from app.services.ingestion.ocds import decode_release, release_regions
+
+logger = logging.getLogger(__name__)
+
+NATIONAL_REGIONS = {"national", "united kingdom", "uk"}
+MIN_KEYWORD_LENGTH = 5
+# A mission word used by more than this share of profiles says nothing about any one of them
+MAX_KEYWORD_PROFILE_SHARE = 0.5
+# How often a running process re-checks the profile version
+DEFAULT_REFRESH_SECONDS = 60.0
+
+_WORD = re.compile(r"[a-z][a-z\-]+")
+_STOPWORDS = {
+    "about", "across", "their", "there", "these", "those", "which", "where", "while", "within", "through",
+    "other", "people", "support", "supports", "supporting", "services", "service", "provide", "provides",
+    "providing", "charity", "charities", "community", "communities", "local", "including", "working",
+    "help", "helps", "helping", "around", "being", "every", "after", "under", "whose", "would", "could",
+}
+
+
+def _profile_regions(service_regions) -> List[str]:
+    # Same shapes MatchingEngine accepts: {"regions": [...]} or a plain list
+    if isinstance(service_regions, dict):
+        return service_regions.get("regions", [])
+    return service_regions or []
+
+
+class MeshSnapshot:
+    """One immutable build of the mesh; swapped whole on refresh so readers never see a half-built one."""
+    __slots__ = ("version", "cpv_prefixes", "keywords", "keyword_pattern", "regions", "national")
+
+    def __init__(self, version: Tuple, cpv_prefixes: FrozenSet[str], keywords: FrozenSet[str],
+                 regions: FrozenSet[str], national: bool):
+        self.version = version
+        self.cpv_prefixes = cpv_prefixes
+        self.keywords = keywords
+        self.keyword_pattern: Optional[Pattern] = (
+            re.compile(r"\b(?:" + "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)) + r")\b")
+            if keywords else None
+        )
+        self.regions = regions
+        self.national = national
+
+
+class InterestMesh:
+    """
+    The Global Interest Mesh: what any charity profile could care about.
+    Ingestion uses it to decide which notices are worth paying to embed.
+
+    Holds the union of profile CPV prefixes, a compiled keyword matcher
+    over profile missions/services, and profile service regions. It is
+    versioned by (max ServiceProfile.updated_at, profile count) and checked
+    at most every `refresh_seconds`; a rebuild happens only when that moves.
+    """
+
+    def __init__(self, refresh_seconds: float = DEFAULT_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._snapshot: Optional[MeshSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def snapshot(self) -> Optional[MeshSnapshot]:
+        return self._snapshot
+
+    @staticmethod
+    def current_version(db: Session) -> Tuple:
+        updated_at, count = db.query(func.max(ServiceProfile.updated_at), func.count(ServiceProfile.org_id)).one()
+        return (updated_at, count)
+
+    def refresh(self, db: Session, force: bool = False) -> MeshSnapshot:
+        """Returns the current snapshot, rebuilding it if profiles changed since it was built."""
+        now = time.monotonic()
+        if not force and self._snapshot is not None and now - self._checked_at < self.refresh_seconds:
+            return self._snapshot
+        with self._lock:
+            if not force and self._snapshot is not None and now - self._checked_at < self.refresh_seconds:
+                return self._snapshot
+            version = self.current_version(db)
+            if force or self._snapshot is None or self._snapshot.version != version:
+                self._snapshot = self._build(db, version)
+            self._checked_at = now
+        return self._snapshot
+
+    @staticmethod
+    def _keywords(texts: List[str]) -> FrozenSet[str]:
+        document_frequency = Counter()
+        for text in texts:
+            document_frequency.update({
+                w for w in _WORD.findall(text.lower()) if len(w) >= MIN_KEYWORD_LENGTH and w not in _STOPWORDS
+            })
+        if len(texts) < 4:  # Too few profiles for frequency to mean anything
+            return frozenset(document_frequency)
+        limit = MAX_KEYWORD_PROFILE_SHARE * len(texts)
+        return frozenset(w for w, n in document_frequency.items() if n <= limit)
+
+    def _build(self, db: Session, version: Tuple) -> MeshSnapshot:
+        rows = db.query(
+            ServiceProfile.inferred_cpv_codes, ServiceProfile.mission, ServiceProfile.programs_services,
+            ServiceProfile.service_regions,
+        ).all()
+
+        cpv_prefixes = set()
+        texts = []
+        regions = set()
+        for cpv_codes, mission, programs_services, service_regions in rows:
+            cpv_prefixes.update(c[:4] for c in cpv_codes or [])
+            text = " ".join(t for t in (mission, programs_services) if t)
+            if text:
+                texts.append(text)
+            regions.update(r.lower() for r in _profile_regions(service_regions))
+
+        snapshot = MeshSnapshot(
+            version=version,
+            cpv_prefixes=frozenset(cpv_prefixes),
+            keywords=self._keywords(texts),
+            regions=frozenset(regions - NATIONAL_REGIONS),
+            national=bool(regions & NATIONAL_REGIONS) or not regions,
+        )
+        logger.info(
+            f"Global Interest Mesh built with {len(snapshot.cpv_prefixes)} CPV prefixes, "
+            f"{len(snapshot.keywords)} keywords, {len(snapshot.regions)} regions (profiles version {version[0]})."
+        )
+        return snapshot
+
+    def matches(self, db: Session, cpv_codes: Optional[Iterable[str]], text: str = "",
+                regions: Optional[Iterable[str]] = None) -> bool:
+        """
+        CPV prefix overlap, else a mission keyword in the text; a notice with
+        no CPV codes is neutral (kept). A notice delivered only in regions no
+        profile serves is dropped unless some profile is national.
+        """
+        mesh = self.refresh(db)
+
+        if regions and not mesh.national:
+            if not {r.lower() for r in regions} & mesh.regions:
+                return False
+
+        cpv_codes = list(cpv_codes or [])
+        if not cpv_codes:
+            return True  # Neutral fallback
+        if {c[:4] for c in cpv_codes} & mesh.cpv_prefixes:
+            return True
+        return bool(text and mesh.keyword_pattern and mesh.keyword_pattern.search(text.lower()))
+
+    def matches_notice(self, db: Session, notice, release: Optional[Dict] = None) -> bool:
+        """Mesh check for a Notice; regions come from `release` when given."""
+        return self.matches(
+            db, notice.cpv_codes, f"{notice.title or ''} {notice.description or ''}",
+            release_regions(release) if release else None,
+        )
+
+    def matches_release(self, db: Session, release: Dict) -> bool:
+        tender = decode_release(release).tender
+        return self.matches(
+            db, tender.cpv_codes, f"{tender.title or ''} {tender.description or ''}", release_regions(release)
+        )
+
+
+# Shared by every ingestion path in the process
+interest_mesh = InterestMesh()
@@ -0,0 +1,209 @@
+import hashlib
+import math
+import random
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session, aliased
+from app.models import Notice, NoticeLSHBand
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS  # 16 x 4: buckets collide from ~50% similarity
+SHINGLE_SIZE = 3
+DUPLICATE_THRESHOLD = 0.8  # Estimated Jaccard needed to join a cluster
+# Copies of one notice are published within days; the same text years apart is a re-tender
+CLUSTER_WINDOW = timedelta(days=90)
+AWARD_NOTICE_TYPES = {"award", "awardUpdate", "contractAward", "contract", "contractUpdate", "implementation"}
+PLANNING_NOTICE_TYPES = {"planning", "planningUpdate"}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 61) - 1
+_rng = random.Random(0x6D696E68)  # Fixed seed: signatures must be stable across processes and releases
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _shingle_hashes(text: str) -> set:
+    tokens = _TOKEN.findall(text.lower())
+    if not tokens:
+        return set()
+    size = min(SHINGLE_SIZE, len(tokens))
+    return {
+        int.from_bytes(hashlib.blake2b(" ".join(tokens[i:i + size]).encode(), digest_size=8).digest(), "big")
+        for i in range(len(tokens) - size + 1)
+    }
+
+
+def minhash(text: str) -> Optional[List[int]]:
+    """NUM_PERM-value signature, or None for text with no tokens."""
+    hashes = _shingle_hashes(text)
+    if not hashes:
+        return None
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) & _MAX_HASH for a, b in _PERMUTATIONS]
+
+
+def notice_minhash(title: Optional[str], description: Optional[str]) -> Optional[List[int]]:
+    return minhash(f"{title or ''} {description or ''}")
+
+
+def estimated_similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    if not a or not b or len(a) != len(b):
+        return 0.0
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def notice_kind(notice_type: Optional[str]) -> str:
+    """Coarse notice kind: only notices of the same kind are ever clustered together."""
+    if notice_type == "historical":
+        return "historical"
+    if notice_type in AWARD_NOTICE_TYPES:
+        return "award"
+    if notice_type in PLANNING_NOTICE_TYPES:
+        return "planning"
+    return "tender"
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class _Candidate(NamedTuple):
+    ocid: str
+    cluster_id: Optional[str]
+    signature: List[int]
+    # (kind, publication date) of the candidate and of its cluster's canonical notice
+    members: Tuple[Tuple[str, Optional[datetime]], ...]
+
+
+def value_band(amount) -> Optional[int]:
+    """Half-decade bucket of the notice value (None when unknown)."""
+    try:
+        amount = float(amount)
+    except (TypeError, ValueError):
+        return None
+    if amount <= 0:
+        return None
+    return int(math.floor(math.log10(amount) * 2))
+
+
+def band_keys(signature: Sequence[int], buyer_id, amount, neighbours: bool = False) -> List[str]:
+    """
+    Bucket keys for a signature within its block. With `neighbours`, also the
+    keys for adjacent value bands, so a value just across a boundary still meets.
+    """
+    band = value_band(amount)
+    if band is None:
+        value_bands = ["na"]
+    elif neighbours:
+        value_bands = [str(band - 1), str(band), str(band + 1)]
+    else:
+        value_bands = [str(band)]
+    buckets = [
+        hashlib.blake2b(repr(tuple(signature[i * ROWS_PER_BAND:(i + 1) * ROWS_PER_BAND])).encode(), digest_size=8).hexdigest()
+        for i in range(BANDS)
+    ]
+    return [f"{buyer_id or '-'}:{vb}:{i}:{bucket}" for vb in value_bands for i, bucket in enumerate(buckets)]
+
+
+class NearDuplicateDetector:
+    """
+    Near-duplicate clustering for notices: the same tender arriving from FTS
+    and Contracts Finder, or re-published under a new OCID.
+
+    Each notice gets a MinHash signature over word shingles of its title +
+    description. The signature is cut into LSH bands whose bucket keys also
+    carry a block (buyer + half-decade value band), so only notices from the
+    same buyer at a similar value are ever compared. A bucket collision joins
+    the candidate's cluster only if the estimated Jaccard similarity clears
+    the threshold and both the candidate and its cluster's canonical notice
+    are of the same kind (tender / award / planning / historical) and were
+    published within CLUSTER_WINDOW - a re-tender copying a years-old
+    notice's text must stay a live notice of its own. A cluster is named
+    after the ocid of its first-seen notice; matching, alerts and deep
+    review work on that notice only.
+    """
+
+    def __init__(self, threshold: float = DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+
+    def _candidates(self, db: Session, keys: List[str]) -> Dict[str, List[_Candidate]]:
+        """band_key -> candidates for stored notices (with their canonical notice), in one query."""
+        by_key: Dict[str, List[_Candidate]] = {}
+        if not keys:
+            return by_key
+        canonical = aliased(Notice)
+        rows = db.query(
+            NoticeLSHBand.band_key, Notice.ocid, Notice.cluster_id, Notice.minhash,
+            Notice.notice_type, Notice.publication_date, canonical.notice_type, canonical.publication_date,
+        ).join(Notice, Notice.ocid == NoticeLSHBand.ocid).outerjoin(
+            canonical, canonical.ocid == func.coalesce(Notice.cluster_id, Notice.ocid)
+        ).filter(NoticeLSHBand.band_key.in_(keys))
+        for key, ocid, cluster_id, signature, notice_type, published, canonical_type, canonical_published in rows:
+            members = ((notice_kind(notice_type), _utc(published)),)
+            if canonical_type is not None or canonical_published is not None:
+                members += ((notice_kind(canonical_type), _utc(canonical_published)),)
+            by_key.setdefault(key, []).append(_Candidate(ocid, cluster_id, signature, members))
+        return by_key
+
+    @staticmethod
+    def _compatible(kind: str, published: Optional[datetime], candidate: _Candidate) -> bool:
+        if published is None:
+            return False
+        return all(
+            member_kind == kind and member_date is not None and abs(member_date - published) <= CLUSTER_WINDOW
+            for member_kind, member_date in candidate.members
+        )
+
+    def assign(self, db: Session, notices: Iterable[Notice],
+               known_clusters: Optional[Dict[str, Optional[str]]] = None) -> List[Dict]:
+        """
+        Sets `minhash` on every notice and `cluster_id` on each one: the cluster
+        it already had (`known_clusters`, for notices being updated), else the
+        best stored or in-batch match above the threshold, else its own ocid.
+        Returns the notice_lsh_band rows to store for the batch.
+        """
+        known_clusters = known_clusters or {}
+        notices = list(notices)
+        for notice in notices:
+            notice.minhash = notice_minhash(notice.title, notice.description)
+
+        # One lookup for every new notice's buckets (own and neighbouring value bands)
+        lookup = {
+            n.ocid: band_keys(n.minhash, n.buyer_id, n.value_amount, neighbours=True)
+            for n in notices if n.minhash and n.ocid not in known_clusters
+        }
+        stored = self._candidates(db, sorted({k for keys in lookup.values() for k in keys}))
+
+        band_rows = []
+        in_batch: Dict[str, List[_Candidate]] = {}
+        for notice in notices:
+            kind, published = notice_kind(notice.notice_type), _utc(notice.publication_date)
+            members = ((kind, published),)
+            if notice.ocid in known_clusters:
+                notice.cluster_id = known_clusters[notice.ocid] or notice.ocid
+            elif notice.minhash:
+                best, best_score = None, self.threshold
+                for key in lookup[notice.ocid]:
+                    for candidate in stored.get(key, []) + in_batch.get(key, []):
+                        if candidate.ocid == notice.ocid or not self._compatible(kind, published, candidate):
+                            continue
+                        score = estimated_similarity(notice.minhash, candidate.signature)
+                        if score >= best_score:
+                            best, best_score = candidate, score
+                if best is not None:
+                    notice.cluster_id = best.cluster_id or best.ocid
+                    members += best.members[-1:]  # The cluster's canonical notice
+                else:
+                    notice.cluster_id = notice.ocid
+            else:
+                notice.cluster_id = notice.ocid
+
+            if notice.minhash:
+                for key in band_keys(notice.minhash, notice.buyer_id, notice.value_amount):
+                    band_rows.append({"band_key": key, "ocid": notice.ocid})
+                    in_batch.setdefault(key, []).append(_Candidate(notice.ocid, notice.cluster_id, notice.minhash, members))
+        return band_rows
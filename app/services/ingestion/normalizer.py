@@ -1,8 +1,21 @@
+import hashlib
+import json
 from datetime import datetime
 from typing import Dict, Optional, Tuple
 from app.models import Notice, Buyer
+from app.services.ingestion.ocds import Period, Release, Value, decode_release, release_regions
 from sqlalchemy.orm import Session
 
+# Release envelope fields that change on every re-publication without the
+# notice itself changing.
+VOLATILE_RELEASE_FIELDS = ('id', 'date')
+
+def release_content_hash(release: Dict) -> str:
+    """Stable sha256 of a release's content (key order and envelope fields ignored)."""
+    content = {k: v for k, v in release.items() if k not in VOLATILE_RELEASE_FIELDS}
+    canonical = json.dumps(content, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
 class Normalizer:
     
     def normalize_buyer(self, buyer_data: Dict) -> Dict:
@@ -24,81 +37,35 @@ class Normalizer:
         """
         Maps a raw OCDS release to a Notice model instance.
         """
-        tender = release.get('tender', {})
-        
-        # Parse Dates
-        pub_date_str = release.get('date')
-        pub_date = datetime.fromisoformat(pub_date_str.replace('Z', '+00:00')) if pub_date_str else datetime.utcnow()
-        
-        period = tender.get('tenderPeriod', {})
-        end_date_str = period.get('endDate')
-        deadline_date = None
-        if end_date_str:
-            try:
-                deadline_date = datetime.fromisoformat(end_date_str.replace('Z', '+00:00'))
-            except ValueError:
-                pass
-
-        # Extract Value
-        value_data = tender.get('value', {})
-        amount = value_data.get('amount')
-        currency = value_data.get('currency', 'GBP')
+        return Notice(buyer_id=buyer_id, raw_json=release, updated_at=datetime.utcnow(), **self.release_to_row(release))
 
-        # Extract Contract Period (PRD 05)
-        contract_start = None
-        contract_end = None
-        
-        # Check tenderPeriod or contractPeriod in tender
-        cp = tender.get('contractPeriod', {})
-        if not cp: # fallback to awards
-            awards = release.get('awards', [])
-            if awards: cp = awards[0].get('contractPeriod', {})
-            
-        if cp.get('startDate'):
-            try: contract_start = datetime.fromisoformat(cp.get('startDate').replace('Z', '+00:00'))
-            except: pass
-        if cp.get('endDate'):
-            try: contract_end = datetime.fromisoformat(cp.get('endDate').replace('Z', '+00:00'))
-            except: pass
-
-        # Extract CPVs (Enhanced for Contracts Finder + FTS)
-        cpv_codes = []
-        
-        # 1. Standard OCDS / FTS Path (Items)
-        items = tender.get('items', [])
-        for item in items:
-            cid = item.get('classification', {}).get('id')
-            if cid and cid not in cpv_codes:
-                cpv_codes.append(cid)
-                
-        # 2. Contracts Finder Path (Top-level Classification)
-        main_class = tender.get('classification', {}).get('id')
-        if main_class and main_class not in cpv_codes:
-            cpv_codes.append(main_class)
-            
-        additional = tender.get('additionalClassifications', [])
-        for ac in additional:
-            aid = ac.get('id')
-            if aid and aid not in cpv_codes:
-                cpv_codes.append(aid)
+    def release_to_row(self, release: Dict, decoded: Optional[Release] = None) -> Dict:
+        """
+        Notice column values for a raw OCDS release (everything except buyer_id,
+        raw_json and updated_at). Plain dict, so bulk paths can skip the ORM.
+        Pass `decoded` if the caller has already decoded the release.
+        """
+        decoded = decoded or decode_release(release)
+        tender = decoded.tender
+        value = tender.value or Value()
+        contract_period = decoded.contract_period or Period()
 
-        # Create Notice
-        return Notice(
-            ocid=release.get('ocid'),
-            release_id=release.get('id'),
-            title=tender.get('title', 'Untitled Notice'),
-            description=tender.get('description', ''),
-            buyer_id=buyer_id,
-            publication_date=pub_date,
-            deadline_date=deadline_date,
-            value_amount=amount,
-            value_currency=currency,
-            procurement_method=tender.get('procurementMethod'),
-            notice_type=release.get('tag', ['contractNotice'])[0], # Default to first tag
-            raw_json=release,
-            source_url=tender.get('documents', [{}])[0].get('url'), # Approximate
-            cpv_codes=cpv_codes,
-            contract_period_start=contract_start,
-            contract_period_end=contract_end,
-            updated_at=datetime.utcnow()
+        return dict(
+            ocid=decoded.ocid,
+            release_id=decoded.id,
+            title=tender.title,
+            description=tender.description,
+            publication_date=decoded.date or datetime.utcnow(),
+            deadline_date=tender.tender_period.end if tender.tender_period else None,
+            value_amount=value.amount,
+            value_currency=value.currency,
+            procurement_method=tender.procurement_method,
+            main_procurement_category=tender.main_procurement_category,
+            notice_type=decoded.notice_type,
+            content_hash=release_content_hash(release),
+            source_url=tender.document_url,
+            cpv_codes=tender.cpv_codes,
+            delivery_regions=release_regions(release) or None,
+            contract_period_start=contract_period.start,
+            contract_period_end=contract_period.end,
         )
@@ -0,0 +1,169 @@
+"""
+Typed decoding of OCDS releases.
+
+Every ingestion path (live FTS, Contracts Finder backfills, OCDS dumps, the
+bulk loader) used to walk the raw release dict with its own `.get` chains
+and re-parse the same ISO dates. `decode_release` reads only the fields we
+use, once, into small `__slots__` classes; date strings go through an LRU
+cache because FTS dumps repeat the same timestamps (deadlines, period
+boundaries) across thousands of releases.
+"""
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+
+@lru_cache(maxsize=65536)
+def parse_ocds_datetime(value: Optional[str]) -> Optional[datetime]:
+    """ISO 8601 date/datetime as published in OCDS ('Z' suffix allowed); None if missing or invalid."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return None
+
+
+class Period:
+    __slots__ = ('start', 'end')
+
+    def __init__(self, start: Optional[datetime] = None, end: Optional[datetime] = None):
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> Optional['Period']:
+        if not data:
+            return None
+        return cls(parse_ocds_datetime(data.get('startDate')), parse_ocds_datetime(data.get('endDate')))
+
+
+class Value:
+    __slots__ = ('amount', 'currency')
+
+    def __init__(self, amount=None, currency: str = 'GBP'):
+        self.amount = amount
+        self.currency = currency
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> Optional['Value']:
+        if not data:
+            return None
+        return cls(data.get('amount'), data.get('currency', 'GBP'))
+
+
+class Award:
+    __slots__ = ('id', 'status', 'date', 'contract_period', 'value', 'suppliers')
+
+    def __init__(self, id: Optional[str], status: Optional[str], date: Optional[datetime],
+                 contract_period: Optional[Period], value: Optional[Value], suppliers: List[Dict]):
+        self.id = id
+        self.status = status
+        self.date = date
+        self.contract_period = contract_period
+        self.value = value
+        self.suppliers = suppliers  # Organisation references: {"id", "name"}
+
+    @property
+    def supplier_names(self) -> List[str]:
+        return [s['name'] for s in self.suppliers if s.get('name')]
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Award':
+        return cls(
+            str(data['id']) if data.get('id') is not None else None,
+            data.get('status'),
+            parse_ocds_datetime(data.get('date')),
+            Period.from_dict(data.get('contractPeriod')),
+            Value.from_dict(data.get('value')),
+            [s for s in data.get('suppliers') or [] if isinstance(s, dict)],
+        )
+
+
+class Tender:
+    __slots__ = ('title', 'description', 'procurement_method', 'main_procurement_category',
+                 'tender_period', 'contract_period', 'value', 'cpv_codes', 'document_url')
+
+    def __init__(self, data: Dict):
+        self.title = data.get('title', 'Untitled Notice')
+        self.description = data.get('description', '')
+        self.procurement_method = data.get('procurementMethod')
+        self.main_procurement_category = (data.get('mainProcurementCategory') or '').lower() or None
+        self.tender_period = Period.from_dict(data.get('tenderPeriod'))
+        self.contract_period = Period.from_dict(data.get('contractPeriod'))
+        self.value = Value.from_dict(data.get('value'))
+        self.cpv_codes = self._cpv_codes(data)
+        documents = data.get('documents')
+        self.document_url = documents[0].get('url') if documents else None  # Approximate
+
+    @staticmethod
+    def _cpv_codes(data: Dict) -> List[str]:
+        """Item classifications (OCDS / FTS), then the top-level and additional ones (Contracts Finder)."""
+        codes = []
+        for item in data.get('items') or []:
+            code = (item.get('classification') or {}).get('id')
+            if code and code not in codes:
+                codes.append(code)
+        code = (data.get('classification') or {}).get('id')
+        if code and code not in codes:
+            codes.append(code)
+        for ac in data.get('additionalClassifications') or []:
+            code = ac.get('id')
+            if code and code not in codes:
+                codes.append(code)
+        return codes
+
+
+class Release:
+    __slots__ = ('ocid', 'id', 'date', 'tags', 'tender', 'awards')
+
+    def __init__(self, data: Dict):
+        self.ocid = data.get('ocid')
+        self.id = data.get('id')
+        self.date = parse_ocds_datetime(data.get('date'))
+        self.tags = data.get('tag') or []
+        self.tender = Tender(data.get('tender') or {})
+        self.awards = [Award.from_dict(a) for a in data.get('awards') or []]
+
+    @property
+    def notice_type(self) -> str:
+        return self.tags[0] if self.tags else 'contractNotice'
+
+    @property
+    def contract_period(self) -> Optional[Period]:
+        """The tender's contract period, else the first award's (PRD 05)."""
+        if self.tender.contract_period:
+            return self.tender.contract_period
+        return self.awards[0].contract_period if self.awards else None
+
+    @property
+    def award_value(self) -> Optional[Value]:
+        return self.awards[0].value if self.awards else None
+
+    @property
+    def incumbent(self) -> Optional[str]:
+        """First supplier on the first award."""
+        if self.awards and self.awards[0].supplier_names:
+            return self.awards[0].supplier_names[0]
+        return None
+
+
+def release_regions(release: Dict) -> List[str]:
+    """Delivery regions from tender items, else the buyer's address region (as the matching engine reads them)."""
+    regions = [
+        a.get("region").lower()
+        for item in (release.get("tender") or {}).get("items") or []
+        for a in item.get("deliveryAddresses") or []
+        if a.get("region")
+    ]
+    if not regions:
+        regions = [
+            p["address"]["region"].lower()
+            for p in release.get("parties") or []
+            if "buyer" in (p.get("roles") or []) and (p.get("address") or {}).get("region")
+        ]
+    return regions
+
+
+def decode_release(release: Dict) -> Release:
+    return Release(release)
@@ -0,0 +1,173 @@
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+from app.models import BuyerCategoryHistory
+from app.services.ingestion.near_duplicates import AWARD_NOTICE_TYPES
+from app.services.ingestion.ocds import decode_release, parse_ocds_datetime
+
+logger = logging.getLogger(__name__)
+
+# Notices that record an award: live OCDS award tags, plus the bulk loader's 'historical' dumps
+HISTORY_NOTICE_TYPES = ('historical',) + tuple(sorted(AWARD_NOTICE_TYPES))
+# Key for notices without CPV codes: they count towards every category of their buyer
+UNCLASSIFIED_PREFIX = ""
+# Written by rebuild(); updated_at keeps its server default
+REBUILD_COLUMNS = ("buyer_id", "cpv_prefix", "award_count", "awards", "last_awarded_at", "incumbent",
+                   "suppliers", "estimated_cycle_years")
+
+# (ocid, published, supplier names) for one award notice
+AwardEntry = Tuple[str, datetime, List[str]]
+
+
+def estimate_cycle_years(dates: List[datetime]) -> Optional[int]:
+    """
+    Mean gap (in years) between consecutive awards, ignoring gaps outside
+    the usual 1-6 year procurement cycles. None below two awards.
+    """
+    gaps = []
+    for previous, current in zip(dates, dates[1:]):
+        gap = (current - previous).days / 365.25
+        if 0.5 < gap < 6.5:
+            gaps.append(round(gap))
+    if not gaps:
+        return None
+    return int(sum(gaps) / len(gaps))
+
+
+def _naive_utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def _as_uuid(buyer_id) -> uuid.UUID:
+    return buyer_id if isinstance(buyer_id, uuid.UUID) else uuid.UUID(str(buyer_id))
+
+
+def notice_prefixes(cpv_codes: Optional[Iterable[str]]) -> List[str]:
+    prefixes = sorted({c[:4] for c in cpv_codes or [] if c})
+    return prefixes or [UNCLASSIFIED_PREFIX]
+
+
+class BuyerHistoryIndex:
+    """
+    Maintains buyer_category_history: award count, dated award list, incumbent,
+    distinct suppliers and estimated cycle per (buyer, CPV prefix).
+
+    `record` folds newly ingested award notices into their rows (one IN
+    query to load them, writes ride the caller's commit); `rebuild` recomputes
+    the table from every stored award notice. Both merge with `_apply`, so an
+    incremental update and a rebuild agree. A notice already counted in a
+    row is not counted again when it is re-ingested.
+    """
+
+    @staticmethod
+    def _apply(row: BuyerCategoryHistory, entries: List[AwardEntry]):
+        """Folds award entries, oldest first, into a row."""
+        awards = list(row.awards or [])
+        seen = {a["ocid"] for a in awards}
+        suppliers = list(row.suppliers or [])
+        last = _naive_utc(row.last_awarded_at) if row.last_awarded_at else None
+        for ocid, published, names in entries:
+            if ocid in seen:
+                continue
+            seen.add(ocid)
+            awards.append({"ocid": ocid, "date": published.isoformat()})
+            if last is None or published >= last:
+                # Newest award: its suppliers lead the list and its first one holds the contract
+                suppliers = names + [s for s in suppliers if s not in names]
+                if names:
+                    row.incumbent = names[0]
+                last = published
+            else:
+                suppliers += [s for s in names if s not in suppliers]
+                if row.incumbent is None and names:
+                    row.incumbent = names[0]
+
+        awards.sort(key=lambda a: a["date"])
+        row.awards = awards
+        row.award_count = len(awards)
+        row.suppliers = suppliers
+        row.last_awarded_at = last
+        row.estimated_cycle_years = estimate_cycle_years([parse_ocds_datetime(a["date"]) for a in awards])
+
+    @staticmethod
+    def _entries(notices) -> Dict[Tuple[uuid.UUID, str], List[AwardEntry]]:
+        by_key: Dict[Tuple[uuid.UUID, str], List[AwardEntry]] = {}
+        for notice in notices:
+            if notice.notice_type not in HISTORY_NOTICE_TYPES or not notice.buyer_id or not notice.publication_date:
+                continue
+            release = notice.raw_json or {}
+            names = []
+            for award in decode_release(release).awards:
+                names += [n for n in award.supplier_names if n not in names]
+            published = _naive_utc(notice.publication_date)
+            for prefix in notice_prefixes(notice.cpv_codes):
+                by_key.setdefault((_as_uuid(notice.buyer_id), prefix), []).append((notice.ocid, published, names))
+        for entries in by_key.values():
+            entries.sort(key=lambda e: e[1])
+        return by_key
+
+    def record(self, db: Session, notices: Iterable) -> int:
+        """Folds ingested award notices into their history rows. Returns the rows touched."""
+        by_key = self._entries(notices)
+        if not by_key:
+            return 0
+        existing = {
+            (row.buyer_id, row.cpv_prefix): row
+            for row in db.query(BuyerCategoryHistory).filter(
+                BuyerCategoryHistory.buyer_id.in_(list({buyer_id for buyer_id, _ in by_key})),
+                BuyerCategoryHistory.cpv_prefix.in_(list({prefix for _, prefix in by_key})),
+            )
+        }
+        for (buyer_id, prefix), entries in by_key.items():
+            row = existing.get((buyer_id, prefix))
+            if row is None:
+                row = BuyerCategoryHistory(buyer_id=buyer_id, cpv_prefix=prefix, award_count=0)
+                db.add(row)
+            self._apply(row, entries)
+        db.flush()  # The next batch's IN query must see new rows before the caller commits
+        return len(by_key)
+
+    def rebuild(self, db: Session, notices: Iterable) -> int:
+        """
+        Replaces the whole table with history computed from `notices` (every
+        stored award notice, with raw releases). Commits once at the end.
+        """
+        pending: Dict[Tuple[uuid.UUID, str], List[AwardEntry]] = {}
+        for notice in notices:
+            for key, entries in self._entries([notice]).items():
+                pending.setdefault(key, []).extend(entries)
+
+        rows = []
+        for (buyer_id, prefix), entries in pending.items():
+            entries.sort(key=lambda e: e[1])
+            row = BuyerCategoryHistory(buyer_id=buyer_id, cpv_prefix=prefix, award_count=0)
+            self._apply(row, entries)
+            rows.append(row)
+
+        # Core statements: rows loaded earlier in `db` must not clash with the new ones in its identity map
+        table = BuyerCategoryHistory.__table__
+        db.execute(delete(table))
+        if rows:
+            db.execute(insert(table), [{c: getattr(row, c) for c in REBUILD_COLUMNS} for row in rows])
+        db.commit()
+        db.expire_all()
+        logger.info(f"Rebuilt buyer_category_history: {len(rows)} buyer/category rows.")
+        return len(rows)
+
+    @staticmethod
+    def lookup(db: Session, buyer_id, cpv_prefixes: Optional[Iterable[str]] = None) -> List[BuyerCategoryHistory]:
+        """
+        History rows for a buyer in the given categories (plus its unclassified
+        awards), or across all its categories when none are given.
+        """
+        query = db.query(BuyerCategoryHistory).filter(BuyerCategoryHistory.buyer_id == _as_uuid(buyer_id))
+        prefixes = set(cpv_prefixes or [])
+        if prefixes:
+            query = query.filter(BuyerCategoryHistory.cpv_prefix.in_(prefixes | {UNCLASSIFIED_PREFIX}))
+        return query.all()
+
+
+buyer_history = BuyerHistoryIndex()
@@ -1,10 +1,12 @@
 import logging
 from decimal import Decimal
 from sqlalchemy import select, and_, func, or_, text, cast, Numeric
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from app.models import Notice, ServiceProfile, NoticeMatch
 from .ukcat_tagger import tagger
+from .ukcat_ruleset import ukcat_prefix_id, expand_ukcat_codes
 from .renewal_enrichment import RenewalEnrichmentService
+from .feed import feed_index
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +41,13 @@ class MatchingEngine:
         "The Prevention Or Relief Of Poverty": "BE"
     }
 
+    # Resolved once: theme -> UKCAT prefix id, and back for recommendation text
+    THEME_PREFIX_IDS = {theme: ukcat_prefix_id(prefix) for theme, prefix in THEME_MAPPING.items()}
+    PREFIX_BY_ID = {ukcat_prefix_id(prefix): prefix for prefix in THEME_MAPPING.values()}
+
+    # Notices (plus their raw releases) held in memory at once during Stages 2-7
+    CANDIDATE_CHUNK_SIZE = 500
+
     def __init__(self, db: Session):
         self.db = db
         self.radar_service = RenewalEnrichmentService(db)
@@ -77,15 +86,18 @@ class MatchingEngine:
         # STAGE 1: SQL PRE-FILTER (Fast SQL Gates)
         # ═══════════════════════════════════════════
         
-        # Stage 1: Active, Services Only, Not Archived
+        # Stage 1: Active, Services Only, Not Archived, one notice per near-duplicate cluster
         # Using or_ for is_archived to handle NULLs in existing data
+        # (and for cluster_id: notices not yet clustered stand alone)
+        # Raw releases (needed for lots/suitability/regions) come in alongside
+        # each chunk, so only CANDIDATE_CHUNK_SIZE of them are held at a time.
         query = self.db.query(Notice).filter(
             or_(Notice.is_archived == False, Notice.is_archived == None),
-            func.lower(Notice.raw_json['tender']['mainProcurementCategory'].astext) == 'services'
-        )
+            Notice.main_procurement_category == 'services',
+            or_(Notice.cluster_id == None, Notice.cluster_id == Notice.ocid)
+        ).options(selectinload(Notice.raw))
 
-        candidates = query.all()
-        logger.info(f"  Stage 1 (SQL): Found {len(candidates)} active service candidates for {profile.name}")
+        candidates = query.yield_per(self.CANDIDATE_CHUNK_SIZE)
 
         # ═══════════════════════════════════════════
         # STAGE 2-6: PYTHON STRUCTURED GATES
@@ -96,12 +108,10 @@ class MatchingEngine:
         charity_cpv_prefixes = set(c[:4] for c in (profile.inferred_cpv_codes or []))
         exclusion_kws = [kw.lower() for kw in (profile.exclusion_keywords or [])]
         
-        # Translate human-readable themes to UKCAT prefixes
-        charity_ukcat_codes = set()
-        for theme in (profile.ukcat_codes or []):
-            prefix = self.THEME_MAPPING.get(theme)
-            if prefix:
-                charity_ukcat_codes.add(prefix)
+        # Translate human-readable themes to UKCAT prefix ids
+        charity_theme_ids = {
+            self.THEME_PREFIX_IDS[theme] for theme in (profile.ukcat_codes or []) if theme in self.THEME_PREFIX_IDS
+        }
         
         charity_income = profile.latest_income or 0
 
@@ -112,8 +122,10 @@ class MatchingEngine:
         dropped_geo = 0
         dropped_cpv = 0
         dropped_exclusion = 0
+        candidate_count = 0
 
         for notice in candidates:
+            candidate_count += 1
             # --- Init Match Context ---
             viability_warning = None
             risk_flags = {}
@@ -231,13 +243,16 @@ class MatchingEngine:
             # ═══════════════════════════════════════════
             # STAGE 6: UKCAT THEME MATCH (Scoring)
             # ═══════════════════════════════════════════
-            notice_ukcat = set(notice.inferred_ukcat_codes or [])
-            # Check if any notice code starts with our charity theme prefixes
-            theme_matches = {p for p in charity_ukcat_codes if any(code.startswith(p) for code in notice_ukcat)}
-            score_theme = len(theme_matches) / len(charity_ukcat_codes) if charity_ukcat_codes else 0.5
+            # Notice ids already include every ancestor prefix, so this is one AND
+            notice_ukcat_ids = notice.ukcat_prefix_ids
+            if notice_ukcat_ids is None:
+                notice_ukcat_ids = expand_ukcat_codes(notice.inferred_ukcat_codes)
+            theme_matches = charity_theme_ids.intersection(notice_ukcat_ids)
+            score_theme = len(theme_matches) / len(charity_theme_ids) if charity_theme_ids else 0.5
             
             if theme_matches:
-                recommendation_reasons.append(f"Thematic overlap: {', '.join(list(theme_matches)[:3])}...")
+                matched_prefixes = [self.PREFIX_BY_ID[i] for i in theme_matches]
+                recommendation_reasons.append(f"Thematic overlap: {', '.join(matched_prefixes[:3])}...")
 
             # ═══════════════════════════════════════════
             # STAGE 7: FINAL SCORING & ENRICHMENT
@@ -306,6 +321,8 @@ class MatchingEngine:
             )
             matches_to_write.append(match_record)
 
+        logger.info(f"  Stage 1 (SQL): Found {candidate_count} active service candidates for {profile.name}")
+
         # Bulk Merge with preservation of enrichment metadata
         processed_ocids = {m.notice_id for m in matches_to_write}
         
@@ -333,7 +350,9 @@ class MatchingEngine:
         for ocid, em in existing_matches.items():
             if ocid not in processed_ocids and em.deep_verdict is None:
                 self.db.delete(em)
-        
+
+        # Re-rank the org's feed in the same transaction
+        feed_index.sync(self.db, org_id=profile.org_id)
         self.db.commit()
         
         log_msg = f"  {profile.name} Complete: {len(matches_to_write)} matches processed."
@@ -1,11 +1,128 @@
+import base64
 import logging
-from typing import List, Optional
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Iterable, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from app.models import NoticeMatch, Notice, Alert
+from sqlalchemy import and_, desc, func, insert, select, tuple_
+from app.models import FeedEntry, NoticeMatch, Notice, Alert
 
 logger = logging.getLogger(__name__)
 
+# Each unread alert on a match lifts it by this much, up to MAX_UNREAD_BOOSTED alerts
+UNREAD_ALERT_WEIGHT = 0.1
+MAX_UNREAD_BOOSTED = 3
+# Open deadlines within this many days lift a match by up to DEADLINE_WEIGHT (closest first)
+DEADLINE_HORIZON_DAYS = 30
+DEADLINE_WEIGHT = 0.2
+# Matches whose deadline has passed sink below every open one
+EXPIRED_PENALTY = 2
+
+
+def rank_score(score, unread_alerts: int, deadline: Optional[datetime], now: datetime) -> Decimal:
+    """Feed rank: match score, lifted by unread alerts and an approaching deadline."""
+    rank = float(score or 0) + UNREAD_ALERT_WEIGHT * min(unread_alerts, MAX_UNREAD_BOOSTED)
+    if deadline is not None:
+        if deadline.tzinfo is None:
+            deadline = deadline.replace(tzinfo=timezone.utc)
+        days_left = (deadline - now).total_seconds() / 86400
+        if days_left < 0:
+            rank -= EXPIRED_PENALTY
+        else:
+            rank += DEADLINE_WEIGHT * max(0.0, 1 - days_left / DEADLINE_HORIZON_DAYS)
+    return Decimal(str(round(rank, 4)))
+
+
+def encode_cursor(entry: FeedEntry) -> str:
+    key = f"{int(entry.is_tracked)}:{entry.rank_score}:{entry.notice_id}"
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[bool, Decimal, str]:
+    tracked, rank, notice_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":", 2)
+    return tracked == "1", Decimal(rank), notice_id
+
+
+class FeedIndex:
+    """
+    Keeps `feed_entry` in step with notice_match. Writers of matches, tracking
+    flags and alerts re-sync the (org, notice) pairs they touched; ranks decay
+    with deadlines, so `refresh` (app.workers.feed_refresh) re-ranks daily and
+    also picks up alerts raised by the set-based renewal/lifecycle jobs.
+    """
+
+    def sync(self, db: Session, org_id=None, notice_ids: Optional[Iterable[str]] = None,
+             now: Optional[datetime] = None) -> int:
+        """
+        Replaces the feed rows of the given org and/or notices (flushing the
+        caller's pending match changes first). Not committed. Returns rows written.
+        """
+        if org_id is None and notice_ids is None:
+            raise ValueError("sync needs an org_id or notice_ids; use refresh() for everything")
+        now = now or datetime.now(timezone.utc)
+        db.flush()
+
+        match_filter, feed_filter, alert_filter = [], [], [Alert.is_read == False]
+        if org_id is not None:
+            match_filter.append(NoticeMatch.org_id == org_id)
+            feed_filter.append(FeedEntry.org_id == org_id)
+            alert_filter.append(Alert.org_id == org_id)
+        if notice_ids is not None:
+            notice_ids = list(set(notice_ids))
+            if not notice_ids:
+                return 0
+            match_filter.append(NoticeMatch.notice_id.in_(notice_ids))
+            feed_filter.append(FeedEntry.notice_id.in_(notice_ids))
+            alert_filter.append(Alert.notice_id.in_(notice_ids))
+
+        unread = db.query(
+            Alert.org_id, Alert.notice_id, func.count().label("unread_alerts")
+        ).filter(*alert_filter).group_by(Alert.org_id, Alert.notice_id).subquery()
+        rows = db.query(
+            NoticeMatch.org_id, NoticeMatch.notice_id, NoticeMatch.is_tracked, NoticeMatch.score,
+            NoticeMatch.feedback_status, Notice.title, Notice.deadline_date, Notice.value_amount,
+            func.coalesce(unread.c.unread_alerts, 0),
+        ).join(Notice, NoticeMatch.notice_id == Notice.ocid).outerjoin(unread, and_(
+            unread.c.org_id == NoticeMatch.org_id, unread.c.notice_id == NoticeMatch.notice_id,
+        )).filter(*match_filter).all()
+
+        db.query(FeedEntry).filter(*feed_filter).delete(synchronize_session=False)
+        entries = [{
+            "org_id": match_org_id,
+            "notice_id": notice_id,
+            "is_tracked": bool(is_tracked),
+            "rank_score": rank_score(score, unread_alerts, deadline, now),
+            "score": score,
+            "feedback_status": feedback_status,
+            "unread_alerts": unread_alerts,
+            "title": title,
+            "deadline_date": deadline,
+            "value_amount": value_amount,
+            "refreshed_at": now,
+        } for (match_org_id, notice_id, is_tracked, score, feedback_status, title, deadline, value_amount,
+               unread_alerts) in rows]
+        if entries:
+            db.execute(insert(FeedEntry), entries)
+        return len(entries)
+
+    def refresh(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Re-ranks every org's feed, one org per transaction. Returns rows written."""
+        now = now or datetime.now(timezone.utc)
+        written = 0
+        for (org_id,) in db.query(NoticeMatch.org_id).distinct().all():
+            written += self.sync(db, org_id=org_id, now=now)
+            db.commit()
+        # Orgs whose last match went away
+        db.query(FeedEntry).filter(~FeedEntry.org_id.in_(select(NoticeMatch.org_id))).delete(synchronize_session=False)
+        db.commit()
+        logger.info(f"Refreshed {written} feed entries.")
+        return written
+
+
+# Shared by everything that writes matches or alerts
+feed_index = FeedIndex()
+
+
 class FeedService:
     """
     Provides the 'Opportunity Feed' (PRD 04).
@@ -15,25 +132,31 @@ class FeedService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_feed(self, org_id: str, limit: int = 20) -> List[NoticeMatch]:
+    def get_feed(self, org_id: str, limit: int = 20) -> List[FeedEntry]:
+        """First page of the feed (see get_feed_page)."""
+        return self.get_feed_page(org_id, limit)[0]
+
+    def get_feed_page(self, org_id: str, limit: int = 20,
+                      cursor: Optional[str] = None) -> Tuple[List[FeedEntry], Optional[str]]:
         """
-        Returns a ranked list of matches for an org.
+        Returns a page of the org's feed and the cursor for the next one (None on the last page).
         Prioritizes:
-        1. Tracked notices with unread alerts
-        2. High-score matches
-        3. Recently updated notices
+        1. Tracked notices
+        2. Rank: match score, unread alerts, closeness of the deadline
+        Keyset-paginated on the feed_entry index, so deep pages cost the same as the first.
         """
-        # Complex query to join matches with alerts
-        query = self.db.query(NoticeMatch)\
-            .join(Notice, NoticeMatch.notice_id == Notice.ocid)\
-            .filter(NoticeMatch.org_id == org_id)\
-            .order_by(
-                desc(NoticeMatch.is_tracked),
-                desc(NoticeMatch.score)
-            )\
-            .limit(limit)
-            
-        return query.all()
+        query = self.db.query(FeedEntry).filter(FeedEntry.org_id == org_id)
+        if cursor:
+            query = query.filter(
+                tuple_(FeedEntry.is_tracked, FeedEntry.rank_score, FeedEntry.notice_id) < tuple_(*decode_cursor(cursor))
+            )
+        entries = query.order_by(
+            desc(FeedEntry.is_tracked), desc(FeedEntry.rank_score), desc(FeedEntry.notice_id)
+        ).limit(limit + 1).all()
+
+        if len(entries) > limit:
+            return entries[:limit], encode_cursor(entries[limit - 1])
+        return entries, None
 
     def get_unread_alerts(self, org_id: str) -> List[Alert]:
         """Returns unread alerts for the org."""
@@ -47,4 +170,6 @@ class FeedService:
         alert = self.db.get(Alert, alert_id)
         if alert:
             alert.is_read = True
+            if alert.org_id and alert.notice_id:
+                feed_index.sync(self.db, org_id=alert.org_id, notice_ids=[alert.notice_id])
             self.db.commit()
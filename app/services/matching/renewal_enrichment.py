@@ -14,7 +14,7 @@ This is the "Renewal Radar" — Design 1 from bid_readiness_designs.md.
 from typing import Optional
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from app.services.matching.buyer_history import buyer_history as buyer_history_index
 
 
 class RenewalEnrichmentService:
@@ -46,7 +46,7 @@ class RenewalEnrichmentService:
                 result["radar_summary"] = "No buyer ID — cannot perform historical lookup."
                 return result
 
-            # --- 1. Has this buyer appeared in history? ---
+            # --- 1. Has this buyer appeared in history? (one indexed read) ---
             buyer_history = self._get_buyer_history(buyer_id, cpv_prefixes)
 
             if not buyer_history:
@@ -57,29 +57,25 @@ class RenewalEnrichmentService:
                 return result
 
             result["buyer_seen_before"] = True
-            result["historical_contract_count"] = len(buyer_history)
+            # A notice filed under several CPV prefixes appears in each of their rows
+            result["historical_contract_count"] = len({a["ocid"] for row in buyer_history for a in row.awards or []})
 
-            # --- 2. Extract incumbents and suppliers ---
+            # --- 2. Incumbent and suppliers, most recent category first ---
+            buyer_history.sort(key=lambda row: row.last_awarded_at, reverse=True)
             suppliers = []
-            dates = []
             for row in buyer_history:
-                raw = row.raw_json or {}
-                # OCDS awards path
-                for award in raw.get("awards", []):
-                    for supplier in award.get("suppliers", []):
-                        name = supplier.get("name")
-                        if name and name not in suppliers:
-                            suppliers.append(name)
-                if row.publication_date:
-                    dates.append(row.publication_date)
+                suppliers += [s for s in row.suppliers or [] if s not in suppliers]
+            dates = [row.last_awarded_at for row in buyer_history if row.last_awarded_at]
 
             result["unique_suppliers"] = suppliers[:5]  # top 5
-            result["incumbent"] = suppliers[0] if suppliers else None
+            result["incumbent"] = next((row.incumbent for row in buyer_history if row.incumbent), None)
 
-            # --- 3. Estimate cycle from last award date ---
+            # --- 3. Cycle: observed gap between awards, else estimated from last award date ---
             if dates:
                 last_date = max(dates)
                 result["last_awarded_date"] = last_date.isoformat() if hasattr(last_date, "isoformat") else str(last_date)
+                result["estimated_cycle_years"] = buyer_history[0].estimated_cycle_years
+            if dates and not result["estimated_cycle_years"]:
                 last_date_utc = last_date.replace(tzinfo=timezone.utc) if last_date.tzinfo is None else last_date
                 days_since = (datetime.now(timezone.utc) - last_date_utc).days
                 years_since = round(days_since / 365.25, 1)
@@ -101,48 +97,8 @@ class RenewalEnrichmentService:
         return result
 
     def _get_buyer_history(self, buyer_id, cpv_prefixes: list):
-        """Fetch historical notices for this buyer, optionally filtered by CPV prefix."""
-        if cpv_prefixes:
-            # Match on buyer AND at least one CPV prefix
-            query = text("""
-                SELECT ocid, title, publication_date, raw_json, cpv_codes
-                FROM notice
-                WHERE buyer_id = :buyer_id
-                  AND notice_type = 'historical'
-                  AND (
-                    cpv_codes IS NULL
-                    OR EXISTS (
-                        SELECT 1 FROM unnest(cpv_codes) AS c
-                        WHERE LEFT(c, 4) = ANY(:prefixes)
-                    )
-                  )
-                ORDER BY publication_date DESC
-                LIMIT 10
-            """)
-            rows = self.db.execute(
-                query, {"buyer_id": str(buyer_id), "prefixes": cpv_prefixes}
-            ).fetchall()
-        else:
-            query = text("""
-                SELECT ocid, title, publication_date, raw_json, cpv_codes
-                FROM notice
-                WHERE buyer_id = :buyer_id
-                  AND notice_type = 'historical'
-                ORDER BY publication_date DESC
-                LIMIT 10
-            """)
-            rows = self.db.execute(query, {"buyer_id": str(buyer_id)}).fetchall()
-
-        # Convert raw rows to simple objects
-        class Row:
-            def __init__(self, r):
-                self.ocid = r[0]
-                self.title = r[1]
-                self.publication_date = r[2]
-                self.raw_json = r[3] or {}
-                self.cpv_codes = r[4] or []
-
-        return [Row(r) for r in rows]
+        """Materialised history rows for this buyer, in the notice's CPV prefixes when it has any."""
+        return buyer_history_index.lookup(self.db, buyer_id, cpv_prefixes)
 
     def _generate_summary(self, result: dict, notice) -> str:
         count = result["historical_contract_count"]
@@ -1,12 +1,89 @@
 import logging
-from datetime import datetime, timedelta
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional
 from sqlalchemy import text, and_
-from sqlalchemy.orm import Session
-from app.models import Notice, Alert, ServiceProfile
+from sqlalchemy.orm import Session, sessionmaker
+from app.models import BuyerCategoryHistory, ContractAward, Notice, Alert, ProcurementForecast, ServiceProfile, Supplier
+from app.services.alerts.outbox import DEFAULT_CHANNEL, OUTBOX_FROM_INSERTED_SQL
+from app.services.alerts.renewal import NATIONAL_INCOME, PROFILES_CTE
+from app.services.matching.buyer_history import HISTORY_NOTICE_TYPES
 
 logger = logging.getLogger(__name__)
 
+# Forecasts below this confidence (bare industry-default cycles) raise no alerts
+MIN_FORECAST_CONFIDENCE = 0.3
+# PROCURE alerts keep firing this long after the predicted re-tender date
+PROCURE_WINDOW = timedelta(days=90)
+DEFAULT_ORG_CHUNK_SIZE = 50
+DEFAULT_WORKERS = 4
+
+# Open lifecycle stages x interested orgs, for one chunk of orgs per statement.
+# Predictions come from procurement_forecast (recomputed corpus-wide in one
+# pass by app.workers.procurement_forecast); each (buyer, CPV prefix) due
+# for a stage is anchored on the buyer's latest award in that category, and
+# orgs are matched by CPV prefix and region as for renewal alerts. One alert
+# type per stage plus the partial unique index on alert keep re-runs idempotent;
+# new alerts are queued for delivery by the same statement.
+STRATEGIC_ALERTS_SQL = f"""
+    WITH due AS (
+        SELECT f.*,
+               CASE WHEN f.next_tender_date <= :today THEN 'PROCURE'
+                    WHEN f.next_define_date <= :today THEN 'DEFINE'
+                    ELSE 'PLAN' END AS stage
+        FROM procurement_forecast f
+        WHERE f.next_plan_date <= :today
+          AND f.next_tender_date > :today - :procure_window
+          AND f.confidence >= :min_confidence
+    ),
+    contracts AS (
+        SELECT d.*, n.ocid, n.title, n.delivery_regions, b.canonical_name AS buyer_name
+        FROM due d
+        JOIN buyer b ON b.id = d.buyer_id
+        CROSS JOIN LATERAL (
+            SELECT n.ocid, n.title, n.delivery_regions
+            FROM notice n
+            WHERE n.buyer_id = d.buyer_id
+              AND n.notice_type = ANY(:notice_types)
+              AND (n.cluster_id IS NULL OR n.cluster_id = n.ocid)
+              AND EXISTS (SELECT 1 FROM unnest(n.cpv_codes) AS c WHERE LEFT(c, 4) = d.cpv_prefix)
+            ORDER BY n.publication_date DESC
+            LIMIT 1
+        ) n
+    ),
+    {PROFILES_CTE},
+    inserted AS (
+        INSERT INTO alert (id, org_id, notice_id, alert_type, severity, message, details, is_read, created_at)
+        SELECT DISTINCT ON (p.org_id, c.ocid, c.stage)
+               gen_random_uuid(), p.org_id, c.ocid, 'LIFECYCLE_' || c.stage,
+               CASE c.stage WHEN 'PROCURE' THEN 'warning' ELSE 'info' END,
+               CASE c.stage
+                   WHEN 'PLAN' THEN 'Plan: ' || c.buyer_name || ' is expected to re-tender ''' || c.title
+                       || ''' around ' || to_char(c.next_tender_date, 'Mon YYYY') || '. Identify consortium partners now.'
+                   WHEN 'DEFINE' THEN 'Define: ' || c.buyer_name || ' is expected to re-tender ''' || c.title
+                       || ''' around ' || to_char(c.next_tender_date, 'Mon YYYY') || '. Prepare outcomes data for market engagement.'
+                   ELSE 'Procure: ' || c.buyer_name || '''s re-tender of ''' || c.title
+                       || ''' is due (predicted ' || to_char(c.next_tender_date, 'Mon YYYY') || ').'
+               END,
+               jsonb_build_object(
+                   'stage', c.stage, 'cpv_prefix', c.cpv_prefix, 'next_tender_date', c.next_tender_date,
+                   'cycle_years', c.cycle_years, 'cycle_basis', c.cycle_basis, 'confidence', c.confidence
+               ),
+               FALSE, now()
+        FROM contracts c
+        JOIN profiles p ON c.cpv_prefix = ANY(p.cpv_prefixes)
+        WHERE p.org_id = ANY(CAST(:org_ids AS uuid[]))
+          AND (c.delivery_regions IS NULL
+               OR p.income_national
+               OR p.regions && ARRAY['national', 'united kingdom', 'uk']
+               OR p.regions && c.delivery_regions)
+        ORDER BY p.org_id, c.ocid, c.stage, c.confidence DESC
+        ON CONFLICT (org_id, notice_id, alert_type) WHERE alert_type <> 'MATERIAL_CHANGE' DO NOTHING
+        RETURNING id, org_id
+    )
+    {OUTBOX_FROM_INSERTED_SQL}"""
+
 class RenewalIntelligenceService:
     """
     Advanced Procurement Forecasting (Phase 3 of Bid Readiness).
@@ -18,43 +95,26 @@ class RenewalIntelligenceService:
 
     def analyze_cycles(self, cpv_prefix: str, buyer_id: str) -> Optional[int]:
         """
-        Heuristic: Find the average gap (in years) between awards for a specific buyer/CPV.
+        Heuristic: the average gap (in years) between awards for a specific buyer/CPV,
+        as maintained in buyer_category_history.
         """
-        query = text("""
-            SELECT publication_date 
-            FROM notice 
-            WHERE buyer_id = :buyer_id 
-              AND :cpv_prefix = ANY(cpv_codes)
-              AND notice_type IN ('contractAward', 'historical')
-            ORDER BY publication_date ASC
-        """)
-        
-        results = self.db.execute(query, {"buyer_id": buyer_id, "cpv_prefix": cpv_prefix}).fetchall()
-        
-        if len(results) < 2:
-            return None # Not enough history to establish a cycle
-            
-        gaps = []
-        for i in range(1, len(results)):
-            gap = (results[i][0] - results[i-1][0]).days / 365.25
-            # Procurement cycles are typically 1, 2, 3, 4, or 5 years.
-            # Round to nearest integer if reasonably close.
-            if 0.5 < gap < 6.5:
-                gaps.append(round(gap))
-                
-        if not gaps:
-            return None
-            
-        return int(sum(gaps) / len(gaps))
+        try:
+            buyer_uuid = uuid.UUID(str(buyer_id))
+        except ValueError:
+            return None  # No resolved buyer
+        row = self.db.get(BuyerCategoryHistory, (buyer_uuid, cpv_prefix))
+        return row.estimated_cycle_years if row else None
 
     def predict_next_lifecycle(self, notice: Notice) -> Dict:
         """
         Given a historical notice, predict its next lifecycle events.
         """
-        # 1. Establish Cycle
+        # 1. Establish Cycle: the batch forecast when this buyer/category has one
         cpv_prefix = notice.cpv_codes[0][:4] if notice.cpv_codes else None
-        cycle_years = self.analyze_cycles(cpv_prefix, str(notice.buyer_id)) if cpv_prefix else None
-        
+        forecast = self.db.get(ProcurementForecast, (notice.buyer_id, cpv_prefix)) if cpv_prefix and notice.buyer_id else None
+        cycle_years = float(forecast.cycle_years) if forecast else None
+        confidence = float(forecast.confidence) if forecast else None
+
         # Fallback to contract duration if cycle is unknown
         if not cycle_years and notice.contract_period_start and notice.contract_period_end:
             duration = (notice.contract_period_end - notice.contract_period_start).days / 365.25
@@ -63,27 +123,61 @@ class RenewalIntelligenceService:
         if not cycle_years:
             cycle_years = 3 # Industry default for service contracts
 
-        # 2. Project Dates
+        # 2. Incumbent: first supplier on the notice's earliest award
+        incumbent = self.db.query(Supplier.canonical_name).join(
+            ContractAward, ContractAward.supplier_id == Supplier.id
+        ).filter(ContractAward.ocid == notice.ocid).order_by(
+            ContractAward.award_date.asc().nulls_last(), ContractAward.award_id
+        ).limit(1).scalar()
+
+        # 3. Project Dates
         base_date = notice.publication_date
         next_tender_date = base_date + timedelta(days=cycle_years * 365.25)
         
         return {
             "cycle_years": cycle_years,
+            "confidence": confidence,
             "next_procure_date": next_tender_date,
             "next_define_date": next_tender_date - timedelta(days=180), # 6 months for PME
             "next_plan_date": next_tender_date - timedelta(days=365),    # 1 year for strategic planning
-            "incumbent": notice.raw_json.get("awards", [{}])[0].get("suppliers", [{}])[0].get("name") if notice.raw_json else "Unknown"
+            "incumbent": incumbent or "Unknown"
         }
 
-    def generate_strategic_alerts(self):
+    def generate_strategic_alerts(self, today: Optional[datetime] = None, workers: int = DEFAULT_WORKERS,
+                                  chunk_size: int = DEFAULT_ORG_CHUNK_SIZE) -> int:
         """
-        Scan historical data and create prospective alerts for nonprofits.
+        Create PLAN / DEFINE / PROCURE alerts for every forecast re-tender whose
+        stage is open today, for all interested orgs. Orgs are split into chunks
+        written in parallel, each in its own session and transaction.
+        Returns the alerts created.
         """
-        # This would eventually run as a background cron job.
-        # For now, we'll run it on the last 5 years of data.
-        logger.info("Generating Strategic Lifecycle Alerts...")
-        
-        # Implementation details:
-        # Loop over charities -> Match Interest Mesh -> Find Historical cycles -> Create alerts.
-        # [Placeholder for full loop logic]
-        pass
+        today = today or datetime.now(timezone.utc)
+        org_ids = [org_id for (org_id,) in self.db.query(ServiceProfile.org_id).order_by(ServiceProfile.org_id)]
+        chunks = [org_ids[i:i + chunk_size] for i in range(0, len(org_ids), chunk_size)]
+        session_factory = sessionmaker(bind=self.db.get_bind(), autoflush=False)
+
+        def write_chunk(chunk: List[uuid.UUID]) -> int:
+            db = session_factory()
+            try:
+                created = db.execute(text(STRATEGIC_ALERTS_SQL), {
+                    "today": today,
+                    "procure_window": PROCURE_WINDOW,
+                    "min_confidence": MIN_FORECAST_CONFIDENCE,
+                    "notice_types": list(HISTORY_NOTICE_TYPES),
+                    "national_income": NATIONAL_INCOME,
+                    "org_ids": [str(org_id) for org_id in chunk],
+                    "channel": DEFAULT_CHANNEL,
+                }).rowcount
+                db.commit()
+                return created
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+
+        logger.info(f"Generating strategic lifecycle alerts for {len(org_ids)} orgs in {len(chunks)} chunks...")
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            created = sum(pool.map(write_chunk, chunks))
+        logger.info(f"Created {created} strategic lifecycle alerts.")
+        return created
@@ -1,6 +1,7 @@
 import logging
 from sqlalchemy.orm import Session
 from app.models import NoticeMatch
+from app.services.matching.feed import feed_index
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +26,7 @@ class TrackingService:
             match.is_tracked = not match.is_tracked
             is_now_tracked = match.is_tracked
             
+        feed_index.sync(self.db, org_id=org_id, notice_ids=[ocid])
         self.db.commit()
         logger.info(f"Org {org_id} tracking status for {ocid}: {is_now_tracked}")
         return is_now_tracked
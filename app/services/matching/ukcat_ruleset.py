@@ -0,0 +1,379 @@
+"""
+Compiled UK-CAT Ruleset
+-----------------------
+Turns data/ukcat.csv into a ruleset that can tag text in a single pass:
+
+  1. Every include pattern is parsed and reduced to a set of literals, at
+     least one of which must appear in any text the pattern matches.
+  2. All literals are folded into one trie-shaped prefilter regex, so a
+     single scan of the text tells us which rules *could* match.
+  3. Only those candidate rules run their full include/exclude patterns.
+
+The literal extraction is the expensive part, so the result is cached on
+disk as JSON keyed by a hash of the CSV (the ruleset version) and only
+recompiled when the CSV changes.
+
+It also encodes the code hierarchy (HE101 -> HE, HE1, HE101) as stable
+integer prefix ids, so theme matching is a set intersection.
+"""
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+from re import _constants as sre_constants
+from re import _parser as sre_parse
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CSV_PATH = os.path.join(os.path.dirname(__file__), "../../../data/ukcat.csv")
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), "../../../data/cache")
+
+# Bump whenever the literal extraction or cache layout changes.
+ENGINE_VERSION = 1
+
+# Cap on how many exact strings a sub-pattern may expand to before we stop
+# enumerating it (e.g. "(a|b)(c|d)(e|f)..." grows multiplicatively).
+_MAX_EXPANSION = 64
+
+# Character classes up to this size are expanded into literals ("[sz]").
+_MAX_CLASS_SIZE = 8
+
+_REPEAT_OPS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT, sre_constants.POSSESSIVE_REPEAT}
+
+LiteralSets = Tuple[Optional[FrozenSet[str]], Optional[FrozenSet[str]]]
+
+
+def compute_ruleset_version(csv_path: str = DEFAULT_CSV_PATH) -> str:
+    """Stable version id for a UK-CAT CSV: a short hash of its bytes."""
+    with open(csv_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+# ─── Code Hierarchy ───
+
+def ukcat_prefixes(code: str) -> List[str]:
+    """
+    A UK-CAT code and its ancestors, per the CSV's code structure:
+    two-letter category, then category + first digit, then the full code.
+    e.g. "HE101" -> ["HE", "HE1", "HE101"]
+    """
+    prefixes = [code[:2]]
+    if len(code) > 3:
+        prefixes.append(code[:3])
+    if len(code) > 2:
+        prefixes.append(code)
+    return prefixes
+
+
+def ukcat_prefix_id(prefix: str) -> int:
+    """
+    Stable integer id for a UK-CAT code or prefix. Derived from the string
+    itself (not from row order) so ids survive edits to ukcat.csv.
+    """
+    category = (ord(prefix[0]) - 65) * 26 + (ord(prefix[1]) - 65)
+    digits = prefix[2:]
+    if not digits:
+        offset = 0
+    elif len(digits) == 1:
+        offset = 1 + int(digits)
+    else:
+        offset = 11 + int(digits)
+    return category * 1024 + offset
+
+
+def expand_ukcat_codes(codes: Optional[List[str]]) -> List[int]:
+    """Prefix ids for a set of codes, ancestors included, sorted for storage."""
+    return sorted({ukcat_prefix_id(p) for code in (codes or []) for p in ukcat_prefixes(code)})
+
+
+# ─── Literal Extraction ───
+
+def _product(left: FrozenSet[str], right: FrozenSet[str]) -> Optional[FrozenSet[str]]:
+    if len(left) * len(right) > _MAX_EXPANSION:
+        return None
+    return frozenset(a + b for a in left for b in right)
+
+
+def _best(exact: Optional[FrozenSet[str]], required: Optional[FrozenSet[str]]) -> Optional[FrozenSet[str]]:
+    literals = exact if exact is not None else required
+    if literals is None or "" in literals:
+        return None
+    return literals
+
+
+def _selectivity(literals: FrozenSet[str]) -> Tuple[int, int]:
+    # Longer literals are rarer; fewer alternatives is a tighter filter.
+    return (min(len(s) for s in literals), -len(literals))
+
+
+def _analyse_item(op, av) -> LiteralSets:
+    """
+    Returns (exact, required) for a single parsed regex node:
+      exact    - every string the node can match, if small and finite
+      required - strings of which at least one occurs in any match
+    """
+    if op == sre_constants.LITERAL:
+        lit = frozenset([chr(av)])
+        return lit, lit
+
+    if op == sre_constants.AT:
+        # Anchors and \b are zero-width.
+        return frozenset([""]), None
+
+    if op == sre_constants.SUBPATTERN:
+        return _analyse_seq(av[-1])
+
+    if op == sre_constants.ATOMIC_GROUP:
+        return _analyse_seq(av)
+
+    if op == sre_constants.BRANCH:
+        branches = [_analyse_seq(b) for b in av[1]]
+        exact = None
+        if all(e is not None for e, _ in branches):
+            union = frozenset().union(*(e for e, _ in branches))
+            exact = union if len(union) <= _MAX_EXPANSION else None
+        required = None
+        picks = [_best(e, r) for e, r in branches]
+        if all(p is not None for p in picks):
+            required = frozenset().union(*picks)
+        return exact, required
+
+    if op in _REPEAT_OPS:
+        lo, hi, item = av
+        exact, required = _analyse_seq(item)
+        if lo == 0:
+            if hi == 1 and exact is not None:
+                return exact | {""}, None
+            return None, None
+        return (exact if lo == hi == 1 else None), _best(exact, required)
+
+    if op == sre_constants.IN:
+        if len(av) <= _MAX_CLASS_SIZE and all(o == sre_constants.LITERAL for o, _ in av):
+            chars = frozenset(chr(c) for _, c in av)
+            return chars, chars
+        return None, None
+
+    # Lookarounds, backrefs, wildcards and categories constrain nothing we can use.
+    return None, None
+
+
+def _analyse_seq(seq) -> LiteralSets:
+    candidates: List[FrozenSet[str]] = []
+    run: Optional[FrozenSet[str]] = frozenset([""])
+    whole: Optional[FrozenSet[str]] = frozenset([""])
+
+    def flush(current):
+        best = _best(current, None)
+        if best is not None:
+            candidates.append(best)
+
+    for op, av in seq:
+        exact, required = _analyse_item(op, av)
+
+        if exact is not None:
+            whole = _product(whole, exact) if whole is not None else None
+            joined = _product(run, exact)
+            if joined is None:
+                flush(run)
+                run = exact
+            else:
+                run = joined
+        else:
+            whole = None
+            flush(run)
+            run = frozenset([""])
+
+        if required is not None:
+            candidates.append(required)
+
+    flush(run)
+
+    required = max(candidates, key=_selectivity) if candidates else None
+    return whole, required
+
+
+def extract_literals(regex_str: str) -> Optional[List[str]]:
+    """
+    Returns lowercase literals such that any case-insensitive match of
+    `regex_str` contains at least one of them, or None if no such set
+    could be derived (the rule must then always be evaluated).
+    """
+    try:
+        parsed = sre_parse.parse(regex_str, re.IGNORECASE)
+    except re.error:
+        return None
+
+    literals = _best(*_analyse_seq(parsed))
+    if literals is None:
+        return None
+
+    lowered = {s.lower() for s in literals}
+    # Non-ASCII case folding is not 1:1 with str.lower(); don't guess.
+    if any(not s.isascii() for s in lowered):
+        return None
+    # A literal containing a shorter one adds nothing ("cats" implies "cat").
+    return sorted(s for s in lowered if not any(t != s and t in s for t in lowered))
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """Builds a regex that matches the longest of `words` at a position."""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+# ─── Ruleset ───
+
+class UKCATRuleset:
+    """
+    A compiled, immutable view of the UK-CAT taxonomy.
+    Build via `load_ruleset()`; use `candidate_rules()` to prefilter text.
+    """
+
+    def __init__(self, version: str, rows: List[Dict]):
+        self.version = version
+        self.rows = rows
+        self.rules: List[Dict] = []
+
+        literal_rules: Dict[str, Set[int]] = {}
+        always: List[int] = []
+
+        for row in rows:
+            try:
+                pattern = re.compile(row["regex"], re.IGNORECASE)
+                exclude_pattern = re.compile(row["exclude_regex"], re.IGNORECASE) if row["exclude_regex"] else None
+            except re.error as e:
+                logger.warning(f"Invalid regex for UKCAT code {row['code']}: {e}")
+                continue
+
+            idx = len(self.rules)
+            self.rules.append({
+                "code": row["code"],
+                "tag": row["tag"],
+                "pattern": pattern,
+                "exclude_pattern": exclude_pattern,
+            })
+            if row["literals"] is None:
+                always.append(idx)
+            else:
+                for lit in row["literals"]:
+                    literal_rules.setdefault(lit, set()).add(idx)
+
+        self._always = frozenset(always)
+
+        # The prefilter reports only the longest literal starting at each
+        # position; every shorter literal starting there is a prefix of it.
+        self._literal_rules: Dict[str, FrozenSet[int]] = {}
+        for lit in literal_rules:
+            hits = set()
+            for i in range(1, len(lit) + 1):
+                hits |= literal_rules.get(lit[:i], set())
+            self._literal_rules[lit] = frozenset(hits)
+
+        self._prefilter = None
+        if literal_rules:
+            trie = _trie_pattern(sorted(literal_rules))
+            self._prefilter = re.compile(f"(?=({trie}))", re.IGNORECASE)
+
+    def candidate_rules(self, text: str) -> Optional[FrozenSet[int]]:
+        """
+        Indices of rules whose patterns could match `text`, or None when the
+        prefilter can't vouch for the text and every rule must be evaluated.
+        """
+        if self._prefilter is None:
+            return None
+
+        hits = set(self._always)
+        seen = set()
+        for m in self._prefilter.finditer(text):
+            found = m.group(1)
+            if found in seen:
+                continue
+            seen.add(found)
+            rules = self._literal_rules.get(found.lower())
+            if rules is None:
+                # Matched via non-ASCII case folding (e.g. U+017F for "s").
+                return None
+            hits |= rules
+        return frozenset(hits)
+
+    def to_json(self) -> Dict:
+        return {"engine_version": ENGINE_VERSION, "version": self.version, "rows": self.rows}
+
+
+def _read_csv_rows(csv_path: str) -> List[Dict]:
+    rows = []
+    with open(csv_path, mode='r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            code = row.get("Code")
+            regex_str = row.get("Regular expression")
+            if not code or not regex_str:
+                continue
+            rows.append({
+                "code": code,
+                "tag": row.get("tag"),
+                "level": row.get("Level"),
+                "regex": regex_str,
+                "exclude_regex": row.get("Exclude regular expression") or None,
+                "literals": extract_literals(regex_str),
+            })
+    return rows
+
+
+def _read_cache(cache_path: str, version: str) -> Optional[List[Dict]]:
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("engine_version") == ENGINE_VERSION and payload.get("version") == version:
+            return payload["rows"]
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable UKCAT cache {cache_path}: {e}")
+    return None
+
+
+def _write_cache(cache_path: str, ruleset: UKCATRuleset):
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(ruleset.to_json(), f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not write UKCAT cache {cache_path}: {e}")
+
+
+def load_ruleset(csv_path: str = DEFAULT_CSV_PATH, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> UKCATRuleset:
+    """
+    Loads the compiled ruleset for `csv_path`, reusing the on-disk cache
+    when the CSV hash matches. Pass cache_dir=None to skip the cache.
+    """
+    version = compute_ruleset_version(csv_path)
+    cache_path = os.path.join(cache_dir, f"ukcat_ruleset_{version}.json") if cache_dir else None
+
+    rows = _read_cache(cache_path, version) if cache_path else None
+    if rows is not None:
+        return UKCATRuleset(version, rows)
+
+    ruleset = UKCATRuleset(version, _read_csv_rows(csv_path))
+    logger.info(f"Compiled UKCAT ruleset {version} ({len(ruleset.rules)} rules).")
+    if cache_path:
+        _write_cache(cache_path, ruleset)
+    return ruleset
@@ -1,8 +1,7 @@
-import csv
-import re
-import os
 import logging
-from typing import List, Dict
+import threading
+from typing import List, Optional
+from .ukcat_ruleset import UKCATRuleset, load_ruleset
 
 logger = logging.getLogger(__name__)
 
@@ -10,51 +9,37 @@ class UKCATTagger:
     """
     Tags text with UK Charity Activity Tags (UK-CAT) using regex patterns.
     Patterns are sourced from https://github.com/charity-classification/ukcat
+
+    The compiled ruleset is loaded on first use (not at import) and a single
+    literal prefilter decides which patterns are worth running on a text.
     """
-    
+
     _instance = None
-    _patterns: List[Dict] = []
+    _ruleset: Optional[UKCATRuleset] = None
+    _lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(UKCATTagger, cls).__new__(cls)
-            cls._instance._load_patterns()
         return cls._instance
 
-    def _load_patterns(self):
-        """Loads regex patterns from the CSV file."""
-        csv_path = os.path.join(os.path.dirname(__file__), "../../../data/ukcat.csv")
-        if not os.path.exists(csv_path):
-            logger.error(f"UKCAT CSV not found at {csv_path}")
-            return
-
-        try:
-            with open(csv_path, mode='r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    code = row.get("Code")
-                    regex_str = row.get("Regular expression")
-                    exclude_regex_str = row.get("Exclude regular expression")
-                    
-                    if not code or not regex_str:
-                        continue
-                        
+    @property
+    def ruleset(self) -> UKCATRuleset:
+        """The compiled ruleset, loaded (or recompiled) on first access."""
+        if self._ruleset is None:
+            with self._lock:
+                if self._ruleset is None:
                     try:
-                        pattern = re.compile(regex_str, re.IGNORECASE)
-                        exclude_pattern = None
-                        if exclude_regex_str:
-                            exclude_pattern = re.compile(exclude_regex_str, re.IGNORECASE)
-                            
-                        self._patterns.append({
-                            "code": code,
-                            "tag": row.get("tag"),
-                            "pattern": pattern,
-                            "exclude_pattern": exclude_pattern
-                        })
-                    except re.error as e:
-                        logger.warning(f"Invalid regex for UKCAT code {code}: {e}")
-        except Exception as e:
-            logger.error(f"Error loading UKCAT patterns: {e}")
+                        type(self)._ruleset = load_ruleset()
+                    except OSError as e:
+                        logger.error(f"Error loading UKCAT patterns: {e}")
+                        type(self)._ruleset = UKCATRuleset("", [])
+        return self._ruleset
+
+    @property
+    def version(self) -> str:
+        """Hash of the UKCAT CSV the current ruleset was compiled from."""
+        return self.ruleset.version
 
     def tag_text(self, text: str) -> List[str]:
         """
@@ -62,16 +47,45 @@ class UKCATTagger:
         """
         if not text:
             return []
-            
+
+        ruleset = self.ruleset
+        candidates = ruleset.candidate_rules(text)
+        if candidates is None:
+            return self._tag_text_exhaustive(text)
+
+        matches = set()
+        for idx in candidates:
+            p = ruleset.rules[idx]
+            if p["pattern"].search(text):
+                if p["exclude_pattern"] and p["exclude_pattern"].search(text):
+                    continue
+                matches.add(p["code"])
+
+        return sorted(matches)
+
+    def tag_notice(self, title: Optional[str], description: Optional[str]) -> List[str]:
+        """Tags a notice from the same title + description text used at ingestion."""
+        return self.tag_text(f"{title} {description or ''}")
+
+    def tag_profile(self, profile) -> List[str]:
+        """Tags a ServiceProfile from its free-text mission and services fields."""
+        parts = [profile.mission, profile.vision, profile.programs_services, profile.target_population]
+        return self.tag_text(" ".join(p for p in parts if p))
+
+    def _tag_text_exhaustive(self, text: str) -> List[str]:
+        """Runs every pattern over the text. Reference path for the prefilter."""
+        if not text:
+            return []
+
         matches = []
-        for p in self._patterns:
+        for p in self.ruleset.rules:
             # Check for inclusion
             if p["pattern"].search(text):
                 # Check for exclusion
                 if p["exclude_pattern"] and p["exclude_pattern"].search(text):
                     continue
                 matches.append(p["code"])
-                
+
         return sorted(list(set(matches)))
 
 tagger = UKCATTagger()
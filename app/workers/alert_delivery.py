@@ -0,0 +1,152 @@
+"""
+Delivers queued alerts and digests from the outbox.
+
+Each worker thread loops: claim a batch of due messages (FOR UPDATE SKIP
+LOCKED, so any number of threads and processes can drain the same backlog
+without double sends), group them by org and channel, send each group
+through the channel's transport under its rate limit, and record the
+result group by group. Failed sends back off and are retried; messages
+out of attempts are marked FAILED. Run with --poll to keep draining; the
+worker wakes early when a backed-off retry falls due before the next poll.
+
+Usage: python -m app.workers.alert_delivery [--transport smtp|file] [--out-dir DIR]
+       [--workers 4] [--batch-size 200] [--rate 10] [--poll 30]
+"""
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from app.database import SessionLocal, settings
+from app.services.alerts.outbox import DEFAULT_CHANNEL, Outbox, outbox as default_outbox
+from app.services.alerts.transports import FileTransport, PermanentDeliveryError, SMTPTransport, Transport
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_WORKERS = 4
+
+
+class AlertDeliveryWorker:
+    def __init__(self, transports: Dict[str, Transport], session_factory=SessionLocal,
+                 workers: int = DEFAULT_WORKERS, batch_size: int = DEFAULT_BATCH_SIZE,
+                 outbox: Optional[Outbox] = None):
+        self.transports = transports
+        self.session_factory = session_factory
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.outbox = outbox or default_outbox
+
+    def deliver_batch(self) -> Tuple[int, int, int]:
+        """Claims and sends one batch in its own session. Returns (claimed, delivered, failed)."""
+        db = self.session_factory()
+        try:
+            claimed = self.outbox.claim(db, self.batch_size, channels=list(self.transports))
+            delivered = failed = 0
+            for envelope in self.outbox.render(db, claimed):
+                transport = self.transports[envelope.channel]
+                try:
+                    if envelope.body:
+                        if transport.rate_limiter is not None:
+                            transport.rate_limiter.acquire()
+                        transport.send(envelope.recipient, envelope.subject, envelope.body)
+                except PermanentDeliveryError as e:
+                    logger.error(f"Undeliverable {envelope.channel} message for org {envelope.org_id}: {e}")
+                    failed += self.outbox.mark_failed(db, envelope.messages, e, permanent=True)
+                except Exception as e:
+                    logger.warning(f"Sending {envelope.channel} message for org {envelope.org_id} failed: {e}")
+                    failed += self.outbox.mark_failed(db, envelope.messages, e)
+                else:
+                    delivered += self.outbox.mark_delivered(db, envelope.messages)
+                # Per group, so a crash mid-batch never re-sends what already went out
+                db.commit()
+            return len(claimed), delivered, failed
+        finally:
+            db.close()
+
+    def _drain(self) -> Tuple[int, int]:
+        delivered = failed = 0
+        while True:
+            claimed, ok, bad = self.deliver_batch()
+            delivered += ok
+            failed += bad
+            if claimed < self.batch_size:
+                return delivered, failed
+
+    def drain(self) -> Tuple[int, int]:
+        """
+        Sends everything currently due, `workers` threads each claiming
+        batches until none are left. Returns (delivered, failed).
+        """
+        db = self.session_factory()
+        try:
+            self.outbox.reclaim(db)
+        finally:
+            db.close()
+
+        if self.workers == 1:
+            results = [self._drain()]
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                results = [f.result() for f in [pool.submit(self._drain) for _ in range(self.workers)]]
+        delivered = sum(ok for ok, _ in results)
+        failed = sum(bad for _, bad in results)
+        if delivered or failed:
+            logger.info(f"Delivered {delivered} outbox messages, {failed} failed permanently.")
+        return delivered, failed
+
+    def next_delay(self, poll_interval: float) -> float:
+        """Seconds to sleep: until the next backed-off message is due, at most `poll_interval`."""
+        db = self.session_factory()
+        try:
+            next_due = self.outbox.next_due_at(db)
+        finally:
+            db.close()
+        if next_due is None:
+            return poll_interval
+        if next_due.tzinfo is None:
+            next_due = next_due.replace(tzinfo=timezone.utc)
+        return min(max((next_due - datetime.now(timezone.utc)).total_seconds(), 0), poll_interval)
+
+    def run_forever(self, poll_interval: float):
+        try:
+            while True:
+                self.drain()
+                time.sleep(self.next_delay(poll_interval))
+        finally:
+            for transport in self.transports.values():
+                transport.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deliver queued alerts and digests")
+    parser.add_argument("--transport", choices=["smtp", "file"], default="smtp")
+    parser.add_argument("--out-dir", default="outbox", help="Where the file transport writes messages")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--rate", type=float, default=None, help="Max sends per second for this process")
+    parser.add_argument("--poll", type=float, default=None, help="Keep draining, sleeping at most this many seconds between rounds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.transport == "file":
+        transport = FileTransport(args.out_dir, rate=args.rate)
+    else:
+        transport = SMTPTransport(
+            settings.SMTP_HOST, settings.SMTP_PORT, sender=settings.SMTP_SENDER,
+            username=settings.SMTP_USERNAME or None, password=settings.SMTP_PASSWORD or None,
+            rate=args.rate,
+        )
+    worker = AlertDeliveryWorker({DEFAULT_CHANNEL: transport}, workers=args.workers, batch_size=args.batch_size)
+    if args.poll:
+        worker.run_forever(args.poll)
+    else:
+        try:
+            worker.drain()
+        finally:
+            transport.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Bulk OCDS loader for historical dumps.
+
+Release packages (`.json` / `.json.gz` shards) are parsed in a process pool
+with the shared Normalizer; each worker turns releases into ready-to-COPY
+text rows (raw release already zstd-compressed) and streams them back in
+chunks. The parent resolves buyers in memory, COPYs each chunk into a temp
+staging table and merges it into `notice` / `notice_raw` with one set-based
+statement, keeping the newest release per OCID.
+
+Embeddings and UKCAT tags are left to backfill_embeddings / the UKCAT
+re-tag worker (bulk-loaded rows have no ruleset version), near-duplicate
+clusters to scripts/cluster_near_duplicates.py; run it before the embedding
+backfill so duplicates aren't embedded. Buyer x category history is rebuilt
+afterwards with app.workers.buyer_history_rebuild, suppliers and contract
+awards with app.workers.contract_award_backfill.
+
+Usage: python -m app.workers.bulk_loader dump1.json.gz dump2.json.gz [--processes 8] [--notice-type historical]
+"""
+import argparse
+import gzip
+import io
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+import ijson
+from sqlalchemy import text
+from app.database import SessionLocal
+from app.models import compress_json
+from app.services.ingestion.buyer_resolver import BuyerResolver
+from app.services.ingestion.normalizer import Normalizer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 5000
+# Cold-storage compression for bulk loads trades a little ratio for speed
+BULK_ZSTD_LEVEL = 3
+
+# Order of the fields each worker encodes; buyer_id and seq are prefixed by the parent
+ROW_COLUMNS = [
+    'ocid', 'release_id', 'title', 'description', 'publication_date', 'deadline_date',
+    'value_amount', 'value_currency', 'procurement_method', 'main_procurement_category',
+    'notice_type', 'source_url', 'cpv_codes', 'delivery_regions', 'contract_period_start', 'contract_period_end',
+    'content_hash',
+]
+STAGING_COLUMNS = ['buyer_id', 'seq'] + ROW_COLUMNS + ['release']
+
+CREATE_STAGING = """
+    CREATE TEMP TABLE IF NOT EXISTS notice_staging (
+        buyer_id UUID NOT NULL,
+        seq BIGINT NOT NULL,
+        ocid TEXT NOT NULL,
+        release_id TEXT,
+        title TEXT,
+        description TEXT,
+        publication_date TIMESTAMPTZ,
+        deadline_date TIMESTAMPTZ,
+        value_amount NUMERIC(18, 2),
+        value_currency VARCHAR(3),
+        procurement_method VARCHAR(50),
+        main_procurement_category VARCHAR(20),
+        notice_type VARCHAR(50),
+        source_url TEXT,
+        cpv_codes TEXT[],
+        delivery_regions TEXT[],
+        contract_period_start TIMESTAMPTZ,
+        contract_period_end TIMESTAMPTZ,
+        content_hash VARCHAR(64),
+        release BYTEA NOT NULL
+    )
+"""
+
+# Newest release per OCID wins, both within the chunk and against what's stored;
+# rows whose content hash is unchanged are left alone.
+MERGE_STAGING = """
+    WITH latest AS (
+        SELECT DISTINCT ON (ocid) *
+        FROM notice_staging
+        ORDER BY ocid, publication_date DESC NULLS LAST, seq DESC
+    ),
+    upserted AS (
+        INSERT INTO notice AS n (
+            ocid, release_id, title, description, buyer_id, publication_date, deadline_date,
+            value_amount, value_currency, procurement_method, main_procurement_category,
+            notice_type, source_url, cpv_codes, delivery_regions, contract_period_start, contract_period_end,
+            content_hash, is_archived
+        )
+        SELECT
+            ocid, release_id, COALESCE(title, 'Untitled Notice'), description, buyer_id,
+            COALESCE(publication_date, now()), deadline_date, value_amount, value_currency,
+            procurement_method, main_procurement_category, notice_type, source_url, cpv_codes,
+            delivery_regions, contract_period_start, contract_period_end, content_hash, FALSE
+        FROM latest
+        ON CONFLICT (ocid) DO UPDATE SET
+            release_id = EXCLUDED.release_id,
+            title = EXCLUDED.title,
+            description = EXCLUDED.description,
+            buyer_id = EXCLUDED.buyer_id,
+            publication_date = EXCLUDED.publication_date,
+            deadline_date = EXCLUDED.deadline_date,
+            value_amount = EXCLUDED.value_amount,
+            value_currency = EXCLUDED.value_currency,
+            procurement_method = EXCLUDED.procurement_method,
+            main_procurement_category = EXCLUDED.main_procurement_category,
+            notice_type = EXCLUDED.notice_type,
+            source_url = EXCLUDED.source_url,
+            cpv_codes = EXCLUDED.cpv_codes,
+            delivery_regions = EXCLUDED.delivery_regions,
+            contract_period_start = EXCLUDED.contract_period_start,
+            contract_period_end = EXCLUDED.contract_period_end,
+            content_hash = EXCLUDED.content_hash,
+            ukcat_ruleset_version = NULL,
+            updated_at = now()
+        WHERE n.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+          AND n.publication_date <= EXCLUDED.publication_date
+        RETURNING ocid
+    )
+    INSERT INTO notice_raw (ocid, release)
+    SELECT l.ocid, l.release FROM latest l JOIN upserted u ON u.ocid = l.ocid
+    ON CONFLICT (ocid) DO UPDATE SET release = EXCLUDED.release
+"""
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\x00": ""})
+
+
+def _pg_array(items: List) -> str:
+    quoted = ('"' + str(i).replace("\\", "\\\\").replace('"', '\\"') + '"' for i in items)
+    return "{" + ",".join(quoted) + "}"
+
+
+def copy_field(value) -> str:
+    """One value in PostgreSQL COPY text format."""
+    if value is None:
+        return r"\N"
+    if isinstance(value, bytes):
+        return "\\\\x" + value.hex()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        value = _pg_array(value)
+    return str(value).translate(_COPY_ESCAPES)
+
+
+# ─── Worker side ───
+
+_results = None  # multiprocessing.Queue, set per worker process
+_normalizer = None
+_resolver = None
+
+
+def _init_worker(results):
+    global _results, _normalizer, _resolver
+    _results = results
+    _normalizer = Normalizer()
+    _resolver = BuyerResolver()  # only used for its pure release_buyer()
+
+
+def _open_shard(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def iter_shard_releases(path: str) -> Iterator[Dict]:
+    """Streams releases from a release package (`{"releases": [...]}`) or a bare array."""
+    with _open_shard(path) as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        prefix = "item" if first == b"[" else "releases.item"
+        f.seek(0)
+        yield from ijson.items(f, prefix, use_float=True)
+
+
+def encode_release(release: Dict, normalizer: Normalizer, notice_type: Optional[str] = None) -> str:
+    """COPY text for ROW_COLUMNS + release, without the leading buyer_id/seq fields."""
+    row = normalizer.release_to_row(release)
+    if notice_type:
+        row['notice_type'] = notice_type
+    fields = [copy_field(row[c]) for c in ROW_COLUMNS]
+    fields.append(copy_field(compress_json(release, level=BULK_ZSTD_LEVEL)))
+    return "\t".join(fields)
+
+
+def _parse_shard(index: int, path: str, chunk_size: int, notice_type: Optional[str]):
+    """
+    Process-pool entry point: parses one shard, streaming ("chunk", rows)
+    messages back through the queue and finishing with ("done", index, parsed, failed).
+    """
+    parsed = failed = 0
+    chunk = []
+    try:
+        for release in iter_shard_releases(path):
+            try:
+                if not release.get('ocid'):
+                    raise ValueError("missing ocid")
+                chunk.append((_resolver.release_buyer(release), encode_release(release, _normalizer, notice_type)))
+                parsed += 1
+            except Exception as e:
+                failed += 1
+                logger.error(f"Failed to parse release {release.get('ocid')} in {path}: {e}")
+            if len(chunk) >= chunk_size:
+                _results.put(("chunk", chunk))
+                chunk = []
+        if chunk:
+            _results.put(("chunk", chunk))
+    except Exception as e:
+        logger.error(f"Failed to read shard {path}: {e}")
+    finally:
+        _results.put(("done", index, parsed, failed))
+
+
+# ─── Parent side ───
+
+class BulkLoader:
+    def __init__(self, session_factory=SessionLocal, processes: Optional[int] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, notice_type: Optional[str] = None):
+        self.session_factory = session_factory
+        self.processes = max(1, processes if processes is not None else (os.cpu_count() or 1))
+        self.chunk_size = chunk_size
+        self.notice_type = notice_type
+        self.buyer_resolver = BuyerResolver()
+        self._seq = 0
+
+    def _copy(self, db, lines: List[str]):
+        """Streams COPY text into notice_staging over the session's own connection."""
+        cursor = db.connection().connection.cursor()
+        sql = f"COPY notice_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN"
+        payload = "\n".join(lines) + "\n"
+        try:
+            if hasattr(cursor, "copy_expert"):  # psycopg2
+                cursor.copy_expert(sql, io.StringIO(payload))
+            else:  # psycopg 3
+                with cursor.copy(sql) as copy:
+                    copy.write(payload)
+        finally:
+            cursor.close()
+
+    def _merge_chunk(self, db, chunk: List[Tuple[Tuple[Dict, List[str]], str]]) -> int:
+        """Resolves buyers, COPYs the chunk into staging and merges it. One transaction."""
+        buyer_ids = self.buyer_resolver.resolve_buyers(db, [buyer for buyer, _ in chunk])
+        lines = []
+        for buyer_id, (_, encoded) in zip(buyer_ids, chunk):
+            self._seq += 1
+            lines.append(f"{buyer_id}\t{self._seq}\t{encoded}")
+
+        db.execute(text(CREATE_STAGING))
+        db.execute(text("TRUNCATE notice_staging"))
+        self._copy(db, lines)
+        merged = db.execute(text(MERGE_STAGING)).rowcount
+        db.commit()
+        return merged
+
+    def load(self, paths: List[str]) -> Dict[str, int]:
+        """Loads every shard. Returns release counts: parsed, failed and merged (new or changed)."""
+        stats = {"parsed": 0, "failed": 0, "merged": 0}
+        started = time.monotonic()
+        db = self.session_factory()
+        results = multiprocessing.Queue(maxsize=self.processes * 2)  # backpressure on parsers
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker, initargs=(results,)) as pool:
+                futures = [
+                    pool.submit(_parse_shard, i, path, self.chunk_size, self.notice_type)
+                    for i, path in enumerate(paths)
+                ]
+                pending = set(range(len(paths)))
+
+                while pending:
+                    try:
+                        message = results.get(timeout=1.0)
+                    except queue.Empty:
+                        # A worker that died outright never sends its "done" message
+                        for i in [i for i in pending if futures[i].done() and futures[i].exception()]:
+                            logger.error(f"Parser for {paths[i]} crashed: {futures[i].exception()}")
+                            pending.discard(i)
+                        continue
+
+                    if message[0] == "done":
+                        _, index, parsed, failed = message
+                        pending.discard(index)
+                        stats["parsed"] += parsed
+                        stats["failed"] += failed
+                        continue
+
+                    chunk = message[1]
+                    try:
+                        stats["merged"] += self._merge_chunk(db, chunk)
+                    except Exception as e:
+                        logger.error(f"Failed to merge chunk of {len(chunk)} releases: {e}")
+                        db.rollback()
+                        self.buyer_resolver.invalidate()
+                        stats["failed"] += len(chunk)
+                        continue
+                    rate = self._seq / max(time.monotonic() - started, 1e-6)
+                    logger.info(f"Staged {self._seq} releases ({rate:.0f}/s), {stats['merged']} new or changed.")
+        finally:
+            db.close()
+
+        elapsed = time.monotonic() - started
+        logger.info(f"Bulk load complete in {elapsed:.1f}s: {stats} ({stats['parsed'] / max(elapsed, 1e-6):.0f} releases/s)")
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load OCDS release package shards")
+    parser.add_argument("paths", nargs="+", help=".json or .json.gz release packages")
+    parser.add_argument("--processes", type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Releases per COPY/merge")
+    parser.add_argument("--notice-type", default=None, help="Override notice_type (e.g. 'historical')")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    BulkLoader(processes=args.processes, chunk_size=args.chunk_size, notice_type=args.notice_type).load(args.paths)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Full rebuild of buyer_category_history.
+
+Ingestion keeps the table current incrementally; this recomputes it from
+every stored award notice (historical and OCDS award tags) - after a bulk load,
+a buyer merge, or a change to how history is derived. Notices and their raw
+releases are streamed in chunks through one read session and the table is
+swapped in a single transaction, so readers never see it half-built.
+
+Usage: python -m app.workers.buyer_history_rebuild [--chunk-size 1000]
+"""
+import argparse
+import logging
+from typing import Iterator
+from sqlalchemy.orm import selectinload
+from app.database import SessionLocal
+from app.models import Notice
+from app.services.matching.buyer_history import HISTORY_NOTICE_TYPES, buyer_history
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _stream_award_notices(db, chunk_size: int) -> Iterator[Notice]:
+    query = db.query(Notice).filter(
+        Notice.notice_type.in_(HISTORY_NOTICE_TYPES), Notice.buyer_id != None,
+    ).options(selectinload(Notice.raw))
+    return query.yield_per(chunk_size)
+
+
+def rebuild(session_factory=SessionLocal, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    reader = session_factory()
+    writer = session_factory()
+    try:
+        return buyer_history.rebuild(writer, _stream_award_notices(reader, chunk_size))
+    finally:
+        reader.close()
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild buyer_category_history from stored award notices")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    rebuild(chunk_size=args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Backfill supplier / contract_award from stored notices.
+
+Ingestion keeps contract_award current for every notice it writes; this
+derives the rows for notices stored before the tables existed (or after a
+change to how awards are extracted). Notices and their raw releases are
+streamed in chunks through one read session, and each chunk's award rows
+are replaced and committed in its own transaction, so an interrupted run
+can simply be repeated.
+
+Usage: python -m app.workers.contract_award_backfill [--chunk-size 1000]
+"""
+import argparse
+import logging
+from itertools import islice
+from typing import Iterator
+from sqlalchemy.orm import selectinload
+from app.database import SessionLocal
+from app.models import Notice
+from app.services.ingestion.contract_awards import ContractAwardIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _stream_notices(db, chunk_size: int) -> Iterator[Notice]:
+    query = db.query(Notice).filter(Notice.raw.has()).options(selectinload(Notice.raw))
+    return query.yield_per(chunk_size)
+
+
+def backfill(session_factory=SessionLocal, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    reader = session_factory()
+    writer = session_factory()
+    index = ContractAwardIndex()
+    written = 0
+    try:
+        notices = _stream_notices(reader, chunk_size)
+        while chunk := list(islice(notices, chunk_size)):
+            try:
+                written += index.record(writer, chunk)
+                writer.commit()
+            except Exception:
+                writer.rollback()
+                index.resolver.invalidate()
+                raise
+            logger.info(f"Backfilled {written} contract award rows so far.")
+        return written
+    finally:
+        reader.close()
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill supplier and contract_award from stored notices")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    backfill(chunk_size=args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Replays dead-lettered releases through the normal ingestion path.
+
+Due entries (PENDING and past their backoff, optionally narrowed by error
+class or OCID) are split into batches and replayed by a thread pool; each
+thread keeps its own session and IngestionWorker. Each release is replayed
+with the notice_type override it was first ingested with (e.g. a historical
+backfill's "historical"). Releases that go through
+are resolved, failures are re-recorded with a longer backoff, and entries
+that reach the queue's max attempts are quarantined until replayed with
+--include-quarantined.
+
+Usage: python -m app.workers.dead_letter_replay [--error-class KeyError] [--ocid OCID ...]
+       [--include-quarantined] [--now] [--wait] [--workers 4] [--batch-size 50]
+"""
+import argparse
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from app.database import SessionLocal
+from app.models import DeadLetterRelease
+from app.services.alerts.alert_service import AlertService
+from app.services.ingestion.dead_letter import DeadLetterQueue
+from app.services.ingestion.enrichment_service import EnrichmentService
+from app.workers.ingestion_worker import IngestionWorker
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_WORKERS = 4
+MAX_WAIT_SECONDS = 900
+
+
+class DeadLetterReplayer:
+    def __init__(self, session_factory=SessionLocal, workers: int = DEFAULT_WORKERS,
+                 batch_size: int = DEFAULT_BATCH_SIZE, queue: Optional[DeadLetterQueue] = None):
+        self.session_factory = session_factory
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.queue = queue or DeadLetterQueue()
+        self._local = threading.local()
+
+    def _worker(self) -> IngestionWorker:
+        # One per thread: BuyerResolver's in-memory index is not thread-safe
+        worker = getattr(self._local, "worker", None)
+        if worker is None:
+            worker = self._local.worker = IngestionWorker()
+            worker.dead_letters = self.queue
+        return worker
+
+    def replay_batch(self, ocids: List[str]) -> Tuple[int, int]:
+        """Replays one batch in its own session. Returns (resolved, still_failing)."""
+        worker = self._worker()
+        db = self.session_factory()
+        try:
+            letters = db.query(DeadLetterRelease).filter(DeadLetterRelease.ocid.in_(ocids)).all()
+            # Each release goes back through with the notice_type override it was ingested with
+            groups = {}
+            for letter in letters:
+                groups.setdefault(letter.notice_type, []).append(letter.release)
+            started = datetime.now(timezone.utc)
+            replayed = []
+            for notice_type, releases in groups.items():
+                try:
+                    worker._process_batch(db, releases, EnrichmentService(db), AlertService(db),
+                                          notice_type=notice_type, source="REPLAY")
+                except Exception as e:
+                    logger.error(f"Replay of {len(releases)} releases failed: {e}")
+                    db.rollback()
+                    worker.buyer_resolver.invalidate()
+                    worker.contract_awards.resolver.invalidate()
+                    worker._dead_letter_batch(db, releases, e, "REPLAY", notice_type)
+                    continue
+                replayed.extend(r['ocid'] for r in releases)
+
+            # Releases the content-hash check skipped are already stored as-is: resolve them too
+            if replayed:
+                db.query(DeadLetterRelease).filter(
+                    DeadLetterRelease.ocid.in_(replayed),
+                    DeadLetterRelease.status != "RESOLVED",
+                    DeadLetterRelease.last_failed_at < started,
+                ).update({
+                    DeadLetterRelease.status: "RESOLVED",
+                    DeadLetterRelease.resolved_at: datetime.now(timezone.utc),
+                    DeadLetterRelease.next_attempt_at: None,
+                }, synchronize_session=False)
+            db.commit()
+
+            failing = db.query(DeadLetterRelease).filter(
+                DeadLetterRelease.ocid.in_(ocids), DeadLetterRelease.status != "RESOLVED"
+            ).count()
+            return len(letters) - failing, failing
+        finally:
+            db.close()
+
+    def replay(self, error_class: Optional[str] = None, ocids: Optional[List[str]] = None,
+               include_quarantined: bool = False, ignore_backoff: bool = False, wait: bool = False) -> Tuple[int, int]:
+        """
+        Replays everything due in parallel batches. With `wait`, keeps going
+        round after round - sleeping out the backoff - until nothing is pending.
+        Returns (resolved, still_failing) across all rounds.
+        """
+        resolved = failing = 0
+        while True:
+            db = self.session_factory()
+            try:
+                due = self.queue.due(db, error_class=error_class, ocids=ocids,
+                                     include_quarantined=include_quarantined, ignore_backoff=ignore_backoff)
+            finally:
+                db.close()
+
+            if due:
+                batches = [due[i:i + self.batch_size] for i in range(0, len(due), self.batch_size)]
+                logger.info(f"Replaying {len(due)} dead letters in {len(batches)} batches ({self.workers} workers)")
+                if self.workers == 1:
+                    results = [self.replay_batch(b) for b in batches]
+                else:
+                    with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                        results = [f.result() for f in as_completed([pool.submit(self.replay_batch, b) for b in batches])]
+                resolved += sum(ok for ok, _ in results)
+                failing = sum(bad for _, bad in results)
+                logger.info(f"Round complete: {resolved} resolved so far, {failing} still failing")
+
+            # Quarantined entries are only replayed once per invocation
+            include_quarantined = False
+            ignore_backoff = False
+            if not wait:
+                break
+            db = self.session_factory()
+            try:
+                next_due = self.queue.next_due_at(db)
+            finally:
+                db.close()
+            if next_due is None:
+                break
+            if next_due.tzinfo is None:
+                next_due = next_due.replace(tzinfo=timezone.utc)
+            delay = min(max((next_due - datetime.now(timezone.utc)).total_seconds(), 0), MAX_WAIT_SECONDS)
+            logger.info(f"Next dead letter due in {delay:.0f}s")
+            time.sleep(delay)
+
+        return resolved, failing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay dead-lettered releases")
+    parser.add_argument("--error-class", default=None, help="Only replay failures of this exception class")
+    parser.add_argument("--ocid", action="append", default=None, help="Only replay these OCIDs (repeatable)")
+    parser.add_argument("--include-quarantined", action="store_true", help="Give quarantined releases another try")
+    parser.add_argument("--now", action="store_true", help="Ignore backoff (e.g. after deploying a fix)")
+    parser.add_argument("--wait", action="store_true", help="Keep replaying as backoffs expire until none are pending")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--max-attempts", type=int, default=None, help="Quarantine threshold")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    queue = DeadLetterQueue(max_attempts=args.max_attempts) if args.max_attempts else None
+    replayer = DeadLetterReplayer(workers=args.workers, batch_size=args.batch_size, queue=queue)
+    resolved, failing = replayer.replay(
+        error_class=args.error_class, ocids=args.ocid, include_quarantined=args.include_quarantined,
+        ignore_backoff=args.now, wait=args.wait,
+    )
+    logger.info(f"Replay finished: {resolved} resolved, {failing} still failing")
+
+
+if __name__ == "__main__":
+    main()
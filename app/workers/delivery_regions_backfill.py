@@ -0,0 +1,61 @@
+"""
+Backfill notice.delivery_regions from stored releases.
+
+Ingestion fills delivery_regions for every notice it writes, but unchanged
+releases are skipped (content hash) on re-ingest and by the bulk loader,
+so notices stored before the column existed keep NULL ("region unknown").
+This decodes their notice_raw releases in chunks through one read session
+and writes the regions with one batched UPDATE per chunk, each committed on
+its own, so an interrupted run can simply be repeated. Releases with no
+delivery or buyer region stay NULL.
+
+Usage: python -m app.workers.delivery_regions_backfill [--chunk-size 1000]
+"""
+import argparse
+import logging
+from sqlalchemy import select, update
+from app.database import SessionLocal
+from app.models import Notice, NoticeRaw
+from app.services.ingestion.ocds import release_regions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def backfill(session_factory=SessionLocal, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    reader = session_factory()
+    writer = session_factory()
+    written = 0
+    try:
+        stmt = select(NoticeRaw.ocid, NoticeRaw.release).join(Notice, Notice.ocid == NoticeRaw.ocid).where(
+            Notice.delivery_regions.is_(None),
+        )
+        result = reader.execute(stmt.execution_options(stream_results=True, yield_per=chunk_size))
+        for partition in result.partitions():
+            rows = [
+                {"ocid": ocid, "delivery_regions": regions}
+                for ocid, release in partition if (regions := release_regions(release))
+            ]
+            if rows:
+                writer.execute(update(Notice), rows)
+                writer.commit()
+                written += len(rows)
+            logger.info(f"Backfilled delivery regions for {written} notices so far.")
+        return written
+    finally:
+        reader.close()
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill notice delivery regions from stored releases")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    backfill(chunk_size=args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Re-ranks the Opportunity Feed read model (feed_entry).
+
+Match, tracking and alert writers keep their own feed rows current; ranks
+also depend on how close each deadline is and on alerts raised by the
+set-based renewal / lifecycle jobs, so this recomputes every org's feed,
+one org per transaction. Run daily, after the alert jobs (and once after
+the migration to populate the table).
+
+Usage: python -m app.workers.feed_refresh
+"""
+import argparse
+import logging
+from app.database import SessionLocal
+from app.services.matching.feed import feed_index
+
+logger = logging.getLogger(__name__)
+
+
+def refresh(session_factory=SessionLocal) -> int:
+    db = session_factory()
+    try:
+        return feed_index.refresh(db)
+    finally:
+        db.close()
+
+
+def main():
+    argparse.ArgumentParser(description="Re-rank feed_entry for every org").parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    refresh()
+
+
+if __name__ == "__main__":
+    main()
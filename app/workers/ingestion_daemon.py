@@ -0,0 +1,300 @@
+"""
+Long-running ingestion daemon.
+
+One warm process (buyer alias index, Interest Mesh, UKCAT ruleset and HTTP
+pools stay loaded) polls each configured source on its own schedule with
+jitter. Runs share one IngestionWorker, so they execute one at a time in a
+worker thread while the event loop keeps time. A poll is deferred while the
+enrichment backlog (recent notices still waiting for an embedding) is over
+its limit. SIGINT/SIGTERM stop the daemon after the current batch, with the
+FTS cursor checkpointed.
+
+Per-source lag (now minus newest ingested release date), throughput and run
+counts are logged after every run and, with --metrics-port, served in
+Prometheus text format on /metrics.
+
+Usage: python -m app.workers.ingestion_daemon [--source FTS=900] [--source CF=3600]
+       [--jitter 0.1] [--metrics-port 9108] [--max-enrichment-backlog 2000]
+"""
+import argparse
+import asyncio
+import logging
+import random
+import signal
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import func
+from app.database import SessionLocal
+from app.models import IngestionLog, Notice
+from app.services.ingestion.clients.cf_client import ContractsFinderClient, build_slices
+from app.workers.ingestion_worker import IngestionWorker
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVALS = {"FTS": 900.0, "CF": 3600.0}
+DEFAULT_JITTER = 0.1
+DEFAULT_MAX_ENRICHMENT_BACKLOG = 2000
+ENRICHMENT_BACKLOG_WINDOW = timedelta(days=1)
+CF_LOOKBACK_DAYS = 2
+
+
+class SourceMetrics:
+    __slots__ = ("runs", "failures", "deferred", "items_total", "last_items", "last_duration",
+                 "last_status", "last_run_at", "newest_release")
+
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        self.deferred = 0
+        self.items_total = 0
+        self.last_items = 0
+        self.last_duration = 0.0
+        self.last_status = None
+        self.last_run_at: Optional[float] = None
+        self.newest_release: Optional[datetime] = None
+
+    @property
+    def throughput(self) -> float:
+        return self.last_items / self.last_duration if self.last_duration else 0.0
+
+    def lag_seconds(self, now: Optional[datetime] = None) -> Optional[float]:
+        if self.newest_release is None:
+            return None
+        newest = self.newest_release
+        if newest.tzinfo is None:
+            newest = newest.replace(tzinfo=timezone.utc)
+        return max(((now or datetime.now(timezone.utc)) - newest).total_seconds(), 0.0)
+
+
+class IngestionMetrics:
+    """In-process counters/gauges per source, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self.sources: Dict[str, SourceMetrics] = {}
+
+    def source(self, name: str) -> SourceMetrics:
+        return self.sources.setdefault(name, SourceMetrics())
+
+    def render(self) -> str:
+        lines = []
+
+        def metric(name, kind, help_text, values):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for source, value in values:
+                if value is not None:
+                    lines.append(f'{name}{{source="{source}"}} {value}')
+
+        items = sorted(self.sources.items())
+        metric("ingestion_lag_seconds", "gauge", "Now minus the newest ingested release date.",
+               [(s, m.lag_seconds()) for s, m in items])
+        metric("ingestion_throughput_releases_per_second", "gauge", "Releases ingested per second in the last run.",
+               [(s, round(m.throughput, 3)) for s, m in items])
+        metric("ingestion_releases_total", "counter", "Releases ingested since the daemon started.",
+               [(s, m.items_total) for s, m in items])
+        metric("ingestion_runs_total", "counter", "Completed runs.", [(s, m.runs) for s, m in items])
+        metric("ingestion_failures_total", "counter", "Failed runs.", [(s, m.failures) for s, m in items])
+        metric("ingestion_deferred_total", "counter", "Polls deferred by enrichment backpressure.",
+               [(s, m.deferred) for s, m in items])
+        metric("ingestion_last_run_timestamp_seconds", "gauge", "Unix time the last run finished.",
+               [(s, m.last_run_at) for s, m in items])
+        return "\n".join(lines) + "\n"
+
+
+class IngestionDaemon:
+    def __init__(self, intervals: Optional[Dict[str, float]] = None, jitter: float = DEFAULT_JITTER,
+                 max_enrichment_backlog: int = DEFAULT_MAX_ENRICHMENT_BACKLOG,
+                 metrics_port: Optional[int] = None, worker: Optional[IngestionWorker] = None,
+                 session_factory=SessionLocal):
+        self.intervals = intervals or {"FTS": DEFAULT_INTERVALS["FTS"]}
+        self.jitter = jitter
+        self.max_enrichment_backlog = max_enrichment_backlog
+        self.metrics_port = metrics_port
+        self.worker = worker or IngestionWorker()
+        self.session_factory = session_factory
+        self.metrics = IngestionMetrics()
+        self.cf_client = ContractsFinderClient()
+        self._runners: Dict[str, Callable[[], None]] = {"FTS": self._run_fts, "CF": self._run_cf}
+        unknown = set(self.intervals) - set(self._runners)
+        if unknown:
+            raise ValueError(f"Unknown ingestion sources: {sorted(unknown)}")
+        self._stop: Optional[asyncio.Event] = None
+        self._run_lock: Optional[asyncio.Lock] = None
+
+    # --- Sources (run in a worker thread) ---
+
+    def _run_fts(self):
+        self.worker.run()
+
+    def _run_cf(self):
+        today = date.today()
+        slices = build_slices([None], [(today - timedelta(days=CF_LOOKBACK_DAYS), today)])
+        releases = (release for _, release in self.cf_client.fetch_releases(slices))
+        self.worker.ingest_stream(releases, source="CF")
+
+    # --- Scheduling ---
+
+    def next_delay(self, source: str) -> float:
+        interval = self.intervals[source]
+        return max(interval * (1 + random.uniform(-self.jitter, self.jitter)), 1.0)
+
+    def enrichment_backlog(self) -> int:
+        """
+        Recent mesh matches still waiting for an embedding. Only notices that
+        went through enrichment carry a UKCAT ruleset version, so this skips
+        the ones the mesh deliberately left unembedded; notices with no
+        description text are never embedded, so they don't count either.
+        """
+        db = self.session_factory()
+        try:
+            since = datetime.utcnow() - ENRICHMENT_BACKLOG_WINDOW
+            return db.query(func.count(Notice.ocid)).filter(
+                Notice.ukcat_ruleset_version != None, Notice.embedding == None,
+                Notice.description != None, Notice.description != '', Notice.updated_at >= since,
+            ).scalar() or 0
+        finally:
+            db.close()
+
+    def _record_run(self, source: str, duration: float, error: Optional[Exception]):
+        metrics = self.metrics.source(source)
+        db = self.session_factory()
+        try:
+            last = db.query(IngestionLog).filter(IngestionLog.source == source).order_by(
+                IngestionLog.started_at.desc()
+            ).first()
+            newest = db.query(func.max(IngestionLog.last_release_date)).filter(IngestionLog.source == source).scalar()
+        finally:
+            db.close()
+
+        metrics.runs += 1
+        metrics.last_duration = duration
+        metrics.last_run_at = time.time()
+        metrics.last_items = (last.items_processed or 0) if last else 0
+        metrics.items_total += metrics.last_items
+        metrics.last_status = "FAILED" if error else (last.status if last else None)
+        if metrics.last_status == "FAILED":
+            metrics.failures += 1
+        if newest:
+            metrics.newest_release = newest
+
+        lag = metrics.lag_seconds()
+        lag_text = f"{lag / 3600:.1f}h" if lag is not None else "unknown"
+        logger.info(
+            f"{source} run {metrics.last_status}: {metrics.last_items} releases in {duration:.0f}s "
+            f"({metrics.throughput:.1f}/s), lag {lag_text}"
+        )
+
+    async def _poll(self, source: str):
+        runner = self._runners[source]
+        delay = 0.0  # First poll immediately on start-up
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=delay)
+                return  # Stop requested while waiting
+            except asyncio.TimeoutError:
+                pass
+            delay = self.next_delay(source)
+
+            backlog = await asyncio.to_thread(self.enrichment_backlog)
+            if backlog > self.max_enrichment_backlog:
+                self.metrics.source(source).deferred += 1
+                logger.warning(f"{source} poll deferred: enrichment backlog {backlog} > {self.max_enrichment_backlog}")
+                continue
+
+            # One run at a time: sources share the worker's caches, which aren't thread-safe
+            async with self._run_lock:
+                if self._stop.is_set():
+                    return
+                started = time.monotonic()
+                error = None
+                try:
+                    await asyncio.to_thread(runner)
+                except Exception as e:
+                    error = e
+                    logger.error(f"{source} run failed: {e}")
+                await asyncio.to_thread(self._record_run, source, time.monotonic() - started, error)
+            logger.info(f"Next {source} poll in {delay:.0f}s")
+
+    async def _serve_metrics(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # Headers are irrelevant
+            path = request_line.split(b" ")[1] if len(request_line.split(b" ")) > 1 else b"/"
+            if path.startswith(b"/metrics"):
+                body, status = self.metrics.render().encode(), b"200 OK"
+            else:
+                body, status = b"not found\n", b"404 Not Found"
+            writer.write(
+                b"HTTP/1.1 " + status + b"\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    def stop(self):
+        logger.info("Shutdown requested: finishing the current batch.")
+        self.worker.request_stop()
+        if self._stop is not None:
+            self._stop.set()
+
+    async def run_async(self):
+        self._stop = asyncio.Event()
+        self._run_lock = asyncio.Lock()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):  # Not on the main thread / platform
+                pass
+
+        server = None
+        if self.metrics_port:
+            server = await asyncio.start_server(self._serve_metrics, port=self.metrics_port)
+            logger.info(f"Serving ingestion metrics on :{self.metrics_port}/metrics")
+
+        logger.info(f"Ingestion daemon started: {', '.join(f'{s} every {i:.0f}s' for s, i in self.intervals.items())}")
+        try:
+            await asyncio.gather(*(self._poll(source) for source in self.intervals))
+        finally:
+            if server:
+                server.close()
+                await server.wait_closed()
+        logger.info("Ingestion daemon stopped.")
+
+    def run(self):
+        asyncio.run(self.run_async())
+
+
+def _parse_sources(values: Optional[List[str]]) -> Dict[str, float]:
+    if not values:
+        return {"FTS": DEFAULT_INTERVALS["FTS"]}
+    intervals = {}
+    for value in values:
+        name, _, seconds = value.partition("=")
+        name = name.upper()
+        intervals[name] = float(seconds) if seconds else DEFAULT_INTERVALS.get(name, 3600.0)
+    return intervals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run ingestion continuously")
+    parser.add_argument("--source", action="append", default=None,
+                        help="SOURCE[=SECONDS] to poll, repeatable (FTS, CF). Default: FTS=900")
+    parser.add_argument("--jitter", type=float, default=DEFAULT_JITTER, help="Interval jitter as a fraction (default 0.1)")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on this port")
+    parser.add_argument("--max-enrichment-backlog", type=int, default=DEFAULT_MAX_ENRICHMENT_BACKLOG,
+                        help="Defer polls while more recent notices than this await embeddings")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    IngestionDaemon(
+        intervals=_parse_sources(args.source), jitter=args.jitter,
+        max_enrichment_backlog=args.max_enrichment_backlog, metrics_port=args.metrics_port,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,136 +1,415 @@
 import logging
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import httpx
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 from sqlalchemy.dialects.postgresql import insert
 from app.database import SessionLocal
-from app.models import Notice, Buyer, IngestionLog, ServiceProfile
+from app.models import Notice, NoticeLSHBand, NoticeRaw, IngestionLog
 from app.services.ingestion.clients.fts_client import FTSClient
-from app.services.ingestion.normalizer import Normalizer
+from app.services.ingestion.normalizer import Normalizer, release_content_hash
+from app.services.ingestion.ocds import parse_ocds_datetime
+from app.services.ingestion.buyer_resolver import BuyerResolver
+from app.services.ingestion.contract_awards import ContractAwardIndex
+from app.services.ingestion.dead_letter import DeadLetterQueue
 from app.services.ingestion.enrichment_service import EnrichmentService
+from app.services.ingestion.interest_mesh import interest_mesh
+from app.services.ingestion.near_duplicates import NearDuplicateDetector
 from app.services.alerts.alert_service import AlertService
+from app.services.matching.buyer_history import buyer_history
+from app.services.matching.feed import feed_index
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_START_DATE = datetime(2023, 1, 1)
+
+# FTS answers an expired/unknown links.next cursor with one of these
+EXPIRED_CURSOR_STATUSES = {400, 404, 410}
+
+# Columns refreshed when a release updates a notice we already hold
+NOTICE_UPDATE_COLUMNS = [
+    'title', 'description', 'embedding', 'value_amount', 'deadline_date', 'notice_type',
+    'inferred_ukcat_codes', 'ukcat_ruleset_version', 'ukcat_prefix_ids',
+    'release_id', 'main_procurement_category', 'content_hash', 'minhash', 'delivery_regions',
+]
+
+def _parse_release_date(value: Optional[str]) -> Optional[datetime]:
+    parsed = parse_ocds_datetime(value)
+    if parsed is None:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def _batched(items: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
 class IngestionWorker:
     def __init__(self):
         self.fts_client = FTSClient()
         self.normalizer = Normalizer()
-        self._mesh = None
-
-    def _get_mesh(self, db: Session):
-        """Builds a cached Global Interest Mesh from all charity profiles."""
-        if self._mesh is not None:
-            return self._mesh
-            
-        profiles = db.query(ServiceProfile).all()
-        cpv_pool = set()
-        for p in profiles:
-            if p.inferred_cpv_codes:
-                cpv_pool.update(c[:4] for c in p.inferred_cpv_codes)
-        
-        self._mesh = {
-            "cpv_prefixes": cpv_pool
+        self.buyer_resolver = BuyerResolver()
+        self.dead_letters = DeadLetterQueue()
+        self.mesh = interest_mesh
+        self.near_duplicates = NearDuplicateDetector()
+        self.buyer_history = buyer_history
+        self.contract_awards = ContractAwardIndex()
+        self.stop_event = threading.Event()
+
+    def request_stop(self):
+        """Asks a run in progress (on any thread) to stop at the next page/batch boundary."""
+        self.stop_event.set()
+
+    def _execute_rows(self, db: Session, build_stmt, rows: List[Dict], key: str,
+                      failures: Optional[List[Tuple[str, Exception]]] = None) -> List:
+        """
+        Runs build_stmt(rows) as one multi-row statement inside a savepoint.
+        If it fails, retries row by row - each in its own savepoint - so a
+        single bad release is skipped instead of rolling back the batch.
+        Skipped rows are appended to `failures` as (row[key], error).
+        """
+        if not rows:
+            return []
+        try:
+            with db.begin_nested():
+                return list(db.execute(build_stmt(rows)))
+        except Exception as e:
+            logger.warning(f"Batch of {len(rows)} failed ({e}); isolating rows.")
+
+        results = []
+        for row in rows:
+            try:
+                with db.begin_nested():
+                    results.extend(db.execute(build_stmt([row])))
+            except Exception as inner_e:
+                logger.error(f"Failed to process release {row.get(key)}: {inner_e}")
+                if failures is not None:
+                    failures.append((row.get(key), inner_e))
+        return results
+
+    def _notice_upsert(self, rows: List[Dict]):
+        stmt = insert(Notice).values(rows)
+        set_ = {col: stmt.excluded[col] for col in NOTICE_UPDATE_COLUMNS}
+        # A notice keeps its cluster once it has one; rows clustered before this column existed take the new one
+        set_['cluster_id'] = func.coalesce(Notice.cluster_id, stmt.excluded.cluster_id)
+        set_['updated_at'] = datetime.utcnow()
+        return stmt.on_conflict_do_update(index_elements=['ocid'], set_=set_).returning(Notice.ocid)
+
+    def _band_insert(self, rows: List[Dict]):
+        return insert(NoticeLSHBand).values(rows).on_conflict_do_nothing().returning(NoticeLSHBand.ocid)
+
+    def _raw_upsert(self, rows: List[Dict]):
+        stmt = insert(NoticeRaw).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=['ocid'], set_={'release': stmt.excluded.release}
+        ).returning(NoticeRaw.ocid)
+
+    def _process_batch(self, db: Session, releases: List[Dict], enrichment_service: EnrichmentService,
+                       alert_service: AlertService, notice_type: Optional[str] = None,
+                       source: str = "FTS") -> Tuple[int, int]:
+        """
+        Ingests a batch of releases with one round trip per stage and a single commit.
+        Returns (ingested, skipped) - skipped releases match the stored content hash.
+        `notice_type` overrides the mapped type (backfills store "historical").
+        Releases that fail are dead-lettered under `source` in the same commit.
+        """
+        # Last release wins when an OCID repeats within the batch
+        latest = {}
+        for release in releases:
+            if release.get('ocid'):
+                latest[release['ocid']] = release
+            else:
+                logger.error(f"Failed to process release {release.get('id')}: missing ocid")
+
+        # Current rows in one IN query: content hash for the short-circuit, clusters for dedup
+        existing = {
+            row.ocid: row for row in db.query(
+                Notice.ocid, Notice.content_hash, Notice.cluster_id,
+            ).filter(Notice.ocid.in_(list(latest)))
         }
-        logger.info(f"Global Interest Mesh built with {len(cpv_pool)} CPV prefixes.")
-        return self._mesh
-
-    def _is_mesh_match(self, db: Session, notice: Notice) -> bool:
-        """Checks if a notice matches the global interest criteria."""
-        mesh = self._get_mesh(db)
-        
-        # 1. CPV Check (Strictest filter)
-        if not notice.cpv_codes:
-            return True # Neutral fallback
-            
-        notice_prefixes = set(c[:4] for c in notice.cpv_codes)
-        if notice_prefixes & mesh["cpv_prefixes"]:
-            return True
-            
-        return False
-
-    def run(self, limit=None, start_date=None):
+
+        # 0. Re-publications with identical content: nothing to normalise, enrich, diff or write
+        releases = []
+        for ocid, release in latest.items():
+            row = existing.get(ocid)
+            if row is None or row.content_hash != release_content_hash(release):
+                releases.append(release)
+        skipped = len(latest) - len(releases)
+        if not releases:
+            return 0, skipped
+
+        # 1. Buyers: resolved by identifier / name / fuzzy alias, in memory once warm
+        buyer_ids = self.buyer_resolver.resolve_releases(db, releases)
+
+        # 2. Process Notices (Metadata Only)
+        notices = []
+        failed = []
+        for release, buyer_id in zip(releases, buyer_ids):
+            try:
+                notice = self.normalizer.map_release_to_notice(release, buyer_id)
+            except Exception as e:
+                logger.error(f"Failed to process release {release.get('ocid')}: {e}")
+                failed.append((release, e))
+                continue
+            if notice_type:
+                notice.notice_type = notice_type
+            notices.append(notice)
+
+        # 3. Near-duplicate clusters (one LSH bucket lookup per batch); duplicates aren't enriched
+        band_rows = self.near_duplicates.assign(db, notices, known_clusters={
+            ocid: row.cluster_id for ocid, row in existing.items() if row.cluster_id
+        })
+        canonical = [n for n in notices if n.cluster_id == n.ocid]
+        if len(canonical) < len(notices):
+            logger.debug(f"Near-duplicates: {len(notices) - len(canonical)}/{len(notices)} notices joined an existing cluster")
+
+        # 4. Lazy Enrichment for mesh matches (one embeddings call per batch)
+        mesh_matches = [n for n in canonical if self.mesh.matches_notice(db, n, n.raw_json)]
+        logger.debug(f"Selective Ingestion: {len(mesh_matches)}/{len(canonical)} notices matched the mesh")
+        if mesh_matches:
+            enrichment_service.enrich_batch(mesh_matches)
+
+        # 5. PRD 04: Detect Material Changes against current rows (one diff query, one alert INSERT ... SELECT)
+        changed = alert_service.process_batch_changes([{
+            "ocid": notice.ocid,
+            "target": notice.cluster_id or notice.ocid,
+            "deadline_date": notice.deadline_date,
+            "value_amount": notice.value_amount,
+            # A backfill relabelling the type is not a material change
+            "notice_type": None if notice_type else notice.notice_type,
+            **{f: getattr(notice, f) for f in alert_service.watched_fields},
+        } for notice in notices if notice.ocid in existing])
+        for ocid, changes in changed.items():
+            logger.info(f"Material change detected in notice {ocid}: {changes}")
+
+        # 6. Upsert Notices, then their compressed raw releases and LSH bands: one statement each, one commit
+        rows = [{c.name: getattr(n, c.name) for c in Notice.__table__.columns} for n in notices]
+        row_failures = []
+        upserted = {ocid for (ocid,) in self._execute_rows(db, self._notice_upsert, rows, 'ocid', row_failures)}
+        raw_rows = [{'ocid': n.ocid, 'release': n.raw_json} for n in notices if n.ocid in upserted]
+        self._execute_rows(db, self._raw_upsert, raw_rows, 'ocid', row_failures)
+        self._execute_rows(db, self._band_insert, [b for b in band_rows if b['ocid'] in upserted], 'ocid')
+        # Award notices extend their buyer x category history (Renewal Radar)
+        self.buyer_history.record(db, [n for n in notices if n.ocid in upserted])
+        # ... and replace their normalised award/supplier rows
+        self.contract_awards.record(db, [n for n in notices if n.ocid in upserted])
+        # ... and re-sync the feed rows of their matches from the rows just written
+        feed_index.sync(db, notice_ids={n.cluster_id or n.ocid for n in notices if n.ocid in upserted})
+
+        # 7. Dead-letter what failed, resolve what previously failed and now went through
+        failed.extend((latest[ocid], e) for ocid, e in row_failures)
+        self.dead_letters.record(db, failed, source, notice_type)
+        self.dead_letters.resolve(db, upserted - {ocid for ocid, _ in row_failures})
+        db.commit()
+        return len(upserted), skipped
+
+    def _dead_letter_batch(self, db: Session, releases: List[Dict], error: Exception, source: str,
+                           notice_type: Optional[str] = None):
+        """After a whole batch rolled back, keeps its releases for replay (best effort)."""
+        try:
+            self.dead_letters.record(db, [(r, error) for r in releases], source, notice_type)
+            db.commit()
+        except Exception as e:
+            logger.error(f"Could not dead-letter batch of {len(releases)} releases: {e}")
+            db.rollback()
+
+    def ingest_stream(self, releases: Iterable[Dict], source: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                      notice_type: Optional[str] = None) -> int:
+        """
+        Ingests releases from any iterator (e.g. a Contracts Finder backfill)
+        through the same batched path as run(), as they arrive. Records an
+        IngestionLog for `source` and returns the number ingested.
+        Stops early (status INTERRUPTED) once request_stop() is called.
+        """
+        db = SessionLocal()
+        enrichment_service = EnrichmentService(db)
+        alert_service = AlertService(db)
+        log_entry = IngestionLog(source=source, status="RUNNING")
+        db.add(log_entry)
+        db.commit()
+
+        count = 0
+        skipped = 0
+        newest = None
+        stopped = False
+        started = time.monotonic()
+        try:
+            for batch in _batched(releases, batch_size):
+                for release in batch:
+                    release_date = _parse_release_date(release.get('date'))
+                    if release_date and (newest is None or release_date > newest):
+                        newest = release_date
+                try:
+                    ingested, unchanged = self._process_batch(
+                        db, batch, enrichment_service, alert_service, notice_type, source=source
+                    )
+                    count += ingested
+                    skipped += unchanged
+                except Exception as batch_e:
+                    logger.error(f"Failed to process batch of {len(batch)} releases: {batch_e}")
+                    db.rollback()
+                    self.buyer_resolver.invalidate()
+                    self.contract_awards.resolver.invalidate()
+                    self._dead_letter_batch(db, batch, batch_e, source, notice_type)
+                rate = count / max(time.monotonic() - started, 1e-6)
+                logger.info(f"{source}: ingested {count} releases ({rate:.1f}/s), skipped {skipped} unchanged.")
+                if self.stop_event.is_set():
+                    logger.info(f"{source}: stop requested, ending after this batch.")
+                    stopped = True
+                    break
+
+            log_entry.status = "INTERRUPTED" if stopped else "SUCCESS"
+            log_entry.items_processed = count
+            log_entry.items_skipped = skipped
+            log_entry.last_release_date = newest
+            log_entry.completed_at = datetime.utcnow()
+            db.commit()
+        except Exception as e:
+            logger.error(f"{source} ingestion failed: {e}")
+            db.rollback()
+            log_entry.status = "FAILED"
+            log_entry.items_processed = count
+            log_entry.error_details = str(e)
+            db.commit()
+            raise
+        finally:
+            db.close()
+        return count
+
+    def _resume_point(self, db: Session) -> Tuple[Optional[str], datetime]:
+        """
+        Where the next run starts: the saved links.next cursor of an unfinished
+        run, else just after the last release a previous run checkpointed.
+        """
+        last_run = db.query(IngestionLog).filter(
+            IngestionLog.source == "FTS",
+            IngestionLog.status.in_(["RUNNING", "FAILED", "INTERRUPTED", "SUCCESS"]),
+        ).order_by(IngestionLog.started_at.desc()).first()
+        if last_run and last_run.status != "SUCCESS" and last_run.cursor_url:
+            return last_run.cursor_url, last_run.last_release_date
+
+        checkpointed = db.query(func.max(IngestionLog.last_release_date)).filter(IngestionLog.source == "FTS").scalar()
+        if checkpointed:
+            return None, checkpointed
+        last_success = db.query(IngestionLog).filter(
+            IngestionLog.source == "FTS", IngestionLog.status == "SUCCESS"
+        ).order_by(IngestionLog.completed_at.desc()).first()
+        return None, last_success.completed_at if last_success else DEFAULT_START_DATE
+
+    def _fetch_pages(self, cursor_url: Optional[str], start_date: datetime) -> Iterator[Dict]:
+        """Pages from the saved cursor, falling back to the date window if FTS rejects it."""
+        if cursor_url:
+            try:
+                pages = iter(self.fts_client.fetch_pages(cursor_url=cursor_url))
+                first = next(pages, None)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in EXPIRED_CURSOR_STATUSES:
+                    raise
+                logger.warning(f"Saved cursor rejected (HTTP {e.response.status_code}); resuming from {start_date}.")
+            else:
+                if first is not None:
+                    yield first
+                    yield from pages
+                return
+        yield from self.fts_client.fetch_pages(updated_after=start_date)
+
+    def run(self, limit=None, start_date=None, batch_size: int = DEFAULT_BATCH_SIZE):
         db = SessionLocal()
         enrichment_service = EnrichmentService(db)
         alert_service = AlertService(db)
-        
-        log_entry = IngestionLog(source="FTS", status="RUNNING")
+
+        # Resume point is read before this run's own log row exists
+        cursor_url = None
+        if not start_date:
+            cursor_url, start_date = self._resume_point(db)
+            start_date = start_date or DEFAULT_START_DATE
+
+        log_entry = IngestionLog(source="FTS", status="RUNNING", cursor_url=cursor_url)
         db.add(log_entry)
         db.commit()
 
         try:
-            # Determine start date (e.g., provided, last run, or default)
-            if not start_date:
-                last_run = db.query(IngestionLog).filter(IngestionLog.status == "SUCCESS").order_by(IngestionLog.completed_at.desc()).first()
-                start_date = last_run.completed_at if last_run else datetime(2023, 1, 1)
+            if cursor_url:
+                logger.info(f"Resuming FTS ingestion from saved cursor: {cursor_url}")
 
             count = 0
-            for release in self.fts_client.fetch_releases(updated_after=start_date):
+            skipped = 0
+            seen = 0
+            batch = []
+            started = time.monotonic()
+            # Cursor/date after the last page whose releases are all in the batch
+            page_cursor, page_date = cursor_url, None
+            checkpointing = True
+            stopped = False
+
+            def flush():
+                nonlocal count, skipped, batch, checkpointing
                 try:
-                    # 1. Process Buyer
-                    buyer_data = self.normalizer.normalize_buyer(release.get('buyer', {}))
-                    buyer_stmt = insert(Buyer).values(**buyer_data).on_conflict_do_update(
-                        index_elements=['slug'],
-                        set_={"canonical_name": buyer_data['canonical_name']}
-                    )
-                    db.execute(buyer_stmt)
-                    # Fetch buyer ID
-                    buyer = db.query(Buyer).filter(Buyer.slug == buyer_data['slug']).first()
-                    
-                    # 2. Process Notice (Metadata Only)
-                    notice = self.normalizer.map_release_to_notice(release, buyer.id)
-                    
-                    # --- NEW: Lazy Enrichment Check ---
-                    if self._is_mesh_match(db, notice):
-                        logger.info(f"Mesh Match! Triggering enrichment for {notice.ocid}")
-                        enrichment_service.enrich_notice(notice)
-                    else:
-                        logger.debug(f"Selective Ingestion: Skipping enrichment for {notice.ocid}")
-                    
-                    # --- PRD 04: Detect Material Changes ---
-                    existing_notice = db.query(Notice).filter(Notice.ocid == notice.ocid).first()
-                    if existing_notice:
-                        changes = alert_service.check_for_changes(existing_notice, {
-                            "deadline_date": notice.deadline_date,
-                            "value_amount": notice.value_amount,
-                            "notice_type": notice.notice_type
-                        })
-                        if changes:
-                            logger.info(f"Material change detected in notice {notice.ocid}: {changes}")
-                            alert_service.process_change(notice.ocid, changes)
-
-                    # 3. Upsert Notice
-                    notice_data = {c.name: getattr(notice, c.name) for c in notice.__table__.columns}
-                    
-                    stmt = insert(Notice).values(**notice_data).on_conflict_do_update(
-                        index_elements=['ocid'],
-                        set_={
-                            'title': notice.title,
-                            'description': notice.description,
-                            'embedding': notice.embedding,
-                            'value_amount': notice.value_amount,
-                            'deadline_date': notice.deadline_date,
-                            'notice_type': notice.notice_type,
-                            'inferred_ukcat_codes': notice.inferred_ukcat_codes,
-                            'updated_at': datetime.utcnow()
-                        }
-                    )
-                    db.execute(stmt)
-                    db.commit() # Commit each record
-                    
-                    count += 1
-                    
-                    if limit and count >= limit:
-                        logger.info(f"Limit of {limit} reached, stopping.")
-                        break
-
-                except Exception as inner_e:
-                    logger.error(f"Failed to process release {release.get('ocid')}: {inner_e}")
+                    ingested, unchanged = self._process_batch(db, batch, enrichment_service, alert_service)
+                    count += ingested
+                    skipped += unchanged
+                except Exception as batch_e:
+                    logger.error(f"Failed to process batch of {len(batch)} releases: {batch_e}")
                     db.rollback()
-                    continue
+                    self.buyer_resolver.invalidate()  # may hold buyers that were rolled back
+                    self.contract_awards.resolver.invalidate()
+                    checkpointing = False  # a resumed run must start before this batch
+                    self._dead_letter_batch(db, batch, batch_e, "FTS")
+                batch = []
+                rate = count / max(time.monotonic() - started, 1e-6)
+                logger.info(f"Ingested {count} releases ({rate:.1f}/s), skipped {skipped} unchanged.")
+
+            def checkpoint():
+                if not checkpointing:
+                    return
+                log_entry.cursor_url = page_cursor
+                if page_date:
+                    log_entry.last_release_date = page_date
+                log_entry.items_processed = count
+                log_entry.items_skipped = skipped
+                db.commit()
+
+            for page in self._fetch_pages(cursor_url, start_date):
+                releases = page.get('releases', [])
+                if limit:
+                    releases = releases[:max(limit - seen, 0)]
+                batch.extend(releases)
+                seen += len(releases)
+
+                page_cursor = page.get('links', {}).get('next')
+                for release in releases:
+                    release_date = _parse_release_date(release.get('date'))
+                    if release_date and (page_date is None or release_date > page_date):
+                        page_date = release_date
+
+                # Flush on page boundaries only, so every checkpoint covers whole pages
+                if len(batch) >= batch_size:
+                    flush()
+                    checkpoint()
+                if limit and seen >= limit:
+                    logger.info(f"Limit of {limit} reached, stopping.")
+                    break
+                if self.stop_event.is_set():
+                    logger.info("Stop requested, checkpointing and ending the run.")
+                    stopped = True
+                    break
+
+            if batch:
+                flush()
+            checkpoint()
 
-            log_entry.status = "SUCCESS"
+            log_entry.status = "INTERRUPTED" if stopped else "SUCCESS"
             log_entry.items_processed = count
+            log_entry.items_skipped = skipped
             log_entry.completed_at = datetime.utcnow()
             db.commit()
 
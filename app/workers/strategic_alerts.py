@@ -0,0 +1,46 @@
+"""
+Scheduled strategic lifecycle alerts.
+
+Optionally recomputes procurement_forecast first (one SQL pass over every
+historical contract), then raises PLAN / DEFINE / PROCURE alerts for each
+forecast re-tender whose stage is open today, for every interested org.
+Orgs are processed in parallel chunks; alerts already raised are skipped,
+so the job can run daily.
+
+Usage: python -m app.workers.strategic_alerts [--refresh-forecast] [--workers 4] [--chunk-size 50]
+"""
+import argparse
+import logging
+from app.database import SessionLocal
+from app.services.matching.renewal_intelligence import (
+    DEFAULT_ORG_CHUNK_SIZE, DEFAULT_WORKERS, RenewalIntelligenceService,
+)
+from app.workers.procurement_forecast import ProcurementForecaster
+
+logger = logging.getLogger(__name__)
+
+
+def run(refresh_forecast: bool = False, workers: int = DEFAULT_WORKERS,
+        chunk_size: int = DEFAULT_ORG_CHUNK_SIZE, session_factory=SessionLocal) -> int:
+    if refresh_forecast:
+        ProcurementForecaster(session_factory).run()
+    db = session_factory()
+    try:
+        return RenewalIntelligenceService(db).generate_strategic_alerts(workers=workers, chunk_size=chunk_size)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Raise strategic lifecycle alerts from procurement forecasts")
+    parser.add_argument("--refresh-forecast", action="store_true", help="Recompute procurement_forecast first")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_ORG_CHUNK_SIZE, help="Orgs per statement")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    run(refresh_forecast=args.refresh_forecast, workers=args.workers, chunk_size=args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
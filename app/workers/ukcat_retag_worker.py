@@ -0,0 +1,133 @@
+"""
+Bulk UKCAT re-tagging.
+
+Every notice and profile records the ukcat.csv hash its tags were built
+from. When the CSV changes, this worker streams the stale rows through a
+server-side cursor, tags them in a process pool and writes the results
+back with batched UPDATEs - no re-ingest required.
+
+Usage: python -m app.workers.ukcat_retag_worker [--batch-size 1000] [--processes 4]
+"""
+import argparse
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import select, update, or_
+from app.database import SessionLocal
+from app.models import Notice, ServiceProfile
+from app.services.matching.ukcat_tagger import tagger
+from app.services.matching.ukcat_ruleset import expand_ukcat_codes
+
+logger = logging.getLogger(__name__)
+
+NoticeText = Tuple[str, Optional[str], Optional[str]]  # (ocid, title, description)
+
+
+def _tag_notice_batch(rows: List[NoticeText]) -> Tuple[str, List[Tuple[str, List[str]]]]:
+    """Process-pool entry point. Each worker process loads the cached ruleset once."""
+    return tagger.version, [(ocid, tagger.tag_notice(title, description)) for ocid, title, description in rows]
+
+
+class UKCATRetagWorker:
+    def __init__(self, session_factory=SessionLocal, batch_size: int = 1000, processes: Optional[int] = None):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.processes = processes if processes is not None else (os.cpu_count() or 1)
+
+    def _stale(self, model):
+        version = model.ukcat_ruleset_version
+        return or_(version.is_(None), version != tagger.version)
+
+    def _stream_stale_notices(self, db) -> Iterator[List[NoticeText]]:
+        """Yields batches of stale notice text via a server-side cursor."""
+        stmt = select(Notice.ocid, Notice.title, Notice.description).where(self._stale(Notice))
+        result = db.execute(stmt.execution_options(stream_results=True, yield_per=self.batch_size))
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
+    def _write_batch(self, db, version: str, tagged: List[Tuple[str, List[str]]]) -> int:
+        if not tagged:
+            return 0
+        db.execute(update(Notice), [
+            {
+                "ocid": ocid,
+                "inferred_ukcat_codes": codes or None,
+                "ukcat_prefix_ids": expand_ukcat_codes(codes) or None,
+                "ukcat_ruleset_version": version,
+            }
+            for ocid, codes in tagged
+        ])
+        db.commit()
+        return len(tagged)
+
+    def retag_notices(self) -> int:
+        """Re-tags every notice whose tags predate the current ruleset."""
+        version = tagger.version
+        reader = self.session_factory()
+        writer = self.session_factory()
+        updated = 0
+
+        try:
+            batches = self._stream_stale_notices(reader)
+
+            if self.processes <= 1:
+                for batch in batches:
+                    updated += self._write_result(writer, version, _tag_notice_batch(batch))
+            else:
+                with ProcessPoolExecutor(max_workers=self.processes) as pool:
+                    # Bound in-flight batches so a huge table never sits in memory.
+                    pending = []
+                    for batch in batches:
+                        pending.append(pool.submit(_tag_notice_batch, batch))
+                        if len(pending) >= self.processes * 2:
+                            updated += self._write_result(writer, version, pending.pop(0).result())
+                    for future in pending:
+                        updated += self._write_result(writer, version, future.result())
+        finally:
+            reader.close()
+            writer.close()
+
+        logger.info(f"Re-tagged {updated} notices with UKCAT ruleset {version}.")
+        return updated
+
+    def _write_result(self, db, version: str, result) -> int:
+        batch_version, tagged = result
+        if batch_version != version:
+            # ukcat.csv changed mid-run; leave these stale for the next run.
+            logger.warning(f"Worker used ruleset {batch_version}, expected {version}. Skipping batch.")
+            return 0
+        return self._write_batch(db, version, tagged)
+
+    def retag_profiles(self) -> int:
+        """Re-tags stale service profiles in-process (the table is small)."""
+        version = tagger.version
+        db = self.session_factory()
+        try:
+            profiles = db.query(ServiceProfile).filter(self._stale(ServiceProfile)).all()
+            for profile in profiles:
+                profile.inferred_ukcat_codes = tagger.tag_profile(profile) or None
+                profile.ukcat_ruleset_version = version
+            db.commit()
+            return len(profiles)
+        finally:
+            db.close()
+
+    def run(self) -> Dict[str, int]:
+        logger.info(f"Starting UKCAT re-tag with ruleset {tagger.version}.")
+        stats = {
+            "notices": self.retag_notices(),
+            "profiles": self.retag_profiles(),
+        }
+        logger.info(f"UKCAT re-tag complete: {stats}")
+        return stats
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Re-tag notices and profiles whose UKCAT ruleset is stale')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Rows per cursor fetch / UPDATE batch')
+    parser.add_argument('--processes', type=int, default=None, help='Tagging processes (default: CPU count)')
+    args = parser.parse_args()
+
+    UKCATRetagWorker(batch_size=args.batch_size, processes=args.processes).run()
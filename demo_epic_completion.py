@@ -106,16 +106,17 @@ def run_demo():
     release_2["id"] = "rel-2"
     release_2["tender"]["value"]["amount"] = 150000
     
-    existing_notice = db.get(Notice, ocid)
-    changes = alert_service.check_for_changes(existing_notice, {
+    changed = alert_service.process_batch_changes([{
+        "ocid": ocid,
+        "target": ocid,
         "value_amount": 150000,
         "deadline_date": None,
         "notice_type": "contractAward"
-    })
+    }])
     
-    if changes:
-        print(f"Detected changes: {changes}")
-        alert_service.process_change(ocid, changes)
+    if changed:
+        print(f"Detected changes: {changed[ocid]}")
+        db.commit()
         print("✓ Changes processed")
 
     print("--- 5. Run Renewal Scanner ---")
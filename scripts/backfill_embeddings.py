@@ -9,11 +9,16 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from app.database import SessionLocal
 from app.models import Notice
 from app.services.ingestion.embeddings import EmbeddingService
+from app.services.ingestion.interest_mesh import interest_mesh
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def backfill_embeddings(batch_size=50):
+    """
+    Embeds notices that are missing an embedding and match the Interest Mesh.
+    Walks the backlog by ocid, so notices the mesh skips aren't re-read every batch.
+    """
     db = SessionLocal()
     embeddings_service = EmbeddingService()
     
@@ -26,46 +31,41 @@ def backfill_embeddings(batch_size=50):
             return
 
         processed = 0
+        embedded = 0
+        last_ocid = ""
         while True:
-            # Fetch a batch of notices without embeddings
-            notices = db.query(Notice).filter(Notice.embedding == None).limit(batch_size).all()
+            # Fetch the next batch of notices without embeddings
+            notices = db.query(Notice).filter(
+                Notice.embedding == None, Notice.ocid > last_ocid
+            ).order_by(Notice.ocid).limit(batch_size).all()
             if not notices:
                 break
-                
-            logger.info(f"Processing batch of {len(notices)} notices...")
-            
-            # Map descriptions to embeddings
-            descriptions = [n.description for n in notices if n.description]
-            if not descriptions:
-                # If no descriptions, we might want to skip or mark them somehow
-                # For now, we'll just skip them in this loop or they'll keep being returned by limit
-                for n in notices:
-                    if not n.description:
-                        n.embedding = [] # Empty vector for notices with no description
-                db.commit()
+            last_ocid = notices[-1].ocid
+            processed += len(notices)
+
+            # Only pay for notices some profile could care about (and that have text to embed),
+            # once per near-duplicate cluster
+            to_embed = [
+                n for n in notices
+                if n.description and n.cluster_id in (None, n.ocid) and interest_mesh.matches_notice(db, n)
+            ]
+            if not to_embed:
                 continue
 
             try:
-                # Get embeddings in batch
-                batch_vectors = embeddings_service.get_embeddings_batch(descriptions)
-                
-                # Update notices
-                desc_idx = 0
-                for n in notices:
-                    if n.description:
-                        n.embedding = batch_vectors[desc_idx]
-                        desc_idx += 1
-                
+                batch_vectors = embeddings_service.get_embeddings_batch([n.description for n in to_embed])
+                for n, vector in zip(to_embed, batch_vectors):
+                    n.embedding = vector
                 db.commit()
-                processed += len(notices)
-                logger.info(f"Progress: {processed}/{missing_count} processed.")
+                embedded += len(to_embed)
+                logger.info(f"Progress: {processed}/{missing_count} scanned, {embedded} embedded.")
                 
             except Exception as e:
                 logger.error(f"Error processing batch: {e}")
                 db.rollback()
                 break
                 
-        logger.info("Backfill complete.")
+        logger.info(f"Backfill complete. Embedded {embedded} of {processed} scanned notices.")
         
     finally:
         db.close()
@@ -4,13 +4,16 @@ import ijson
 import gzip
 import logging
 import requests
-from datetime import datetime
 from decimal import Decimal
 from typing import Optional, List
 from sqlalchemy.orm import Session
 from app.database import SessionLocal
-from app.models import Notice, Buyer, IngestionLog
+from app.models import Notice, IngestionLog
 from app.services.ingestion.enrichment_service import EnrichmentService
+from app.services.ingestion.buyer_resolver import BuyerResolver
+from app.services.ingestion.normalizer import Normalizer
+from app.services.ingestion.ocds import decode_release
+from app.services.matching.buyer_history import buyer_history
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,22 +23,8 @@ class BackfillWorker:
     def __init__(self):
         self.db: Session = SessionLocal()
         self.enrichment_service = EnrichmentService(self.db)
-        self._buyer_cache = {}
-
-    def get_or_create_buyer(self, name: str, identifiers: Optional[List] = None) -> Buyer:
-        """Cache-backed buyer lookup."""
-        if name in self._buyer_cache:
-            return self._buyer_cache[name]
-        
-        buyer = self.db.query(Buyer).filter(Buyer.canonical_name == name).first()
-        if not buyer:
-            buyer = Buyer(canonical_name=name, identifiers=identifiers)
-            self.db.add(buyer)
-            self.db.commit()
-            self.db.refresh(buyer)
-        
-        self._buyer_cache[name] = buyer
-        return buyer
+        self.buyer_resolver = BuyerResolver()
+        self.normalizer = Normalizer()
 
     def process_release(self, release: dict):
         """Maps OCDS release to Notice model."""
@@ -48,70 +37,22 @@ class BackfillWorker:
         if existing:
             return
 
-        tender = release.get("tender", {})
-        buyer_data = release.get("buyer", {})
-        
-        # 2. Handle Buyer
-        buyer_name = buyer_data.get("name") or "Unknown Buyer"
-        buyer = self.get_or_create_buyer(buyer_name)
-
-        # 3. Map Fields
-        pub_date_str = release.get("date")
-        pub_date = datetime.fromisoformat(pub_date_str.replace("Z", "+00:00")) if pub_date_str else datetime.now()
-
-        # CPV Codes
-        cpv_codes = []
-        for item in tender.get("items", []):
-            cpv = item.get("classification", {}).get("id")
-            if cpv and cpv not in cpv_codes:
-                cpv_codes.append(cpv)
-
-        # Contract Period
-        contract_start = None
-        contract_end = None
-        
-        # Look in tender if explicitly defined (common in FTS)
-        period = tender.get("tenderPeriod", {})
-        if not period:
-             # Look in awards or contracts
-             awards = release.get("awards", [])
-             if awards:
-                 period = awards[0].get("contractPeriod", {})
-        
-        if period:
-            start_str = period.get("startDate")
-            end_str = period.get("endDate")
-            if start_str: contract_start = datetime.fromisoformat(start_str.replace("Z", "+00:00"))
-            if end_str: contract_end = datetime.fromisoformat(end_str.replace("Z", "+00:00"))
+        # 2. Handle Buyer (identifier / name / fuzzy alias resolution)
+        buyer_id = self.buyer_resolver.resolve(self.db, release)
 
-        # Value
-        value_amount = 0
-        value_currency = "GBP"
-        val_obj = tender.get("value") or (release.get("awards", [{}])[0].get("value") if release.get("awards") else {})
-        if val_obj:
-            value_amount = val_obj.get("amount", 0)
-            value_currency = val_obj.get("currency", "GBP")
+        # 3. Map Fields through the shared typed decoder
+        decoded = decode_release(release)
+        row = self.normalizer.release_to_row(release, decoded)
+        if row["value_amount"] is None and decoded.award_value:
+            row["value_amount"], row["value_currency"] = decoded.award_value.amount, decoded.award_value.currency
+        row["value_amount"] = Decimal(str(row["value_amount"] or 0))
+        row["notice_type"] = "historical"  # Mark as historical backfill
 
         # 4. Create Notice
-        notice = Notice(
-            ocid=ocid,
-            release_id=release.get("id"),
-            title=tender.get("title") or "No Title",
-            description=tender.get("description"),
-            buyer_id=buyer.id,
-            publication_date=pub_date,
-            deadline_date=None, # Inferred if needed
-            value_amount=Decimal(str(value_amount)),
-            value_currency=value_currency,
-            procurement_method=tender.get("procurementMethod"),
-            notice_type="historical", # Mark as historical backfill
-            raw_json=release,
-            cpv_codes=cpv_codes,
-            contract_period_start=contract_start,
-            contract_period_end=contract_end
-        )
+        notice = Notice(buyer_id=buyer_id, raw_json=release, **row)
 
         self.db.add(notice)
+        buyer_history.record(self.db, [notice])
         
         # 5. Flush periodically (Commit happens in batches outside)
         return notice
@@ -146,6 +87,7 @@ class BackfillWorker:
                     except Exception as e:
                         logger.error(f"Error processing release {release.get('ocid')}: {e}")
                         self.db.rollback()
+                        self.buyer_resolver.invalidate()
 
                 self.db.commit()
                 logger.info(f"Backfill complete. Total: {count}")
@@ -0,0 +1,129 @@
+"""
+Benchmark release -> Notice row mapping: the typed OCDS decoder against the
+previous dict-walking mapper it replaced (kept here as the baseline).
+Verifies both produce identical rows before timing them.
+Usage: python scripts/benchmark_ocds_decoder.py [--file data/fts_sample.json] [--rounds 20]
+"""
+import sys
+import os
+import json
+import time
+import argparse
+from datetime import datetime
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.ingestion.normalizer import Normalizer, release_content_hash
+from app.services.ingestion.ocds import parse_ocds_datetime
+
+
+def legacy_release_to_row(release):
+    """The pre-decoder mapper: nested .get chains, every date parsed from scratch."""
+    tender = release.get('tender', {})
+    pub_date_str = release.get('date')
+    pub_date = datetime.fromisoformat(pub_date_str.replace('Z', '+00:00')) if pub_date_str else datetime.utcnow()
+
+    end_date_str = tender.get('tenderPeriod', {}).get('endDate')
+    deadline_date = None
+    if end_date_str:
+        try:
+            deadline_date = datetime.fromisoformat(end_date_str.replace('Z', '+00:00'))
+        except ValueError:
+            pass
+
+    value_data = tender.get('value', {})
+    cp = tender.get('contractPeriod', {})
+    if not cp:
+        awards = release.get('awards', [])
+        if awards: cp = awards[0].get('contractPeriod', {})
+    contract_start = contract_end = None
+    if cp.get('startDate'):
+        try: contract_start = datetime.fromisoformat(cp.get('startDate').replace('Z', '+00:00'))
+        except: pass
+    if cp.get('endDate'):
+        try: contract_end = datetime.fromisoformat(cp.get('endDate').replace('Z', '+00:00'))
+        except: pass
+
+    cpv_codes = []
+    for item in tender.get('items', []):
+        cid = item.get('classification', {}).get('id')
+        if cid and cid not in cpv_codes:
+            cpv_codes.append(cid)
+    main_class = tender.get('classification', {}).get('id')
+    if main_class and main_class not in cpv_codes:
+        cpv_codes.append(main_class)
+    for ac in tender.get('additionalClassifications', []):
+        aid = ac.get('id')
+        if aid and aid not in cpv_codes:
+            cpv_codes.append(aid)
+
+    regions = []
+    for item in tender.get('items', []):
+        for address in item.get('deliveryAddresses', []):
+            if address.get('region'):
+                regions.append(address['region'].lower())
+    if not regions:
+        for party in release.get('parties', []):
+            region = party.get('address', {}).get('region')
+            if 'buyer' in party.get('roles', []) and region:
+                regions.append(region.lower())
+
+    return dict(
+        ocid=release.get('ocid'),
+        release_id=release.get('id'),
+        title=tender.get('title', 'Untitled Notice'),
+        description=tender.get('description', ''),
+        publication_date=pub_date,
+        deadline_date=deadline_date,
+        value_amount=value_data.get('amount'),
+        value_currency=value_data.get('currency', 'GBP'),
+        procurement_method=tender.get('procurementMethod'),
+        main_procurement_category=(tender.get('mainProcurementCategory') or '').lower() or None,
+        notice_type=release.get('tag', ['contractNotice'])[0],
+        content_hash=release_content_hash(release),
+        source_url=tender.get('documents', [{}])[0].get('url'),
+        cpv_codes=cpv_codes,
+        delivery_regions=regions or None,
+        contract_period_start=contract_start,
+        contract_period_end=contract_end,
+    )
+
+
+def time_it(fn, releases, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for r in releases:
+            fn(r)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark OCDS release decoding')
+    parser.add_argument('--file', default='data/fts_sample.json', help='OCDS release package to map')
+    parser.add_argument('--rounds', type=int, default=20, help='Passes over the sample (default: 20)')
+    args = parser.parse_args()
+
+    with open(args.file, "r", encoding="utf-8") as f:
+        releases = json.load(f).get("releases", [])
+    normalizer = Normalizer()
+
+    mismatches = [r.get('ocid') for r in releases if normalizer.release_to_row(r) != legacy_release_to_row(r)]
+    if mismatches:
+        print(f"✗ {len(mismatches)} releases mapped differently, e.g. {mismatches[:3]}")
+        sys.exit(1)
+
+    n = len(releases) * args.rounds
+    legacy = time_it(legacy_release_to_row, releases, args.rounds)
+    parse_ocds_datetime.cache_clear()
+    typed = time_it(normalizer.release_to_row, releases, args.rounds)
+    info = parse_ocds_datetime.cache_info()
+
+    print(f"Sample:      {len(releases)} releases x {args.rounds} rounds")
+    print(f"Dict walk:   {n / legacy:,.0f} releases/s")
+    print(f"Typed:       {n / typed:,.0f} releases/s")
+    print(f"Speedup:     {legacy / typed:.2f}x (rows identical; date cache {info.hits:,} hits / {info.misses:,} misses)")
+
+
+if __name__ == "__main__":
+    main()
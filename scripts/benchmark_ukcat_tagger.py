@@ -0,0 +1,69 @@
+"""
+Benchmark the compiled UKCAT tagger against the exhaustive per-pattern scan.
+Verifies both paths return identical codes before timing them.
+Usage: python scripts/benchmark_ukcat_tagger.py [--file data/fts_sample.json] [--rounds 20]
+"""
+import sys
+import os
+import json
+import time
+import argparse
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.matching.ukcat_ruleset import load_ruleset
+from app.services.matching.ukcat_tagger import tagger
+
+
+def load_texts(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    texts = []
+    for release in data.get("releases", []):
+        tender = release.get("tender", {})
+        texts.append(f"{tender.get('title', '')} {tender.get('description') or ''}")
+    return texts
+
+
+def time_it(fn, texts, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for t in texts:
+            fn(t)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark UKCAT tagging')
+    parser.add_argument('--file', default='data/fts_sample.json', help='OCDS release package to tag')
+    parser.add_argument('--rounds', type=int, default=20, help='Passes over the sample (default: 20)')
+    args = parser.parse_args()
+
+    texts = load_texts(args.file)
+
+    start = time.perf_counter()
+    load_ruleset(cache_dir=None)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    load_ruleset()
+    warm = time.perf_counter() - start
+
+    mismatches = [t for t in texts if tagger.tag_text(t) != tagger._tag_text_exhaustive(t)]
+    if mismatches:
+        print(f"✗ {len(mismatches)} texts tagged differently by the compiled ruleset")
+        sys.exit(1)
+
+    n = len(texts) * args.rounds
+    exhaustive = time_it(tagger._tag_text_exhaustive, texts, args.rounds)
+    compiled = time_it(tagger.tag_text, texts, args.rounds)
+
+    print(f"Ruleset {tagger.version}: {len(tagger.ruleset.rules)} rules")
+    print(f"Load:        compile {cold * 1000:.1f} ms | cached {warm * 1000:.1f} ms")
+    print(f"Exhaustive:  {n / exhaustive:,.0f} texts/s")
+    print(f"Compiled:    {n / compiled:,.0f} texts/s")
+    print(f"Speedup:     {exhaustive / compiled:.1f}x (outputs identical on {len(texts)} texts)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import sys
+import os
+import logging
+from sqlalchemy.dialects.postgresql import insert
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import SessionLocal
+from app.models import Notice, NoticeLSHBand
+from app.services.ingestion.near_duplicates import NearDuplicateDetector
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def cluster_near_duplicates(batch_size=500):
+    """
+    Assigns near-duplicate clusters to notices that don't have one yet: rows
+    stored before clustering existed and those written by the bulk loader.
+    Walks them by ocid, so within the backfill the lowest ocid of a cluster
+    becomes its canonical notice; notices already clustered stay where they are.
+    """
+    db = SessionLocal()
+    detector = NearDuplicateDetector()
+
+    try:
+        pending = db.query(Notice).filter(Notice.cluster_id == None).count()
+        logger.info(f"Found {pending} notices without a near-duplicate cluster.")
+
+        processed = 0
+        duplicates = 0
+        last_ocid = ""
+        while True:
+            notices = db.query(Notice).filter(
+                Notice.cluster_id == None, Notice.ocid > last_ocid
+            ).order_by(Notice.ocid).limit(batch_size).all()
+            if not notices:
+                break
+            last_ocid = notices[-1].ocid
+
+            band_rows = detector.assign(db, notices)
+            if band_rows:
+                db.execute(insert(NoticeLSHBand).values(band_rows).on_conflict_do_nothing())
+            db.commit()
+
+            processed += len(notices)
+            duplicates += sum(1 for n in notices if n.cluster_id != n.ocid)
+            logger.info(f"Progress: {processed}/{pending} clustered, {duplicates} near-duplicates.")
+
+        logger.info(f"Clustering complete. {duplicates} of {processed} notices joined an existing cluster.")
+
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    cluster_near_duplicates()
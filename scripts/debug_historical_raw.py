@@ -1,11 +1,16 @@
 from app.database import SessionLocal
+from app.models import decompress_json
 from sqlalchemy import text
 import json
 
 db = SessionLocal()
-rows = db.execute(text("SELECT ocid, raw_json FROM notice WHERE notice_type = 'historical' LIMIT 5")).fetchall()
+rows = db.execute(text(
+    "SELECT n.ocid, r.release FROM notice n LEFT JOIN notice_raw r ON r.ocid = n.ocid "
+    "WHERE n.notice_type = 'historical' LIMIT 5"
+)).fetchall()
 
-for ocid, rj in rows:
+for ocid, blob in rows:
+    rj = decompress_json(blob)
     print(f"--- {ocid} ---")
     if not rj:
         print("Empty raw_json")
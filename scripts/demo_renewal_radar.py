@@ -39,7 +39,9 @@ def get_sector_history(db, limit=50):
     """
     rows = db.execute(text("""
         SELECT n.ocid, n.title, n.publication_date, n.cpv_codes,
-               n.raw_json, n.value_amount, n.contract_period_end,
+               (SELECT s.canonical_name FROM contract_award ca JOIN supplier s ON s.id = ca.supplier_id
+                WHERE ca.ocid = n.ocid ORDER BY ca.award_date NULLS LAST, ca.award_id LIMIT 1) AS supplier_name,
+               n.value_amount, n.contract_period_end,
                b.canonical_name as buyer_name, b.id as buyer_id
         FROM notice n
         LEFT JOIN buyer b ON n.buyer_id = b.id
@@ -52,17 +54,6 @@ def get_sector_history(db, limit=50):
     return rows
 
 
-def extract_supplier(raw_json: dict) -> str:
-    """Extract primary supplier/winner from OCDS raw JSON."""
-    if not raw_json:
-        return None
-    for award in raw_json.get("awards", []):
-        suppliers = award.get("suppliers", [])
-        if suppliers:
-            return suppliers[0].get("name")
-    return None
-
-
 def predict_next_tender(pub_date, cycle_years=3):
     """Estimate when this contract will come up for re-tender."""
     if not pub_date:
@@ -123,7 +114,7 @@ def run_radar_demo():
     seen_titles = set()
     for row in historical:
         title, pub_date, cpv_codes = row[1], row[2], row[3]
-        raw_json, value, contract_end = row[4], row[5], row[6]
+        supplier, value, contract_end = row[4], row[5], row[6]
         buyer_name, buyer_id = row[7], row[8]
 
         # De-duplicate by title (first 40 chars) and buyer
@@ -132,8 +123,6 @@ def run_radar_demo():
             continue
         seen_titles.add(title_key)
 
-        supplier = extract_supplier(raw_json)
-
         # Use contract_end if available, otherwise estimate from pub_date
         if contract_end:
             retender_date = contract_end
@@ -0,0 +1,45 @@
+"""
+Fold duplicate Buyer rows (same OCDS identifier, same normalised name, or a
+near-identical name) into one canonical buyer, keeping the old keys as aliases.
+Buyer category history and procurement forecasts are rebuilt after a merge,
+since the duplicates' rows are deleted with them.
+Usage: python scripts/merge_duplicate_buyers.py [--dry-run] [--threshold 0.92]
+"""
+import sys
+import os
+import argparse
+import logging
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import SessionLocal
+from app.services.ingestion.buyer_resolver import BuyerResolver
+from app.workers import buyer_history_rebuild
+from app.workers.procurement_forecast import ProcurementForecaster
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge duplicate buyers')
+    parser.add_argument('--dry-run', action='store_true', help='Report duplicates without merging')
+    parser.add_argument('--threshold', type=float, default=0.92, help='Fuzzy name match threshold (default: 0.92)')
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        merges = BuyerResolver(fuzzy_threshold=args.threshold).merge_duplicates(db, dry_run=args.dry_run)
+        action = "Would merge" if args.dry_run else "Merged"
+        logger.info(f"{action} {len(merges)} duplicate buyers.")
+        if merges and not args.dry_run:
+            buyer_history_rebuild.rebuild()
+            ProcurementForecaster().run()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,6 @@ def migrate():
         # Notice table
         "ALTER TABLE notice ADD COLUMN IF NOT EXISTS contract_period_start TIMESTAMP WITH TIME ZONE;",
         "ALTER TABLE notice ADD COLUMN IF NOT EXISTS contract_period_end TIMESTAMP WITH TIME ZONE;",
-        "ALTER TABLE notice ADD COLUMN IF NOT EXISTS raw_json JSONB;",
         "ALTER TABLE notice ADD COLUMN IF NOT EXISTS source_url TEXT;",
         
         # Service Profile table
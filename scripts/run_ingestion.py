@@ -1,6 +1,8 @@
 """
 Run data ingestion from FTS API.
-Usage: python scripts/run_ingestion.py [--days 30] [--limit 100]
+Usage: python scripts/run_ingestion.py [--days 30] [--limit 100] [--batch-size 200]
+Without --days, resumes from the last run's saved cursor / release date.
+For continuous ingestion use the daemon: python -m app.workers.ingestion_daemon
 """
 import sys
 import os
@@ -21,20 +23,25 @@ logger = logging.getLogger(__name__)
 
 def main():
     parser = argparse.ArgumentParser(description='Run FTS data ingestion')
-    parser.add_argument('--days', type=int, default=7, help='Number of days to fetch (default: 7)')
+    parser.add_argument('--days', type=int, default=None,
+                        help='Number of days to fetch (default: resume from the last checkpoint)')
     parser.add_argument('--limit', type=int, default=None, help='Limit number of records (for testing)')
+    parser.add_argument('--batch-size', type=int, default=200, help='Releases per transaction (default: 200)')
     args = parser.parse_args()
     
-    start_date = datetime.utcnow() - timedelta(days=args.days)
+    start_date = datetime.utcnow() - timedelta(days=args.days) if args.days else None
     
     logger.info(f"=== Starting Ingestion ===")
-    logger.info(f"Date range: {start_date.date()} to {datetime.utcnow().date()}")
+    if start_date:
+        logger.info(f"Date range: {start_date.date()} to {datetime.utcnow().date()}")
+    else:
+        logger.info("Resuming from last checkpoint")
     logger.info(f"Limit: {args.limit or 'None'}")
     
     worker = IngestionWorker()
     
     try:
-        worker.run(limit=args.limit, start_date=start_date)
+        worker.run(limit=args.limit, start_date=start_date, batch_size=args.batch_size)
         logger.info("✓ Ingestion completed successfully")
     except Exception as e:
         logger.error(f"✗ Ingestion failed: {e}")
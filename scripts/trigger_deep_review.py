@@ -18,10 +18,11 @@ def trigger_deep_review():
     for i, charity in enumerate(charities):
         print(f"[{i+1}/{len(charities)}] Processing {charity.name}...")
         
-        # Fetch top 10 matches by score that passed the funnel gates
-        top_matches = db.query(NoticeMatch).filter(
+        # Fetch top 10 matches by score that passed the funnel gates (one per near-duplicate cluster)
+        top_matches = db.query(NoticeMatch).join(Notice, Notice.ocid == NoticeMatch.notice_id).filter(
             NoticeMatch.org_id == charity.org_id,
-            NoticeMatch.score > 0
+            NoticeMatch.score > 0,
+            (Notice.cluster_id == None) | (Notice.cluster_id == Notice.ocid)
         ).order_by(NoticeMatch.score.desc()).limit(10).all()
         
         if not top_matches:
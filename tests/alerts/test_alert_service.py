@@ -13,38 +13,52 @@ import sqlalchemy
 sys.modules["pgvector"] = MagicMock()
 sys.modules["pgvector.sqlalchemy"] = MagicMock()
 
+from unittest.mock import patch
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from app.services.alerts.alert_service import AlertService
-from app.models import Notice, NoticeMatch, ServiceProfile
+from app.services.ingestion.enrichment_service import EnrichmentService
+from app.workers.ingestion_worker import IngestionWorker
+from app.models import Alert, Notice, NoticeMatch, ServiceProfile
 
 def test_deadline_change_detection(db):
     old_date = datetime(2026, 3, 1)
     new_date = datetime(2026, 4, 1)
     
-    notice = Notice(ocid="alert-1", deadline_date=old_date, value_amount=1000)
+    db.add(Notice(ocid="alert-1", title="Tender", publication_date=old_date, deadline_date=old_date, value_amount=1000))
+    db.commit()
     service = AlertService(db)
     
-    changes = service.check_for_changes(notice, {"deadline_date": new_date})
-    assert changes is not None
-    assert "deadline" in changes
-    assert changes["deadline"]["new"] == new_date.isoformat()
+    changes = service.process_batch_changes([{"ocid": "alert-1", "target": "alert-1", "deadline_date": new_date}])
+    assert "deadline" in changes["alert-1"]
+    assert changes["alert-1"]["deadline"]["new"] == new_date.isoformat()
 
 def test_material_value_change_detection(db):
-    notice = Notice(ocid="alert-2", value_amount=100000)
+    db.add(Notice(ocid="alert-2", title="Tender", publication_date=datetime(2026, 3, 1), value_amount=100000))
+    db.commit()
     service = AlertService(db)
     
     # 15% change (Material)
-    changes = service.check_for_changes(notice, {"value_amount": 115000})
-    assert "value" in changes
+    changes = service.process_batch_changes([{"ocid": "alert-2", "target": "alert-2", "value_amount": 115000}])
+    assert "value" in changes["alert-2"]
     
     # 5% change (Not Material)
-    changes = service.check_for_changes(notice, {"value_amount": 105000})
-    assert changes is None or "value" not in changes
+    changes = service.process_batch_changes([{"ocid": "alert-2", "target": "alert-2", "value_amount": 105000}])
+    assert changes == {}
 
-def test_process_change_updates_match(db):
+def test_untyped_notice_gaining_a_type_is_a_change(db):
+    db.add(Notice(ocid="alert-4", title="Tender", publication_date=datetime(2026, 3, 1)))
+    db.commit()
+    service = AlertService(db)
+
+    changes = service.process_batch_changes([{"ocid": "alert-4", "target": "alert-4", "notice_type": "contractAward"}])
+    assert changes == {"alert-4": {"type": {"old": None, "new": "contractAward"}}}
+
+def test_change_updates_match(db):
     org_id = uuid.uuid4()
-    # Setup profile and match
+    # Setup profile, notice and match
     profile = ServiceProfile(org_id=org_id, name="Test Org")
     db.add(profile)
+    db.add(Notice(ocid="alert-3", title="Tender", publication_date=datetime(2026, 3, 1), value_amount=100000))
     
     match = NoticeMatch(
         org_id=org_id,
@@ -56,13 +70,52 @@ def test_process_change_updates_match(db):
     db.commit()
     
     service = AlertService(db)
-    changes = {
-        "value": {"old": 100000, "new": 200000, "diff_pct": 100}
-    }
-    
-    service.process_change("alert-3", changes)
+    service.process_batch_changes([{"ocid": "alert-3", "target": "alert-3", "value_amount": 200000}])
+    db.commit()
     
     # Verify match was updated
-    updated_match = db.query(NoticeMatch).get((org_id, "alert-3"))
+    updated_match = db.get(NoticeMatch, (org_id, "alert-3"))
     assert updated_match.feedback_status == "REVIEW"
     assert any("ALERT: Value changed" in r for r in updated_match.recommendation_reasons)
+
+def test_batch_change_detection_alerts_every_match(db):
+    def release(ocid, deadline, amount, title="Floating Housing Support"):
+        return {
+            "ocid": ocid, "id": f"{ocid}-{deadline}-{amount}", "date": "2026-01-10T10:00:00Z", "tag": ["tender"],
+            "buyer": {"name": "Leeds City Council"},
+            "tender": {"title": title, "value": {"amount": amount, "currency": "GBP"},
+                       "tenderPeriod": {"endDate": f"{deadline}T12:00:00Z"}},
+        }
+
+    orgs = [uuid.uuid4(), uuid.uuid4()]
+    with patch('app.workers.ingestion_worker.insert', side_effect=sqlite_insert), \
+         patch('app.services.ingestion.enrichment_service.EmbeddingService'):
+        worker = IngestionWorker()
+        worker._process_batch(db, [release("chg-1", "2026-03-01", 100000), release("chg-2", "2026-03-01", 50000)],
+                              EnrichmentService(db), AlertService(db))
+        for org_id in orgs:
+            db.add(ServiceProfile(org_id=org_id, name=f"Org {org_id}"))
+            db.add(NoticeMatch(org_id=org_id, notice_id="chg-1", feedback_status="GO"))
+        db.commit()
+
+        worker._process_batch(db, [
+            release("chg-1", "2026-04-01", 120000),  # Deadline moved, value +20%
+            release("chg-2", "2026-03-01", 52000, title="Renamed"),  # Value +4%, title not watched
+        ], EnrichmentService(db), AlertService(db))
+
+    alerts = db.query(Alert).filter_by(alert_type="MATERIAL_CHANGE").all()
+    assert len(alerts) == 4  # 2 changes x 2 matches
+    assert {a.org_id for a in alerts} == set(orgs) and {a.notice_id for a in alerts} == {"chg-1"}
+    assert len({a.id for a in alerts}) == 4
+    assert any("Value changed by 20.0%" in a.message for a in alerts)
+    for match in db.query(NoticeMatch).all():
+        assert match.feedback_status == "REVIEW"
+        assert any("Deadline changed from 2026-03-01 to 2026-04-01" in r for r in match.recommendation_reasons)
+
+    # Watched fields extend the core set
+    db.add(NoticeMatch(org_id=orgs[0], notice_id="chg-2"))
+    db.commit()
+    changed = AlertService(db, watched_fields=["title"]).process_batch_changes([
+        {"ocid": "chg-2", "target": "chg-2", "title": "Renamed again"},
+    ])
+    assert changed == {"chg-2": {"title": {"old": "Renamed", "new": "Renamed again"}}}
@@ -0,0 +1,46 @@
+import uuid
+from datetime import datetime, timedelta
+from app.models import Alert, Notice, OutboxMessage, ServiceProfile
+from app.services.alerts.digest import DigestService, NO_UPDATES
+
+
+def test_daily_digests_for_all_orgs(db, tmp_path):
+    now = datetime.utcnow()
+    orgs = [uuid.uuid4() for _ in range(3)]
+    for i, org_id in enumerate(orgs):
+        db.add(ServiceProfile(org_id=org_id, name=f"Org {i}"))
+    db.add(Notice(ocid="digest-1", title="Day Services", publication_date=now))
+    db.add_all([
+        Alert(org_id=orgs[0], notice_id="digest-1", alert_type="NEW_MATCH", message="New match", created_at=now),
+        Alert(org_id=orgs[0], notice_id="digest-1", alert_type="MATERIAL_CHANGE", message="Deadline moved", created_at=now),
+        Alert(org_id=orgs[1], notice_id="digest-1", alert_type="RENEWAL", message="Contract ends soon", created_at=now),
+        # Outside the window
+        Alert(org_id=orgs[2], notice_id="digest-1", alert_type="NEW_MATCH", message="Old match", created_at=now - timedelta(days=2)),
+    ])
+    db.commit()
+
+    service = DigestService(db)
+    digests = {org_id: digest for org_id, _, digest in service.iter_daily_digests()}
+    assert set(digests) == {orgs[0], orgs[1]}
+    first = digests[orgs[0]]
+    assert first.startswith("# Daily Opportunity Digest for Org 0")
+    # Sections keep their order whatever order the alerts came in
+    assert first.index("Material Changes") < first.index("New High-Score Matches")
+    assert "- **Deadline moved** (Notice: digest-1)" in first
+    assert service.generate_daily_digest(orgs[0]) == first
+    assert service.generate_daily_digest(orgs[2]) == NO_UPDATES
+
+    assert service.write_daily_digests(str(tmp_path)) == 2
+    assert (tmp_path / f"{orgs[1]}.md").read_text(encoding="utf-8") == digests[orgs[1]]
+
+    assert service.queue_daily_digests() == 2
+    # Re-running the day's job queues nothing twice
+    assert service.queue_daily_digests() == 0
+    message = db.query(OutboxMessage).filter_by(org_id=orgs[1]).one()
+    assert (message.kind, message.status, message.body) == ("DIGEST", "PENDING", digests[orgs[1]])
+
+    # The next day's run: yesterday's digest falls inside the alert window but isn't today's
+    yesterday = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(minutes=1)
+    db.query(OutboxMessage).update({OutboxMessage.created_at: yesterday})
+    db.commit()
+    assert service.queue_daily_digests(since=yesterday - timedelta(hours=1)) == 2
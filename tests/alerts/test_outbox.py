@@ -0,0 +1,86 @@
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from app.models import Notice, NoticeMatch, OutboxMessage, ServiceProfile
+from app.services.alerts.alert_service import AlertService
+from app.services.alerts.outbox import Outbox
+from app.services.alerts.transports import FileTransport, Transport
+from app.workers.alert_delivery import AlertDeliveryWorker
+
+NOW = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+class FlakyTransport(Transport):
+    def __init__(self):
+        self.calls = 0
+
+    def send(self, recipient, subject, body):
+        self.calls += 1
+        raise ConnectionError("SMTP server unavailable")
+
+
+def test_alerts_are_queued_with_their_transaction_and_delivered_per_org(db, tmp_path):
+    first, second = uuid.uuid4(), uuid.uuid4()
+    db.add(ServiceProfile(org_id=first, name="First Org", contact_email="bids@first.org"))
+    db.add(ServiceProfile(org_id=second, name="Second Org", contact_email="bids@second.org"))
+    db.add(Notice(ocid="outbox-1", title="Supported Living", publication_date=NOW, notice_type="tender"))
+    db.add(NoticeMatch(org_id=first, notice_id="outbox-1", score=0.8))
+    db.add(NoticeMatch(org_id=second, notice_id="outbox-1", score=0.7))
+    db.commit()
+
+    service = AlertService(db)
+    service.create_alert(first, "outbox-1", "NEW_MATCH", "New match: Supported Living")
+    service.process_batch_changes([{"ocid": "outbox-1", "target": "outbox-1", "notice_type": "contractAward"}])
+    db.commit()
+    # A rolled-back alert leaves nothing to deliver
+    service.create_alert(second, "outbox-1", "NEW_MATCH", "Never committed")
+    db.rollback()
+    assert db.query(OutboxMessage).filter_by(status="PENDING").count() == 3
+
+    transport = FileTransport(str(tmp_path))
+    delivered, failed = AlertDeliveryWorker({"email": transport}, session_factory=lambda: db, workers=1).drain()
+    assert (delivered, failed) == (3, 0)
+    assert transport.sent == 2  # One message per org
+    first_mail = next(f for f in os.listdir(tmp_path) if "first-org" in f)
+    content = (tmp_path / first_mail).read_text()
+    assert "2 new alerts for First Org" in content and "[MATERIAL_CHANGE]" in content
+    assert db.query(OutboxMessage).filter_by(status="DELIVERED").count() == 3
+
+    # Nothing left to claim: a second drain sends nothing
+    assert AlertDeliveryWorker({"email": transport}, session_factory=lambda: db, workers=1).drain() == (0, 0)
+    assert transport.sent == 2
+
+
+def test_failed_sends_back_off_then_fail(db):
+    org_id = uuid.uuid4()
+    db.add(ServiceProfile(org_id=org_id, name="Test Org", contact_email="bids@test.org"))
+    db.add(Notice(ocid="outbox-2", title="Advocacy", publication_date=NOW))
+    db.commit()
+    AlertService(db).create_alert(org_id, "outbox-2", "RENEWAL", "Renewal Alert")
+    db.commit()
+
+    transport = FlakyTransport()
+    outbox = Outbox(max_attempts=2, base_backoff=timedelta(0))
+    worker = AlertDeliveryWorker({"email": transport}, session_factory=lambda: db, workers=1, outbox=outbox)
+    assert worker.drain() == (0, 0)
+    message = db.query(OutboxMessage).one()
+    assert (message.status, message.attempts) == ("PENDING", 1)
+    assert "SMTP server unavailable" in message.last_error
+
+    assert worker.drain() == (0, 1)
+    message = db.query(OutboxMessage).one()
+    assert (message.status, message.attempts, transport.calls) == ("FAILED", 2, 2)
+
+
+def test_polling_wakes_when_a_retry_falls_due(db):
+    org_id = uuid.uuid4()
+    db.add(ServiceProfile(org_id=org_id, name="Test Org"))
+    db.commit()
+    worker = AlertDeliveryWorker({"email": FlakyTransport()}, session_factory=lambda: db, workers=1)
+    assert worker.next_delay(30) == 30  # Nothing queued: sleep the full poll interval
+
+    db.add(OutboxMessage(org_id=org_id, kind="DIGEST", body="Digest", status="PENDING", attempts=1,
+                         next_attempt_at=datetime.now(timezone.utc) + timedelta(seconds=5)))
+    db.commit()
+    assert 3 < worker.next_delay(30) <= 5
+    assert worker.next_delay(2) == 2
@@ -0,0 +1,48 @@
+import gzip
+import json
+import queue
+from datetime import datetime, timezone
+from app.models import decompress_json
+from app.workers import bulk_loader
+from app.workers.bulk_loader import ROW_COLUMNS, copy_field, iter_shard_releases
+
+SAMPLE = "data/fts_sample.json"
+
+
+def test_copy_field_escapes_text_format():
+    assert copy_field(None) == r"\N"
+    assert copy_field("a\tb\nc\\d\x00") == "a\\tb\\nc\\\\d"
+    assert copy_field(["85000000", 'say "hi"']) == '{"85000000","say \\\\"hi\\\\""}'
+    assert copy_field(b"\x01\xff") == "\\\\x01ff"
+    assert copy_field(datetime(2024, 1, 2, tzinfo=timezone.utc)) == "2024-01-02T00:00:00+00:00"
+
+
+def test_iter_shard_releases_handles_packages_arrays_and_gzip(tmp_path):
+    releases = json.load(open(SAMPLE))["releases"]
+    array_gz = tmp_path / "array.json.gz"
+    with gzip.open(array_gz, "wt") as f:
+        json.dump(releases[:3], f)
+
+    assert len(list(iter_shard_releases(SAMPLE))) == len(releases)
+    assert [r["ocid"] for r in iter_shard_releases(str(array_gz))] == [r["ocid"] for r in releases[:3]]
+
+
+def test_parse_shard_streams_copy_rows():
+    results = queue.Queue()
+    bulk_loader._init_worker(results)
+    bulk_loader._parse_shard(0, SAMPLE, chunk_size=40, notice_type="historical")
+
+    messages = []
+    while not results.empty():
+        messages.append(results.get())
+    chunks = [m[1] for m in messages if m[0] == "chunk"]
+    assert messages[-1][:2] == ("done", 0)
+    assert [len(c) for c in chunks] == [40, 40, 20]
+
+    (buyer_data, id_keys), line = chunks[0][0]
+    fields = line.split("\t")
+    assert len(fields) == len(ROW_COLUMNS) + 1
+    assert buyer_data["canonical_name"]
+    assert fields[ROW_COLUMNS.index("notice_type")] == "historical"
+    release = decompress_json(bytes.fromhex(fields[-1][3:]))
+    assert release["ocid"] == fields[0]
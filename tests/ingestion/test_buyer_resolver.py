@@ -0,0 +1,98 @@
+from datetime import datetime
+from app.models import Buyer, BuyerAlias, ContractAward, Notice, Supplier
+from app.services.ingestion.buyer_resolver import BuyerResolver, name_key
+
+
+def release(name, ident=None, party_ident=None):
+    r = {"ocid": f"ocds-{name}", "buyer": {"id": "b1", "name": name}}
+    if ident:
+        r["buyer"]["identifier"] = ident
+    if party_ident:
+        r["parties"] = [{"id": "b1", "roles": ["buyer"], "identifier": party_ident,
+                         "additionalIdentifiers": [{"scheme": "GB-CHC", "id": "999"}]}]
+    return r
+
+
+def test_name_key():
+    assert name_key("The Leeds City Council.") == "leeds city council"
+    assert name_key("Leeds  City   COUNCIL") == "leeds city council"
+    assert name_key("Health & Care Ltd") == "health and care limited"
+    assert name_key("Bórough of Ëxample") == "borough of example"
+    assert name_key("  ") is None
+
+
+def test_resolves_variants_to_one_buyer(db):
+    resolver = BuyerResolver()
+    ids = resolver.resolve_releases(db, [
+        release("Leeds City Council", party_ident={"scheme": "GB-COH", "id": "01234567"}),
+        release("LEEDS CITY COUNCIL"),                           # name key
+        release("Leeds City Council (Procurement)", ident={"scheme": "gb-coh", "id": "0123 4567"}),  # identifier
+        release("Leeds City Counci"),                            # fuzzy
+        release("Bradford Council"),
+    ])
+    db.commit()
+
+    assert len({ids[0], ids[1], ids[2], ids[3]}) == 1
+    assert ids[4] != ids[0]
+    assert db.query(Buyer).count() == 2
+    aliases = {a.alias_key: a.source for a in db.query(BuyerAlias)}
+    assert aliases["id:GB-COH:01234567"] == "identifier"
+    assert aliases["id:GB-CHC:999"] == "identifier"
+    assert aliases["name:leeds city counci"] == "fuzzy"
+
+    # A fresh process warms from the table and resolves without creating rows
+    again = BuyerResolver().resolve(db, release("Leeds City Council (Procurement)"))
+    assert again == ids[0]
+    assert db.query(Buyer).count() == 2
+
+
+def test_conflicting_identifier_is_not_merged(db):
+    resolver = BuyerResolver()
+    a, b = resolver.resolve_releases(db, [
+        release("Example Trust", ident={"scheme": "GB-COH", "id": "111"}),
+        release("Example Trust", ident={"scheme": "GB-COH", "id": "222"}),
+    ])
+    db.commit()
+    assert a != b
+    assert {b.slug for b in db.query(Buyer)} == {"example-trust", "example-trust-2"}
+
+
+def test_merge_duplicates(db):
+    first = Buyer(canonical_name="Leeds City Council", slug="leeds-city-council", created_at=datetime(2023, 1, 1))
+    dup = Buyer(canonical_name="The Leeds City Council", slug="the-leeds-city-council", created_at=datetime(2024, 1, 1))
+    db.add_all([first, dup])
+    db.commit()
+    db.add(Notice(ocid="ocds-dup", title="Dup", buyer_id=dup.id, publication_date=datetime(2024, 1, 1), raw_json={}))
+    supplier = Supplier(canonical_name="Shelter Ltd")
+    db.add(supplier)
+    db.flush()
+    db.add(ContractAward(ocid="ocds-dup", award_id="1", supplier_id=supplier.id, buyer_id=dup.id))
+    db.commit()
+
+    merges = BuyerResolver().merge_duplicates(db)
+
+    assert merges == {dup.id: first.id}
+    assert db.query(Buyer).count() == 1
+    assert db.query(Notice).filter(Notice.ocid == "ocds-dup").one().buyer_id == first.id
+    assert db.query(ContractAward).one().buyer_id == first.id
+    assert db.get(BuyerAlias, "name:leeds city council").buyer_id == first.id
+
+
+def test_neighbouring_authorities_are_not_fuzzy_matched(db):
+    pairs = [
+        ("East Sussex County Council", "West Sussex County Council"),
+        ("South Yorkshire Mayoral Combined Authority", "North Yorkshire Mayoral Combined Authority"),
+        ("West Lothian Council", "East Lothian Council"),
+        ("Cheshire West Council", "Cheshire East Council"),
+    ]
+    resolver = BuyerResolver()
+    for a, b in pairs:
+        first, second = resolver.resolve_releases(db, [release(a), release(b)])
+        assert first != second, (a, b)
+    db.commit()
+    assert db.query(Buyer).count() == 8
+    assert not db.query(BuyerAlias).filter(BuyerAlias.source == "fuzzy").count()
+
+    # Nor folded together afterwards
+    assert BuyerResolver().merge_duplicates(db) == {}
+    assert db.query(Buyer).count() == 8
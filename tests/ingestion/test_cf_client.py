@@ -0,0 +1,77 @@
+import asyncio
+import time
+from datetime import date
+import httpx
+from app.services.ingestion.clients.cf_client import ContractsFinderClient, SearchSlice, SeenSet, build_slices
+from app.services.ingestion.clients.throttling import TokenBucket
+
+
+def make_transport(calls):
+    """
+    Two keywords, each with a full first page and a short second page.
+    Both keywords return the shared OCID 'ocds-shared'; 'b' is throttled once.
+    """
+    throttled = {"done": False}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        keyword = request.url.params.get("keyword")
+        page = int(request.url.params.get("page"))
+        calls.append((keyword, page))
+        if keyword == "b" and page == 1 and not throttled["done"]:
+            throttled["done"] = True
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        if page == 1:
+            releases = [{"ocid": f"ocds-{keyword}-{i}"} for i in range(ContractsFinderClient.PAGE_SIZE - 1)]
+            releases.append({"ocid": "ocds-shared"})
+        else:
+            releases = [{"ocid": f"ocds-{keyword}-last"}]
+        return httpx.Response(200, json={"releases": releases})
+
+    return httpx.MockTransport(handler)
+
+
+def test_fetch_releases_pages_slices_concurrently_and_dedupes():
+    calls = []
+    client = ContractsFinderClient(rate_per_second=1000, burst=10, transport=make_transport(calls))
+    slices = build_slices(["a", "b"], [(date(2024, 1, 1), date(2024, 3, 31))])
+
+    results = list(client.fetch_releases(slices))
+    ocids = [release["ocid"] for _, release in results]
+
+    assert len(ocids) == len(set(ocids)) == 2 * 21 - 1  # 'ocds-shared' yielded once
+    assert {search.keyword for search, _ in results} == {"a", "b"}
+    assert sorted(calls) == [("a", 1), ("a", 2), ("b", 1), ("b", 1), ("b", 2)]
+
+
+def test_fetch_releases_applies_keep_and_page_cap():
+    calls = []
+    client = ContractsFinderClient(rate_per_second=1000, burst=10, max_pages_per_slice=1,
+                                   transport=make_transport(calls))
+    slices = [SearchSlice("a", date(2024, 1, 1), date(2024, 1, 31))]
+
+    async def collect():
+        keep = lambda r: r["ocid"].endswith("-1")
+        return [r["ocid"] async for _, r in client.fetch_releases_async(slices, keep=keep)]
+
+    assert asyncio.run(collect()) == ["ocds-a-1"]
+    assert calls == [("a", 1)]
+
+
+def test_seen_set_is_bounded():
+    seen = SeenSet(capacity=2)
+    assert seen.add("x") and seen.add("y")
+    assert not seen.add("x")
+    assert seen.add("z")  # evicts 'y', the least recently seen
+    assert len(seen) == 2 and "y" not in seen and "x" in seen
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+
+    async def drain():
+        started = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(drain()) >= 0.09  # 5 refills at 50/s
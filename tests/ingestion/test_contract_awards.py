@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models import ContractAward, Notice, Supplier, SupplierAlias
+from app.services.alerts.alert_service import AlertService
+from app.services.ingestion.enrichment_service import EnrichmentService
+from app.services.matching.renewal_intelligence import RenewalIntelligenceService
+from app.workers.ingestion_worker import IngestionWorker
+
+
+def award_release(ocid, suppliers, buyer="Leeds City Council", date="2024-03-01T10:00:00Z"):
+    return {
+        "ocid": ocid,
+        "id": f"{ocid}-award",
+        "date": date,
+        "tag": ["award"],
+        "buyer": {"name": buyer},
+        "parties": [
+            {"id": f"sup-{i}", "name": name, "identifier": {"scheme": "GB-COH", "id": coh}} if coh
+            else {"id": f"sup-{i}", "name": name}
+            for i, (name, coh) in enumerate(suppliers)
+        ],
+        "tender": {"title": "Floating Housing Support", "items": [{"classification": {"scheme": "CPV", "id": "85311000"}}]},
+        "awards": [{
+            "id": "1",
+            "status": "active",
+            "date": date,
+            "value": {"amount": 120000, "currency": "GBP"},
+            "suppliers": [{"id": f"sup-{i}", "name": name} for i, (name, _) in enumerate(suppliers)],
+            "contractPeriod": {"startDate": "2024-04-01T00:00:00Z", "endDate": "2027-03-31T00:00:00Z"},
+        }],
+    }
+
+
+def test_ingestion_writes_contract_awards_and_dedupes_suppliers(db):
+    with patch('app.workers.ingestion_worker.insert', side_effect=sqlite_insert), \
+         patch('app.services.ingestion.enrichment_service.EmbeddingService'):
+        worker = IngestionWorker()
+        worker._process_batch(db, [
+            award_release("ocds-1", [("Shelter Ltd", "01234567"), ("Housing Plus", None)]),
+            # Same company under another trading name, matched by Companies House number
+            award_release("ocds-2", [("SHELTER LIMITED", "01234567")], buyer="Bradford Council"),
+        ], EnrichmentService(db), AlertService(db))
+
+    awards = db.query(ContractAward).order_by(ContractAward.ocid).all()
+    assert len(awards) == 3
+    assert db.query(Supplier).count() == 2
+    shelter = db.query(SupplierAlias).filter_by(alias_key="id:GB-COH:01234567").one().supplier_id
+    assert {a.ocid for a in awards if a.supplier_id == shelter} == {"ocds-1", "ocds-2"}
+    first = awards[0]
+    assert first.award_id == "1" and first.status == "active"
+    assert first.cpv_prefixes == ["8531"]
+    assert float(first.value_amount) == 120000
+    assert first.contract_end.replace(tzinfo=timezone.utc) == datetime(2027, 3, 31, tzinfo=timezone.utc)
+    assert first.buyer_id is not None and first.buyer_id != awards[-1].buyer_id
+
+    # A re-published award replaces the notice's rows rather than adding to them
+    with patch('app.workers.ingestion_worker.insert', side_effect=sqlite_insert), \
+         patch('app.services.ingestion.enrichment_service.EmbeddingService'):
+        worker._process_batch(db, [
+            award_release("ocds-1", [("Housing Plus", None)], date="2024-03-02T10:00:00Z"),
+        ], EnrichmentService(db), AlertService(db))
+    assert db.query(ContractAward).filter_by(ocid="ocds-1").count() == 1
+
+    notice = db.get(Notice, "ocds-1")
+    assert RenewalIntelligenceService(db).predict_next_lifecycle(notice)["incumbent"] == "Housing Plus"
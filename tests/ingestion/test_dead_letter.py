@@ -0,0 +1,95 @@
+from unittest.mock import patch
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models import DeadLetterRelease, Notice
+from app.services.alerts.alert_service import AlertService
+from app.services.ingestion.dead_letter import DeadLetterQueue
+from app.services.ingestion.enrichment_service import EnrichmentService
+from app.services.ingestion.normalizer import Normalizer
+from app.workers.dead_letter_replay import DeadLetterReplayer
+from app.workers.ingestion_worker import IngestionWorker
+
+
+def release(ocid):
+    return {
+        "ocid": ocid,
+        "id": f"{ocid}-r1",
+        "date": "2023-10-01T10:00:00Z",
+        "tag": ["contractNotice"],
+        "buyer": {"name": "Leeds City Council"},
+        "tender": {"title": "Tender", "value": {"amount": 5000, "currency": "GBP"}},
+    }
+
+
+def test_failed_release_is_dead_lettered_then_replayed_after_fix(db):
+    original = Normalizer.map_release_to_notice
+
+    def buggy(self, r, buyer_id):
+        if r["ocid"] == "ocds-2":
+            raise KeyError("awards")
+        return original(self, r, buyer_id)
+
+    with patch('app.workers.ingestion_worker.insert', side_effect=sqlite_insert), \
+         patch('app.services.ingestion.enrichment_service.EmbeddingService'):
+        worker = IngestionWorker()
+        with patch.object(Normalizer, 'map_release_to_notice', buggy):
+            ingested, _ = worker._process_batch(db, [release("ocds-1"), release("ocds-2")],
+                                                EnrichmentService(db), AlertService(db))
+        assert ingested == 1
+        letter = db.query(DeadLetterRelease).one()
+        assert (letter.ocid, letter.error_class, letter.status) == ("ocds-2", "KeyError", "PENDING")
+
+        # Backoff holds it back until forced
+        replayer = DeadLetterReplayer(session_factory=lambda: db, workers=1)
+        assert replayer.replay() == (0, 0)
+        assert replayer.replay(error_class="KeyError", ignore_backoff=True) == (1, 0)
+
+    db.expire_all()
+    assert db.query(DeadLetterRelease).one().status == "RESOLVED"
+    assert db.query(Notice).filter_by(ocid="ocds-2").count() == 1
+
+
+def test_replay_keeps_the_backfill_notice_type(db):
+    def buggy(self, r, buyer_id):
+        raise KeyError("awards")
+
+    with patch('app.workers.ingestion_worker.insert', side_effect=sqlite_insert), \
+         patch('app.services.ingestion.enrichment_service.EmbeddingService'):
+        worker = IngestionWorker()
+        with patch.object(Normalizer, 'map_release_to_notice', buggy):
+            worker._process_batch(db, [release("ocds-7")], EnrichmentService(db), AlertService(db),
+                                  notice_type="historical", source="CF_BACKFILL")
+        assert db.query(DeadLetterRelease).one().notice_type == "historical"
+
+        replayer = DeadLetterReplayer(session_factory=lambda: db, workers=1)
+        assert replayer.replay(ignore_backoff=True) == (1, 0)
+
+    # Stored as the backfill would have, not as the release's contractNotice tag
+    assert db.get(Notice, "ocds-7").notice_type == "historical"
+
+
+def test_poison_release_is_quarantined(db):
+    queue = DeadLetterQueue(max_attempts=2)
+    queue.record(db, [(release("ocds-9"), ValueError("bad date"))], "FTS")
+    db.commit()
+    assert queue.due(db, ignore_backoff=True) == ["ocds-9"]
+
+    queue.record(db, [(release("ocds-9"), ValueError("bad date"))], "FTS")
+    db.commit()
+    letter = db.query(DeadLetterRelease).one()
+    assert (letter.attempts, letter.status) == (2, "QUARANTINED")
+    assert queue.due(db, ignore_backoff=True) == []
+    assert queue.due(db, include_quarantined=True) == ["ocds-9"]
+
+
+def test_failed_replay_drops_cached_buyers_and_suppliers(db):
+    DeadLetterQueue().record(db, [(release("ocds-5"), KeyError("awards"))], "FTS")
+    db.commit()
+    replayer = DeadLetterReplayer(session_factory=lambda: db, workers=1)
+    worker = replayer._worker()
+    with patch.object(IngestionWorker, '_process_batch', side_effect=RuntimeError("constraint")), \
+         patch.object(worker.buyer_resolver, 'invalidate') as buyers, \
+         patch.object(worker.contract_awards.resolver, 'invalidate') as suppliers:
+        assert replayer.replay(ignore_backoff=True) == (0, 1)
+    # Both caches may hold ids from the rolled-back transaction
+    buyers.assert_called_once()
+    suppliers.assert_called_once()
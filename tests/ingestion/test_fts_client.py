@@ -0,0 +1,65 @@
+import asyncio
+import httpx
+from datetime import datetime
+from app.services.ingestion.clients.fts_client import FTSClient
+from app.services.ingestion.clients.throttling import parse_retry_after
+
+BASE = FTSClient.BASE_URL
+
+
+def make_transport(calls):
+    """Three linked pages; the second one is throttled once before succeeding."""
+    throttled = {"done": False}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(str(request.url))
+        page = request.url.params.get("page", "1")
+        if page == "2" and not throttled["done"]:
+            throttled["done"] = True
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        next_link = {"1": f"{BASE}?page=2", "2": f"{BASE}?page=3"}.get(page)
+        body = {
+            "releases": [{"ocid": f"ocds-{page}-a"}, {"ocid": f"ocds-{page}-b"}],
+            "links": {"next": next_link} if next_link else {},
+        }
+        return httpx.Response(200, json=body)
+
+    return httpx.MockTransport(handler)
+
+
+def test_fetch_releases_follows_links_and_retries_429():
+    calls = []
+    client = FTSClient(transport=make_transport(calls))
+    client.start_url = lambda updated_after: f"{BASE}?page=1"
+
+    ocids = [r["ocid"] for r in client.fetch_releases(updated_after=datetime(2024, 1, 1))]
+
+    assert ocids == ["ocds-1-a", "ocds-1-b", "ocds-2-a", "ocds-2-b", "ocds-3-a", "ocds-3-b"]
+    assert len(calls) == 4  # page 2 requested twice
+
+
+def test_fetch_releases_stops_producer_when_consumer_breaks():
+    calls = []
+    client = FTSClient(transport=make_transport(calls), prefetch_pages=1)
+    client.start_url = lambda updated_after: f"{BASE}?page=1"
+
+    releases = client.fetch_releases(updated_after=datetime(2024, 1, 1))
+    assert next(releases)["ocid"] == "ocds-1-a"
+    releases.close()
+
+
+def test_fetch_releases_async():
+    calls = []
+    client = FTSClient(transport=make_transport(calls))
+    client.start_url = lambda updated_after: f"{BASE}?page=1"
+
+    async def collect():
+        return [r["ocid"] async for r in client.fetch_releases_async(datetime(2024, 1, 1))]
+
+    assert len(asyncio.run(collect())) == 6
+
+
+def testparse_retry_after():
+    assert parse_retry_after("5") == 5.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
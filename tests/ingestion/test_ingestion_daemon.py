@@ -0,0 +1,75 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base
+from app.models import IngestionLog, Notice
+from app.workers.ingestion_daemon import IngestionDaemon
+
+
+@pytest.fixture
+def threaded_db():
+    """Runs happen on worker threads, so share one in-memory connection across them."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+class FakeWorker:
+    """Stands in for IngestionWorker: each run writes the log row a real run would."""
+
+    def __init__(self, db, daemon_ref):
+        self.db = db
+        self.daemon_ref = daemon_ref
+        self.runs = 0
+        self.stop_requested = False
+
+    def run(self):
+        self.runs += 1
+        self.db.add(IngestionLog(
+            source="FTS", status="SUCCESS", items_processed=40,
+            last_release_date=datetime.now(timezone.utc) - timedelta(hours=2),
+        ))
+        self.db.commit()
+        self.daemon_ref[0].stop()  # One run, then a graceful shutdown
+
+    def request_stop(self):
+        self.stop_requested = True
+
+
+def test_daemon_runs_source_records_lag_and_stops(threaded_db):
+    ref = []
+    worker = FakeWorker(threaded_db(), ref)
+    daemon = IngestionDaemon(intervals={"FTS": 60}, worker=worker, session_factory=threaded_db)
+    ref.append(daemon)
+
+    asyncio.run(asyncio.wait_for(daemon.run_async(), timeout=10))
+
+    assert worker.runs == 1 and worker.stop_requested
+    metrics = daemon.metrics.source("FTS")
+    assert (metrics.runs, metrics.last_items, metrics.last_status) == (1, 40, "SUCCESS")
+    assert 7100 < metrics.lag_seconds() < 7300
+    text = daemon.metrics.render()
+    assert 'ingestion_releases_total{source="FTS"} 40' in text
+    assert 'ingestion_lag_seconds{source="FTS"}' in text
+
+
+def test_daemon_rejects_unknown_sources(db):
+    try:
+        IngestionDaemon(intervals={"TED": 60}, worker=FakeWorker(db, []), session_factory=lambda: db)
+    except ValueError as e:
+        assert "TED" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_enrichment_backlog_skips_notices_without_description_text(db):
+    for ocid, description in [("ocds-1", "Day care for older people"), ("ocds-2", ""), ("ocds-3", None)]:
+        db.add(Notice(ocid=ocid, title="Tender", description=description, publication_date=datetime(2024, 3, 1),
+                      ukcat_ruleset_version="0123456789abcdef", updated_at=datetime.utcnow()))
+    db.commit()
+    daemon = IngestionDaemon(intervals={"FTS": 60}, worker=FakeWorker(db, []), session_factory=lambda: db)
+    assert daemon.enrichment_backlog() == 1
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from app.models import ServiceProfile
+from app.services.ingestion.interest_mesh import InterestMesh
+
+
+def notice(cpv_codes, title="Tender", description=""):
+    return SimpleNamespace(cpv_codes=cpv_codes, title=title, description=description)
+
+
+def test_mesh_matches_cpv_keywords_and_regions(db):
+    db.add(ServiceProfile(
+        name="Homeless Trust", mission="Ending homelessness through tenancy sustainment",
+        inferred_cpv_codes=["85311000"], service_regions={"regions": ["UKD33"]},
+    ))
+    db.commit()
+    mesh = InterestMesh(refresh_seconds=0)
+
+    assert mesh.matches_notice(db, notice(["85312000"]))
+    assert not mesh.matches_notice(db, notice(["45000000"], title="Road resurfacing"))
+    # A mission keyword rescues a notice coded outside the profiles' CPV prefixes
+    assert mesh.matches_notice(db, notice(["79000000"], title="Tenancy sustainment pilot"))
+    assert mesh.matches_notice(db, notice([]))  # Neutral when uncoded
+
+    far_away = {"parties": [{"roles": ["buyer"], "address": {"region": "UKK41"}}]}
+    assert not mesh.matches_notice(db, notice(["85312000"]), far_away)
+
+
+def test_mesh_refreshes_when_profiles_change(db):
+    profile = ServiceProfile(name="Advice Centre", inferred_cpv_codes=["85311000"],
+                             updated_at=datetime(2024, 1, 1))
+    db.add(profile)
+    db.commit()
+    mesh = InterestMesh(refresh_seconds=0)
+    first = mesh.refresh(db)
+    assert mesh.refresh(db) is first  # Version unchanged: no rebuild
+
+    profile.inferred_cpv_codes = ["79000000"]
+    profile.updated_at = datetime(2024, 1, 1) + timedelta(days=1)
+    db.commit()
+    assert mesh.refresh(db).cpv_prefixes == {"7900"}
@@ -0,0 +1,77 @@
+from unittest.mock import patch
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models import Notice, NoticeLSHBand
+from app.services.alerts.alert_service import AlertService
+from app.services.ingestion.enrichment_service import EnrichmentService
+from app.services.ingestion.near_duplicates import estimated_similarity, notice_minhash, value_band
+from app.workers.ingestion_worker import IngestionWorker
+
+DESCRIPTION = (
+    "The council is seeking a provider to deliver a floating housing support service for adults "
+    "at risk of homelessness, including tenancy sustainment, benefits advice and resettlement."
+)
+
+
+def release(ocid, buyer="Leeds City Council", amount=250000, description=DESCRIPTION,
+            date="2024-03-01T10:00:00Z", tag="tender"):
+    return {
+        "ocid": ocid,
+        "id": f"{ocid}-r1",
+        "date": date,
+        "tag": [tag],
+        "buyer": {"name": buyer},
+        "tender": {
+            "title": "Floating Housing Support Service",
+            "description": description,
+            "value": {"amount": amount, "currency": "GBP"},
+        },
+    }
+
+
+def test_signatures_estimate_similarity():
+    a = notice_minhash("Floating Housing Support Service", DESCRIPTION)
+    b = notice_minhash("Floating housing support service", DESCRIPTION + " Lot 1 only.")
+    c = notice_minhash("Highways resurfacing", "Resurfacing of the A61 carriageway and footways.")
+    assert estimated_similarity(a, b) >= 0.8
+    assert estimated_similarity(a, c) < 0.2
+    assert notice_minhash("", None) is None
+    assert value_band(250000) == value_band(270000) != value_band(2500000)
+    assert value_band(None) is None
+
+
+def test_worker_clusters_republished_notices(db):
+    with patch('app.workers.ingestion_worker.insert', side_effect=sqlite_insert), \
+         patch('app.services.ingestion.enrichment_service.EmbeddingService'):
+        worker = IngestionWorker()
+        worker._process_batch(db, [release("ocds-fts-1")], EnrichmentService(db), AlertService(db))
+        worker._process_batch(db, [
+            release("ocds-cf-1", amount=260000, description=DESCRIPTION + " Lot 1 only."),  # Same tender via CF
+            release("ocds-fts-2", buyer="Bradford Council"),  # Same text, different buyer
+        ], EnrichmentService(db), AlertService(db), source="CF")
+
+    clusters = dict(db.query(Notice.ocid, Notice.cluster_id))
+    assert clusters == {"ocds-fts-1": "ocds-fts-1", "ocds-cf-1": "ocds-fts-1", "ocds-fts-2": "ocds-fts-2"}
+    assert db.query(NoticeLSHBand).filter_by(ocid="ocds-cf-1").count() > 0
+
+    # Re-ingesting the canonical notice keeps its cluster
+    with patch('app.workers.ingestion_worker.insert', side_effect=sqlite_insert), \
+         patch('app.services.ingestion.enrichment_service.EmbeddingService'):
+        worker._process_batch(db, [release("ocds-cf-1", amount=300000)], EnrichmentService(db), AlertService(db))
+    db.expire_all()
+    assert db.query(Notice.cluster_id).filter_by(ocid="ocds-cf-1").scalar() == "ocds-fts-1"
+
+
+def test_retender_does_not_join_an_old_or_award_cluster(db):
+    with patch('app.workers.ingestion_worker.insert', side_effect=sqlite_insert), \
+         patch('app.services.ingestion.enrichment_service.EmbeddingService'):
+        worker = IngestionWorker()
+        # Backfilled history, then an award for last month's tender
+        worker._process_batch(db, [release("ocds-2019", date="2019-03-01T10:00:00Z")],
+                              EnrichmentService(db), AlertService(db), notice_type="historical")
+        worker._process_batch(db, [release("ocds-award", date="2024-02-01T10:00:00Z", tag="award")],
+                              EnrichmentService(db), AlertService(db))
+        # The live re-tender copies the old text word for word
+        worker._process_batch(db, [release("ocds-2024")], EnrichmentService(db), AlertService(db))
+
+    clusters = dict(db.query(Notice.ocid, Notice.cluster_id))
+    assert clusters == {"ocds-2019": "ocds-2019", "ocds-award": "ocds-award", "ocds-2024": "ocds-2024"}
@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+from app.models import Notice
+from app.services.ingestion.normalizer import Normalizer
+from app.services.ingestion.ocds import decode_release, parse_ocds_datetime
+from app.workers.delivery_regions_backfill import backfill
+
+
+def test_parse_ocds_datetime_handles_z_and_bad_input():
+    assert parse_ocds_datetime("2024-03-01T09:30:00Z") == datetime(2024, 3, 1, 9, 30, tzinfo=timezone.utc)
+    assert parse_ocds_datetime("2024-03-01") == datetime(2024, 3, 1)
+    assert parse_ocds_datetime("not a date") is None
+    assert parse_ocds_datetime(None) is None
+
+
+def test_decode_release_reads_fields_and_falls_back_to_award_period():
+    release = decode_release({
+        "ocid": "ocds-1",
+        "date": "2024-01-01T00:00:00Z",
+        "tag": [],
+        "tender": {
+            "title": "Advice services",
+            "items": [{"classification": {"id": "85300000"}}],
+            "classification": {"id": "85300000"},
+            "additionalClassifications": [{"id": "98000000"}],
+            "mainProcurementCategory": "Services",
+            "tenderPeriod": None,
+        },
+        "awards": [{
+            "contractPeriod": {"startDate": "2024-04-01T00:00:00Z", "endDate": "2027-03-31T00:00:00Z"},
+            "suppliers": [{"name": "Citizens Advice"}],
+        }],
+    })
+
+    assert release.notice_type == "contractNotice"
+    assert release.tender.cpv_codes == ["85300000", "98000000"]
+    assert release.tender.main_procurement_category == "services"
+    assert release.tender.tender_period is None
+    assert release.contract_period.end.year == 2027
+    assert release.incumbent == "Citizens Advice"
+
+
+def test_delivery_regions_prefer_items_over_buyer_address():
+    buyer = {"roles": ["buyer"], "address": {"region": "UKE42"}}
+    release = {"ocid": "ocds-1", "parties": [buyer], "tender": {"items": [{"deliveryAddresses": [{"region": "UKD33"}]}]}}
+    assert Normalizer().release_to_row(release)["delivery_regions"] == ["ukd33"]
+
+    release["tender"]["items"] = []
+    assert Normalizer().release_to_row(release)["delivery_regions"] == ["uke42"]
+    assert Normalizer().release_to_row({"ocid": "ocds-2", "tender": {}})["delivery_regions"] is None
+
+
+def test_delivery_regions_backfill_decodes_stored_releases(db):
+    buyer = {"roles": ["buyer"], "address": {"region": "UKE42"}}
+    for ocid, release in [
+        ("ocds-1", {"parties": [buyer]}),
+        ("ocds-2", {"tender": {"items": [{"deliveryAddresses": [{"region": "UKD33"}]}]}}),
+        ("ocds-3", {"tender": {}}),  # No region anywhere: stays unknown
+    ]:
+        db.add(Notice(ocid=ocid, title="Tender", publication_date=datetime(2024, 3, 1), raw_json={"ocid": ocid, **release}))
+    db.commit()
+
+    assert backfill(session_factory=lambda: db, chunk_size=2) == 2
+    regions = {n.ocid: n.delivery_regions for n in db.query(Notice).all()}
+    assert regions == {"ocds-1": ["uke42"], "ocds-2": ["ukd33"], "ocds-3": None}
@@ -1,8 +1,9 @@
 import pytest
 from unittest.mock import MagicMock, patch
 from datetime import datetime
+from sqlalchemy import text
 from app.workers.ingestion_worker import IngestionWorker
-from app.models import Notice, Buyer, IngestionLog
+from app.models import Notice, Buyer, IngestionLog, DeadLetterRelease
 
 def test_ingestion_worker_run(db):
     """
@@ -29,7 +30,7 @@ def test_ingestion_worker_run(db):
     # Mock the FTS Client
     with patch('app.workers.ingestion_worker.FTSClient') as MockClient:
         mock_instance = MockClient.return_value
-        mock_instance.fetch_releases.return_value = [sample_release]
+        mock_instance.fetch_pages.return_value = [{"releases": [sample_release], "links": {}}]
 
         # Patch Postgres insert with SQLite insert for compatibility
         from sqlalchemy.dialects.sqlite import insert as sqlite_insert
@@ -59,3 +60,179 @@ def test_ingestion_worker_run(db):
     assert notice.title == "Test Tender"
     assert notice.value_amount == 10000
     assert notice.buyer_id == buyer.id
+
+    # 4. Raw release lives compressed in notice_raw and loads only on access
+    db.expire_all()
+    notice = db.query(Notice).filter_by(ocid="ocds-b5fd17-12345").first()
+    assert "raw" not in notice.__dict__
+    assert notice.raw_json == sample_release
+    assert isinstance(db.execute(text("SELECT release FROM notice_raw")).scalar(), bytes)
+
+def test_ingestion_worker_batches_and_isolates_bad_rows(db):
+    """
+    Releases are ingested in batches; a row that violates a constraint is
+    skipped via its savepoint without losing the rest of the batch.
+    """
+    def release(ocid, buyer, title="Tender"):
+        return {
+            "ocid": ocid,
+            "id": f"{ocid}-r1",
+            "date": "2023-10-01T10:00:00Z",
+            "tag": ["contractNotice"],
+            "buyer": {"name": buyer},
+            "tender": {"title": title, "value": {"amount": 5000, "currency": "GBP"}},
+        }
+
+    releases = [
+        release("ocds-1", "Leeds City Council"),
+        release("ocds-2", "Leeds City Council"),
+        release("ocds-3", "Kent County Council", title=None),  # NOT NULL violation
+        release("ocds-4", "Kent County Council"),
+        release("ocds-5", "Bristol City Council"),
+    ]
+
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+    with patch('app.workers.ingestion_worker.FTSClient') as MockClient, \
+         patch('app.workers.ingestion_worker.insert', side_effect=sqlite_insert), \
+         patch('app.services.ingestion.enrichment_service.EmbeddingService'), \
+         patch('app.workers.ingestion_worker.SessionLocal', return_value=db):
+        MockClient.return_value.fetch_pages.return_value = [
+            {"releases": releases[:2]}, {"releases": releases[2:4]}, {"releases": releases[4:]}
+        ]
+        IngestionWorker().run(batch_size=3)
+
+    log = db.query(IngestionLog).first()
+    assert log.status == "SUCCESS"
+    assert log.items_processed == 4
+
+    assert db.query(Buyer).count() == 3
+    assert {n.ocid for n in db.query(Notice).all()} == {"ocds-1", "ocds-2", "ocds-4", "ocds-5"}
+
+    # The bad release is kept for replay rather than dropped
+    letter = db.query(DeadLetterRelease).one()
+    assert (letter.ocid, letter.error_class, letter.attempts, letter.status) == ("ocds-3", "IntegrityError", 1, "PENDING")
+    assert letter.release["tender"]["title"] is None
+
+def test_ingestion_worker_skips_unchanged_releases(db):
+    """
+    A re-published release with identical content (new release id/date only)
+    is skipped; one with a changed field is written again.
+    """
+    def release(ocid, release_id, amount=5000):
+        return {
+            "ocid": ocid,
+            "id": release_id,
+            "date": f"2023-10-0{release_id[-1]}T10:00:00Z",
+            "tag": ["contractNotice"],
+            "buyer": {"name": "Leeds City Council"},
+            "tender": {"title": "Tender", "value": {"amount": amount, "currency": "GBP"}},
+        }
+
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+    with patch('app.workers.ingestion_worker.FTSClient') as MockClient, \
+         patch('app.workers.ingestion_worker.insert', side_effect=sqlite_insert), \
+         patch('app.services.ingestion.enrichment_service.EmbeddingService'), \
+         patch('app.workers.ingestion_worker.SessionLocal', return_value=db):
+        worker = IngestionWorker()
+        MockClient.return_value.fetch_pages.return_value = [{"releases": [release("ocds-1", "r1"), release("ocds-2", "r1")]}]
+        worker.run()
+        MockClient.return_value.fetch_pages.return_value = [{"releases": [release("ocds-1", "r2"), release("ocds-2", "r2", amount=9000)]}]
+        worker.run()
+
+    runs = sorted((log.items_processed, log.items_skipped) for log in db.query(IngestionLog).all())
+    assert runs == [(1, 1), (2, 0)]
+
+    notices = {n.ocid: n for n in db.query(Notice).all()}
+    assert notices["ocds-1"].release_id == "r1"
+    assert notices["ocds-2"].release_id == "r2"
+    assert notices["ocds-2"].value_amount == 9000
+
+def test_ingestion_worker_resyncs_feed_from_the_written_notice(db):
+    """
+    A changed release's feed rows carry its new deadline and value, not the
+    ones stored before the batch was written.
+    """
+    import uuid
+    from app.models import FeedEntry, NoticeMatch, ServiceProfile
+    from app.services.matching.feed import feed_index
+
+    def release(release_id, end_date, amount):
+        return {
+            "ocid": "ocds-1", "id": release_id, "date": "2024-03-01T10:00:00Z", "tag": ["contractNotice"],
+            "buyer": {"name": "Leeds City Council"},
+            "tender": {"title": "Tender", "value": {"amount": amount, "currency": "GBP"},
+                       "tenderPeriod": {"endDate": end_date}},
+        }
+
+    org_id = uuid.uuid4()
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+    with patch('app.workers.ingestion_worker.FTSClient') as MockClient, \
+         patch('app.workers.ingestion_worker.insert', side_effect=sqlite_insert), \
+         patch('app.services.ingestion.enrichment_service.EmbeddingService'), \
+         patch('app.workers.ingestion_worker.SessionLocal', return_value=db):
+        worker = IngestionWorker()
+        MockClient.return_value.fetch_pages.return_value = [{"releases": [release("r1", "2024-04-01T12:00:00Z", 5000)]}]
+        worker.run()
+
+        db.add(ServiceProfile(org_id=org_id, name="Test Org"))
+        db.add(NoticeMatch(org_id=org_id, notice_id="ocds-1", score=0.8))
+        db.commit()
+        feed_index.sync(db, org_id=org_id)
+        db.commit()
+
+        MockClient.return_value.fetch_pages.return_value = [{"releases": [release("r2", "2024-05-01T12:00:00Z", 9000)]}]
+        worker.run()
+
+    entry = db.get(FeedEntry, (org_id, "ocds-1"))
+    assert entry.deadline_date.replace(tzinfo=None) == datetime(2024, 5, 1, 12)
+    assert entry.value_amount == 9000
+
+def test_ingestion_worker_resumes_from_checkpointed_cursor(db):
+    """
+    A run that dies mid-way leaves links.next of its last committed page on
+    the IngestionLog; the next run resumes there, or falls back to the last
+    release date if FTS has expired the cursor.
+    """
+    import httpx
+
+    def release(ocid, date):
+        return {
+            "ocid": ocid, "id": f"{ocid}-r1", "date": date, "tag": ["contractNotice"],
+            "buyer": {"name": "Leeds City Council"},
+            "tender": {"title": "Tender", "value": {"amount": 5000, "currency": "GBP"}},
+        }
+
+    def crashing_pages(**kwargs):
+        yield {"releases": [release("ocds-1", "2024-03-01T09:30:00Z")], "links": {"next": "https://fts/next?cursor=2"}}
+        raise RuntimeError("FTS outage")
+
+    calls = []
+
+    def resumed_pages(updated_after=None, cursor_url=None):
+        calls.append((updated_after, cursor_url))
+        if cursor_url:
+            request = httpx.Request("GET", cursor_url)
+            raise httpx.HTTPStatusError("gone", request=request, response=httpx.Response(410, request=request))
+        return iter([{"releases": [release("ocds-2", "2024-03-01T10:00:00Z")], "links": {}}])
+
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+    with patch('app.workers.ingestion_worker.FTSClient') as MockClient, \
+         patch('app.workers.ingestion_worker.insert', side_effect=sqlite_insert), \
+         patch('app.services.ingestion.enrichment_service.EmbeddingService'), \
+         patch('app.workers.ingestion_worker.SessionLocal', return_value=db):
+        worker = IngestionWorker()
+        MockClient.return_value.fetch_pages.side_effect = crashing_pages
+        worker.run(batch_size=1)
+
+        failed = db.query(IngestionLog).one()
+        assert failed.status == "FAILED"
+        assert failed.cursor_url == "https://fts/next?cursor=2"
+        assert failed.items_processed == 1
+
+        MockClient.return_value.fetch_pages.side_effect = resumed_pages
+        worker.run()
+
+    assert calls[0] == (None, "https://fts/next?cursor=2")
+    assert calls[1][1] is None
+    assert calls[1][0].replace(tzinfo=None) == datetime(2024, 3, 1, 9, 30)
+    assert {n.ocid for n in db.query(Notice).all()} == {"ocds-1", "ocds-2"}
@@ -0,0 +1,78 @@
+import uuid
+import warnings
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SAWarning
+from app.models import Buyer, BuyerCategoryHistory
+from app.services.alerts.alert_service import AlertService
+from app.services.ingestion.enrichment_service import EnrichmentService
+from app.services.matching.buyer_history import BuyerHistoryIndex
+from app.services.matching.renewal_enrichment import RenewalEnrichmentService
+from app.services.matching.renewal_intelligence import RenewalIntelligenceService
+from app.workers.ingestion_worker import IngestionWorker
+
+
+def award_notice(ocid, buyer_id, published, supplier, cpv_codes=("85311000",), notice_type="historical"):
+    return SimpleNamespace(
+        ocid=ocid, buyer_id=buyer_id, publication_date=published, notice_type=notice_type,
+        cpv_codes=list(cpv_codes), raw_json={"awards": [{"suppliers": [{"name": supplier}]}]},
+    )
+
+
+def test_incremental_history_matches_rebuild(db):
+    buyer = Buyer(id=uuid.uuid4(), canonical_name="Leeds City Council")
+    db.add(buyer)
+    db.commit()
+    notices = [
+        award_notice("ocds-1", buyer.id, datetime(2018, 4, 1), "Shelter Ltd"),
+        award_notice("ocds-2", buyer.id, datetime(2021, 4, 1), "Housing Plus"),
+        award_notice("ocds-3", buyer.id, datetime(2024, 5, 1), "Shelter Ltd", cpv_codes=("85311000", "85312000")),
+        award_notice("ocds-4", buyer.id, datetime(2024, 6, 1), "Live tender", notice_type="tender"),
+    ]
+    index = BuyerHistoryIndex()
+    # Out of order, and re-ingested: neither moves the result
+    index.record(db, [notices[2], notices[0]])
+    index.record(db, [notices[1], notices[2], notices[3]])
+    db.commit()
+
+    row = db.get(BuyerCategoryHistory, (buyer.id, "8531"))
+    assert row.award_count == 3
+    assert [a["ocid"] for a in row.awards] == ["ocds-1", "ocds-2", "ocds-3"]
+    assert row.incumbent == "Shelter Ltd"
+    assert row.suppliers == ["Shelter Ltd", "Housing Plus"]
+    assert row.estimated_cycle_years == 3
+    incremental = {(r.cpv_prefix, r.award_count, r.incumbent, tuple(r.suppliers)) for r in db.query(BuyerCategoryHistory)}
+
+    # Rebuilding over rows this session already loaded must not trip the identity map
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", SAWarning)
+        assert index.rebuild(db, notices) == 1
+    rebuilt = {(r.cpv_prefix, r.award_count, r.incumbent, tuple(r.suppliers)) for r in db.query(BuyerCategoryHistory)}
+    assert rebuilt == incremental
+
+    assert RenewalIntelligenceService(db).analyze_cycles("8531", str(buyer.id)) == 3
+    radar = RenewalEnrichmentService(db).enrich(SimpleNamespace(buyer_id=buyer.id, cpv_codes=["85311000"]))
+    assert radar["buyer_seen_before"] and radar["historical_contract_count"] == 3
+    assert radar["incumbent"] == "Shelter Ltd" and radar["estimated_cycle_years"] == 3
+    assert RenewalEnrichmentService(db).enrich(
+        SimpleNamespace(buyer_id=buyer.id, cpv_codes=["45000000"])
+    )["buyer_seen_before"] is False
+
+
+def test_live_award_releases_extend_history(db):
+    release = {
+        "ocid": "ocds-award-1", "id": "ocds-award-1-r1", "date": "2024-03-01T10:00:00Z", "tag": ["award"],
+        "buyer": {"name": "Leeds City Council"},
+        "parties": [{"id": "sup-1", "name": "Shelter Ltd"}],
+        "tender": {"title": "Floating Housing Support", "items": [{"classification": {"scheme": "CPV", "id": "85311000"}}]},
+        "awards": [{"id": "1", "status": "active", "suppliers": [{"id": "sup-1", "name": "Shelter Ltd"}]}],
+    }
+    with patch('app.workers.ingestion_worker.insert', side_effect=sqlite_insert), \
+         patch('app.services.ingestion.enrichment_service.EmbeddingService'):
+        IngestionWorker()._process_batch(db, [release], EnrichmentService(db), AlertService(db))
+
+    row = db.query(BuyerCategoryHistory).filter_by(cpv_prefix="8531").one()
+    assert [a["ocid"] for a in row.awards] == ["ocds-award-1"]
+    assert row.incumbent == "Shelter Ltd"
@@ -0,0 +1,44 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from app.models import Alert, FeedEntry, Notice, NoticeMatch, ServiceProfile
+from app.services.matching.feed import FeedService, feed_index, rank_score
+from app.services.matching.tracking import TrackingService
+
+NOW = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+def test_rank_lifts_unread_alerts_and_close_deadlines():
+    assert rank_score(Decimal("0.5"), 0, None, NOW) == Decimal("0.5")
+    assert rank_score(Decimal("0.5"), 5, None, NOW) == Decimal("0.8")  # Capped at 3 alerts
+    assert rank_score(Decimal("0.5"), 0, NOW + timedelta(days=3), NOW) > rank_score(Decimal("0.5"), 0, NOW + timedelta(days=20), NOW)
+    assert rank_score(Decimal("0.5"), 0, NOW + timedelta(days=60), NOW) == Decimal("0.5")
+    assert rank_score(Decimal("0.9"), 0, NOW - timedelta(days=1), NOW) < 0
+
+
+def test_feed_pages_follow_rank_and_track_writes(db):
+    org_id = uuid.uuid4()
+    db.add(ServiceProfile(org_id=org_id, name="Test Org"))
+    for i in range(7):
+        db.add(Notice(ocid=f"feed-{i}", title=f"Notice {i}", publication_date=NOW, deadline_date=NOW + timedelta(days=90)))
+        db.add(NoticeMatch(org_id=org_id, notice_id=f"feed-{i}", score=Decimal(f"0.{i + 1}"), feedback_status="REVIEW"))
+    for _ in range(2):
+        db.add(Alert(org_id=org_id, notice_id="feed-0", alert_type="MATERIAL_CHANGE", message="Deadline moved", is_read=False))
+    db.commit()
+    feed_index.sync(db, org_id=org_id, now=NOW)
+    db.commit()
+
+    service = FeedService(db)
+    seen, cursor = [], None
+    while True:
+        page, cursor = service.get_feed_page(org_id, limit=3, cursor=cursor)
+        seen += [e.notice_id for e in page]
+        if cursor is None:
+            break
+    # feed-0 scores 0.1 but its two unread alerts lift it past feed-1 (0.2)
+    assert seen == ["feed-6", "feed-5", "feed-4", "feed-3", "feed-2", "feed-0", "feed-1"]
+
+    # Tracking moves a match to the top without a full re-sync
+    TrackingService(db).toggle_tracking(org_id, "feed-1")
+    assert [e.notice_id for e in service.get_feed(org_id, limit=2)] == ["feed-1", "feed-6"]
+    assert db.get(FeedEntry, (org_id, "feed-1")).is_tracked is True
@@ -0,0 +1,31 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from app.models import ProcurementForecast
+from app.services.matching.renewal_intelligence import RenewalIntelligenceService
+
+
+def historical_notice(buyer_id, cpv_codes=("85311000",)):
+    return SimpleNamespace(
+        buyer_id=buyer_id, cpv_codes=list(cpv_codes), publication_date=datetime(2022, 4, 1),
+        contract_period_start=datetime(2022, 5, 1), contract_period_end=datetime(2024, 5, 1), ocid="ocds-hist-1",
+    )
+
+
+def test_lifecycle_prediction_uses_batch_forecast(db):
+    buyer_id = uuid.uuid4()
+    db.add(ProcurementForecast(
+        buyer_id=buyer_id, cpv_prefix="8531", award_count=4, gap_count=3, last_awarded_at=datetime(2022, 4, 1),
+        cycle_years=Decimal("4.00"), cycle_basis="observed", confidence=Decimal("0.85"),
+    ))
+    db.commit()
+    service = RenewalIntelligenceService(db)
+
+    prediction = service.predict_next_lifecycle(historical_notice(buyer_id))
+    assert (prediction["cycle_years"], prediction["confidence"]) == (4.0, 0.85)
+    assert prediction["next_procure_date"].year == 2026
+
+    # No forecast for the category: falls back to the notice's own contract length
+    fallback = service.predict_next_lifecycle(historical_notice(buyer_id, cpv_codes=("79000000",)))
+    assert (fallback["cycle_years"], fallback["confidence"]) == (2, None)
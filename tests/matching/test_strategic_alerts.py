@@ -0,0 +1,141 @@
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from app.models import ServiceProfile
+from app.services.matching.renewal_intelligence import (
+    MIN_FORECAST_CONFIDENCE, PROCURE_WINDOW, RenewalIntelligenceService,
+)
+from app.workers import strategic_alerts
+
+TODAY = datetime(2026, 3, 1, tzinfo=timezone.utc)
+# STRATEGIC_ALERTS_SQL is PostgreSQL-only: point this at a database migrated to head to run it for real
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+class RecordingSession:
+    """Stands in for each chunk's session: records the statement's parameters."""
+    calls = []
+    raised = set()
+
+    def execute(self, statement, params):
+        self.calls.append(params)
+        # First run "inserts" one alert per org, re-runs find them all already raised
+        inserted = [o for o in params["org_ids"] if o not in self.raised]
+        self.raised.update(inserted)
+        return SimpleNamespace(rowcount=len(inserted))
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_strategic_alerts_are_written_per_org_chunk(db):
+    orgs = sorted(uuid.uuid4() for _ in range(5))
+    for i, org_id in enumerate(orgs):
+        db.add(ServiceProfile(org_id=org_id, name=f"Org {i}"))
+    db.commit()
+
+    RecordingSession.calls, RecordingSession.raised = [], set()
+    service = RenewalIntelligenceService(db)
+    with patch('app.services.matching.renewal_intelligence.sessionmaker', return_value=RecordingSession):
+        assert service.generate_strategic_alerts(today=TODAY, workers=2, chunk_size=2) == 5
+        # Every org lands in exactly one chunk of at most chunk_size, in org order
+        chunks = sorted(params["org_ids"] for params in RecordingSession.calls)
+        assert chunks == [[str(o) for o in orgs[i:i + 2]] for i in range(0, 5, 2)]
+        for params in RecordingSession.calls:
+            assert params["today"] == TODAY
+            assert params["min_confidence"] == MIN_FORECAST_CONFIDENCE
+            assert params["procure_window"] == PROCURE_WINDOW
+
+        # A re-run raises nothing new
+        assert service.generate_strategic_alerts(today=TODAY, workers=2, chunk_size=2) == 0
+
+
+def test_strategic_alerts_worker_refreshes_forecast_first(db):
+    order = []
+    with patch.object(strategic_alerts, 'ProcurementForecaster') as forecaster, \
+         patch.object(RenewalIntelligenceService, 'generate_strategic_alerts') as generate:
+        forecaster.return_value.run.side_effect = lambda: order.append("forecast")
+        generate.side_effect = lambda **kwargs: order.append("alerts") or 3
+        assert strategic_alerts.run(refresh_forecast=True, workers=1, chunk_size=10, session_factory=lambda: db) == 3
+    assert order == ["forecast", "alerts"]
+    generate.assert_called_once_with(workers=1, chunk_size=10)
+
+
+@pytest.fixture
+def pg():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL not set (needs PostgreSQL)")
+    engine = create_engine(TEST_DATABASE_URL)
+    buyer_id, org_id = uuid.uuid4(), uuid.uuid4()
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO buyer (id, canonical_name) VALUES (:id, 'Leeds City Council')"), {"id": buyer_id})
+        conn.execute(text("""
+            INSERT INTO service_profile (org_id, name, inferred_cpv_codes)
+            VALUES (:org_id, 'Test Org', ARRAY['85310000', '85320000', '85120000', '79410000', '80500000', '85140000'])
+        """), {"org_id": org_id})
+    db = Session(engine)
+    try:
+        yield db, buyer_id, org_id
+    finally:
+        db.close()
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM outbox_message WHERE org_id = :org_id"), {"org_id": org_id})
+            conn.execute(text("DELETE FROM alert WHERE org_id = :org_id"), {"org_id": org_id})
+            conn.execute(text("DELETE FROM service_profile WHERE org_id = :org_id"), {"org_id": org_id})
+            conn.execute(text("DELETE FROM procurement_forecast WHERE buyer_id = :buyer_id"), {"buyer_id": buyer_id})
+            conn.execute(text("DELETE FROM notice WHERE buyer_id = :buyer_id"), {"buyer_id": buyer_id})
+            conn.execute(text("DELETE FROM buyer WHERE id = :buyer_id"), {"buyer_id": buyer_id})
+        engine.dispose()
+
+
+@pytest.mark.postgres
+def test_strategic_alert_stages_on_postgres(pg):
+    db, buyer_id, org_id = pg
+    day = timedelta(days=1)
+    # cpv prefix -> (next_tender_date, confidence); define / plan dates are 180 / 365 days before
+    forecasts = {
+        "8531": (TODAY + timedelta(days=365), 0.8),  # Plan opens today
+        "8532": (TODAY + timedelta(days=180), 0.8),  # Define opens today
+        "8512": (TODAY, 0.8),  # Procure opens today
+        "7941": (TODAY + timedelta(days=365) + day, 0.8),  # Plan opens tomorrow
+        "8050": (TODAY - PROCURE_WINDOW, 0.8),  # Procure window just closed
+        "8514": (TODAY, MIN_FORECAST_CONFIDENCE - 0.1),  # Too uncertain to alert on
+    }
+    with db.begin():
+        for prefix, (tender_date, confidence) in forecasts.items():
+            db.execute(text("""
+                INSERT INTO notice (ocid, title, publication_date, buyer_id, notice_type, cpv_codes)
+                VALUES (:ocid, 'Day Services', :published, :buyer_id, 'contractAward', ARRAY[:cpv])
+            """), {"ocid": f"ocds-{buyer_id}-{prefix}", "published": TODAY - timedelta(days=3 * 365),
+                   "buyer_id": buyer_id, "cpv": f"{prefix}0000"})
+            db.execute(text("""
+                INSERT INTO procurement_forecast (buyer_id, cpv_prefix, award_count, gap_count, last_awarded_at,
+                    cycle_years, cycle_basis, confidence, next_tender_date, next_define_date, next_plan_date)
+                VALUES (:buyer_id, :prefix, 3, 2, :published, 3, 'observed', :confidence,
+                    :tender, :tender - interval '180 days', :tender - interval '365 days')
+            """), {"buyer_id": buyer_id, "prefix": prefix, "published": TODAY - timedelta(days=3 * 365),
+                   "confidence": confidence, "tender": tender_date})
+
+    service = RenewalIntelligenceService(db)
+    service.generate_strategic_alerts(today=TODAY, workers=1)
+    alerts = dict(db.execute(text(
+        "SELECT right(notice_id, 4), alert_type FROM alert WHERE org_id = :org_id"
+    ), {"org_id": org_id}).all())
+    assert alerts == {"8531": "LIFECYCLE_PLAN", "8532": "LIFECYCLE_DEFINE", "8512": "LIFECYCLE_PROCURE"}
+    queued = db.execute(text("SELECT count(*) FROM outbox_message WHERE org_id = :org_id"), {"org_id": org_id}).scalar()
+    assert queued == 3
+
+    # Re-running the same day raises and queues nothing twice
+    assert service.generate_strategic_alerts(today=TODAY, workers=1) == 0
+    assert db.execute(text("SELECT count(*) FROM outbox_message WHERE org_id = :org_id"), {"org_id": org_id}).scalar() == 3
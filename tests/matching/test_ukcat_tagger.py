@@ -0,0 +1,126 @@
+import json
+import os
+import pytest
+
+from app.services.matching.ukcat_ruleset import (
+    expand_ukcat_codes, extract_literals, load_ruleset, ukcat_prefix_id, ukcat_prefixes,
+)
+from app.services.matching.ukcat_tagger import tagger
+
+SAMPLE_PATH = os.path.join(os.path.dirname(__file__), "../../data/fts_sample.json")
+
+
+def test_extract_literals_from_alternation():
+    assert extract_literals(r"\b(cats?|felines?)\b") == ["cat", "feline"]
+    assert extract_literals(r"\b(Rhodesian Ridgeback|dogs?)\b") == ["dog", "rhodesian ridgeback"]
+
+
+def test_extract_literals_gives_up_on_wildcards():
+    assert extract_literals(r"\b(.*)\b") is None
+    assert extract_literals(r"\b(s?)\b") is None
+
+
+def test_prefix_expansion_covers_ancestors():
+    assert ukcat_prefixes("HE101") == ["HE", "HE1", "HE101"]
+    assert ukcat_prefixes("HE") == ["HE"]
+
+    ids = set(expand_ukcat_codes(["HE101", "AR201"]))
+    assert {ukcat_prefix_id(p) for p in ["HE", "HE1", "HE101", "AR", "AR2", "AR201"]} == ids
+    assert ukcat_prefix_id("HE") not in expand_ukcat_codes(["HO101"])
+    assert len({ukcat_prefix_id(p) for p in ["EC", "EC1", "EC103", "EC2", "ED"]}) == 5
+
+
+def test_compiled_tagger_matches_exhaustive_scan():
+    with open(SAMPLE_PATH, "r", encoding="utf-8") as f:
+        releases = json.load(f)["releases"]
+
+    texts = [f"{r['tender'].get('title', '')} {r['tender'].get('description') or ''}" for r in releases]
+    texts += [
+        "MENTAL HEALTH support for Older People and their DOGS",
+        "ſheltered housing for the homeleſs",  # long s folds to "s" under IGNORECASE
+        "Salvation Army hostel",
+    ]
+    for text in texts:
+        assert tagger.tag_text(text) == tagger._tag_text_exhaustive(text)
+
+
+def test_ruleset_cache_round_trip(tmp_path):
+    csv_path = tmp_path / "ukcat.csv"
+    csv_path.write_text(
+        "Code,tag,Regular expression,Exclude regular expression\n"
+        "AN101,Cats,\\b(cats?|felines?)\\b,\n"
+        "AF101,Army,\\b(army|soldiers?)\\b,\\b(salvation army)\\b\n",
+        encoding="utf-8",
+    )
+    cache_dir = tmp_path / "cache"
+
+    compiled = load_ruleset(str(csv_path), str(cache_dir))
+    cached = load_ruleset(str(csv_path), str(cache_dir))
+
+    assert len(os.listdir(cache_dir)) == 1
+    assert cached.version == compiled.version
+    assert [r["code"] for r in cached.rules] == ["AN101", "AF101"]
+    assert cached.candidate_rules("Two cats and a dog") == frozenset([0])
+
+
+def test_retag_worker_updates_only_stale_rows(db):
+    from datetime import datetime
+    from app.models import Notice, ServiceProfile
+    from app.workers.ukcat_retag_worker import UKCATRetagWorker
+    from tests.conftest import TestingSessionLocal
+
+    def make_notice(ocid, version):
+        return Notice(ocid=ocid, title="Dog kennels", description="Boarding for dogs",
+                      publication_date=datetime(2024, 1, 1), raw_json={},
+                      inferred_ukcat_codes=["OLD"], ukcat_ruleset_version=version)
+
+    db.add_all([
+        make_notice("stale-1", "0000000000000000"),
+        make_notice("stale-2", None),
+        make_notice("fresh-1", tagger.version),
+        ServiceProfile(name="Cat Rescue", mission="Rehoming stray cats"),
+    ])
+    db.commit()
+
+    stats = UKCATRetagWorker(session_factory=TestingSessionLocal, batch_size=1, processes=1).run()
+    assert stats == {"notices": 2, "profiles": 1}
+
+    db.expire_all()
+    assert db.get(Notice, "stale-1").inferred_ukcat_codes == tagger.tag_notice("Dog kennels", "Boarding for dogs")
+    assert db.get(Notice, "stale-2").ukcat_ruleset_version == tagger.version
+    assert db.get(Notice, "fresh-1").inferred_ukcat_codes == ["OLD"]
+    profile = db.query(ServiceProfile).one()
+    assert "AN101" in profile.inferred_ukcat_codes
+
+
+def test_retagging_with_no_tags_clears_stale_ones():
+    from datetime import datetime
+    from unittest.mock import patch
+    from app.models import Notice
+    from app.services.ingestion.enrichment_service import EnrichmentService
+
+    notice = Notice(ocid="stale-3", title="Office furniture", description="Desks and chairs",
+                    publication_date=datetime(2024, 1, 1), inferred_ukcat_codes=["AN101"],
+                    ukcat_prefix_ids=expand_ukcat_codes(["AN101"]), ukcat_ruleset_version="0000000000000000")
+    with patch('app.services.ingestion.enrichment_service.EmbeddingService'):
+        EnrichmentService(db=None).enrich_batch([notice])
+    assert notice.ukcat_ruleset_version == tagger.version
+    assert (notice.inferred_ukcat_codes, notice.ukcat_prefix_ids) == (None, None)
+
+
+def test_untagged_notice_on_current_ruleset_is_left_alone(db):
+    from datetime import datetime
+    from unittest.mock import patch
+    from app.models import Notice
+    from app.services.ingestion.enrichment_service import EnrichmentService
+
+    db.add(Notice(ocid="untagged-1", title="Office furniture", description="Desks and chairs",
+                  publication_date=datetime(2024, 1, 1), embedding=[0.1], ukcat_ruleset_version=tagger.version))
+    db.commit()
+    with patch('app.services.ingestion.enrichment_service.EmbeddingService'):
+        service = EnrichmentService(db)
+        with patch.object(service.ukcat_tagger, 'tag_notice') as tag_notice, patch.object(db, 'commit') as commit:
+            service.bulk_enrich_stale()
+            service.enrich_notice(db.get(Notice, "untagged-1"))
+    tag_notice.assert_not_called()
+    commit.assert_not_called()